@@ -0,0 +1,327 @@
+"""
+Amélioration locale d'un planning par recuit simulé, dans un budget de temps strict.
+
+Deux mouvements sont tirés au hasard : déplacer un match vers un terrain libre d'un
+autre tour, ou échanger deux matchs de tours différents. Seules les équipes touchées
+par le mouvement sont réévaluées, ce qui garde chaque itération bon marché.
+
+L'énergie minimisée combine, par ordre d'importance :
+- le nombre de tours (un tour ne peut disparaître que par la fin du planning) ;
+- le nombre de matchs du dernier tour, pour pousser à le vider, tant que la borne
+  inférieure du nombre de tours n'est pas atteinte ;
+- une pénalité sur les repos courts de chaque équipe.
+
+Un mouvement qui enfreindrait une contrainte dure est refusé. Le meilleur état
+rencontré est conservé, et le planning d'origine est rendu tel quel si la recherche
+ne l'a pas strictement amélioré. La recherche s'arrête avant l'échéance dès que
+l'énergie atteint son minimum théorique : borne inférieure de tours, et repos de
+chaque équipe répartis le plus également possible sur ces tours.
+
+Le budget couvre aussi la préparation et la reconstruction finale. Avant de préparer
+tout le planning, chaque appel mesure la préparation de quelques tours et en déduit
+le coût des deux : un budget qui ne peut pas les couvrir rend le planning d'origine
+sans chercher. La préparation faite, sa durée réelle fixe l'échéance de la recherche.
+"""
+import hashlib
+import math
+import random
+import time
+from bisect import bisect_left
+
+from calendrier import placer_creneaux
+from contraintes import Contraintes
+from metriques import calculer_metriques
+from planificateur import transposer_terrains
+from recherche import objectif, valider_budget
+
+POIDS_TOUR = 10000
+POIDS_DERNIER_TOUR = 50
+REPOS_CONFORTABLE = 3
+TEMPERATURE_INITIALE = 5.0
+# Reconstruction finale (métriques, créneaux, contraintes), en multiples de la préparation
+COUT_RECONSTRUCTION = 5
+# Tours préparés pour estimer le coût de la préparation complète
+TOURS_ECHANTILLON = 8
+
+
+def _penalite(repos):
+    return max(0, REPOS_CONFORTABLE - repos) ** 2
+
+
+def _cout(tours):
+    return sum(_penalite(b - a - 1) for a, b in zip(tours, tours[1:]))
+
+
+def _cout_minimal(nb_matchs, nb_tours):
+    """
+    Plus petit coût de repos possible pour nb_matchs joués en nb_tours tours :
+    la pénalité étant convexe, le repos disponible est réparti également
+    """
+    if nb_matchs < 2:
+        return 0
+    ecarts = nb_matchs - 1
+    quotient, reste = divmod(max(0, nb_tours - nb_matchs), ecarts)
+    return reste * _penalite(quotient + 1) + (ecarts - reste) * _penalite(quotient)
+
+
+def _variation_voisins(tours, i, r):
+    """
+    Variation du coût quand le tour r est intercalé entre tours[i - 1] et tours[i]
+    """
+    precedent = tours[i - 1] if i > 0 else None
+    suivant = tours[i] if i < len(tours) else None
+    delta = 0
+    if precedent is not None:
+        delta += _penalite(r - precedent - 1)
+    if suivant is not None:
+        delta += _penalite(suivant - r - 1)
+    if precedent is not None and suivant is not None:
+        delta -= _penalite(suivant - precedent - 1)
+    return delta
+
+
+def _energie_minimale(etat, nb_tours_max):
+    """
+    Minorant de l'énergie sur les longueurs de planning atteignables (un tour ne peut
+    que disparaître) ; au-delà de la borne, chaque tour coûte POIDS_TOUR de plus
+    """
+    nb_matchs = [len(tours) for tours in etat.tours_equipe.values()]
+    minimum = None
+    for nb_tours in range(etat.borne, nb_tours_max + 1):
+        energie = POIDS_TOUR * nb_tours
+        if minimum is not None and energie >= minimum:
+            break
+        energie += sum(_cout_minimal(k, nb_tours) for k in nb_matchs)
+        if minimum is None or energie < minimum:
+            minimum = energie
+    return minimum if minimum is not None else 0
+
+
+class _Etat:
+    def __init__(self, planning, borne=0):
+        self.grille = [list(tour["matches"]) for tour in planning]
+        self.occupees = [set() for _ in planning]
+        self.nb_matchs = [0] * len(planning)
+        self.tours_equipe = {}
+        for r, matchs in enumerate(self.grille):
+            for match in matchs:
+                if match is None:
+                    continue
+                self.nb_matchs[r] += 1
+                for e in (match['equipe1'], match['equipe2']):
+                    self.occupees[r].add(e)
+                    self.tours_equipe.setdefault(e, []).append(r)
+        self.dernier = len(planning) - 1
+        self.energie_repos = sum(_cout(tours) for tours in self.tours_equipe.values())
+        self.borne = borne
+
+    def energie(self):
+        energie = POIDS_TOUR * (self.dernier + 1) + self.energie_repos
+        if self.dernier + 1 > self.borne:
+            energie += POIDS_DERNIER_TOUR * self.nb_matchs[self.dernier]
+        return energie
+
+    def respecte(self, regles, match, r):
+        """
+        Vérifie les contraintes dures des deux équipes d'un match placé au tour d'indice r
+        """
+        for e in (match['equipe1'], match['equipe2']):
+            tours = [t + 1 for t in self.tours_equipe[e] if t != r]
+            if not regles.respecte(e, tours, r + 1):
+                return False
+        return True
+
+    def deplacer(self, match, de, vers):
+        """
+        Change le tour d'un match ; seuls les voisins des deux tours concernés sont réévalués
+        """
+        for e in (match['equipe1'], match['equipe2']):
+            tours = self.tours_equipe[e]
+            i = bisect_left(tours, de)
+            del tours[i]
+            self.energie_repos -= _variation_voisins(tours, i, de)
+            i = bisect_left(tours, vers)
+            self.energie_repos += _variation_voisins(tours, i, vers)
+            tours.insert(i, vers)
+            self.occupees[de].discard(e)
+            self.occupees[vers].add(e)
+
+    def echanger(self, m1, a, m2, b):
+        """
+        Passe m1 du tour a au tour b et m2 de b à a ; une équipe qui joue les deux
+        matchs reste occupée aux deux tours
+        """
+        self.deplacer(m1, a, b)
+        self.deplacer(m2, b, a)
+        for e in {m1['equipe1'], m1['equipe2']} & {m2['equipe1'], m2['equipe2']}:
+            self.occupees[a].add(e)
+            self.occupees[b].add(e)
+
+
+def _inchange(resultats, debut, iterations=0, acceptes=0, avant=None):
+    """
+    Copie du planning d'origine accompagnée du compte rendu de la passe ; avant vaut
+    None quand le budget n'a pas permis d'évaluer le planning
+    """
+    inchange = dict(resultats)
+    avant = list(avant) if avant is not None else None
+    inchange["amelioration"] = {
+        "iterations": iterations,
+        "acceptes": acceptes,
+        "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+        "avant": avant,
+        "apres": avant,
+        "retenu": False
+    }
+    return inchange
+
+
+def ameliorer_planning(poules, resultats, budget_ms, graine=None):
+    """
+    Retourne un planning au moins aussi bon que celui fourni, en au plus budget_ms millisecondes
+    """
+    budget_ms = valider_budget(budget_ms)
+    debut = time.perf_counter()
+    planning = resultats["planning"]
+    if len(planning) < 2 or not budget_ms:
+        return _inchange(resultats, debut)
+    echantillon = planning[:TOURS_ECHANTILLON]
+    _Etat(echantillon)
+    estimation = (time.perf_counter() - debut) * len(planning) / len(echantillon)
+    if budget_ms / 1000 <= (1 + COUT_RECONSTRUCTION) * estimation:
+        return _inchange(resultats, debut)
+
+    rng = random.Random(resultats["graine"] if graine is None else graine)
+    nb_terrains = len(resultats["terrains"])
+    etat = _Etat(planning, resultats["metriques"]["borne_inferieure"])
+    regles = Contraintes(resultats["contraintes"]) if resultats.get("contraintes") else None
+    grille = etat.grille
+    energie = meilleure_energie = etat.energie()
+    energie_minimale = _energie_minimale(etat, len(planning))
+    repos_initial = meilleur_repos = etat.energie_repos
+    meilleure_grille = None
+    iterations = 0
+    acceptes = 0
+
+    # La reconstruction finale, estimée d'après la préparation qui vient d'être mesurée,
+    # est retirée du budget ; si rien ne reste, on ne cherche pas
+    preparation = time.perf_counter() - debut
+    echeance = debut + budget_ms / 1000 - COUT_RECONSTRUCTION * preparation
+
+    while meilleure_energie > energie_minimale:
+        if iterations % 32 == 0:
+            maintenant = time.perf_counter()
+            if maintenant >= echeance:
+                break
+            temperature = TEMPERATURE_INITIALE * (echeance - maintenant) / (echeance - debut) + 1e-3
+        iterations += 1
+
+        dernier = etat.dernier
+        if dernier == 0:
+            break
+        a = dernier if rng.random() < 0.3 else rng.randint(0, dernier)
+        b = rng.randint(0, dernier)
+        if a == b:
+            continue
+        sa = rng.randrange(nb_terrains)
+        m1 = grille[a][sa]
+        if m1 is None:
+            continue
+        sb = rng.randrange(nb_terrains)
+        m2 = grille[b][sb]
+        equipes1 = {m1['equipe1'], m1['equipe2']}
+
+        if m2 is None:
+            # Déplacement vers un terrain libre ; un tour intermédiaire ne doit pas se vider
+            if equipes1 & etat.occupees[b] or (etat.nb_matchs[a] == 1 and a != dernier):
+                continue
+            etat.deplacer(m1, a, b)
+            grille[a][sa], grille[b][sb] = None, m1
+            etat.nb_matchs[a] -= 1
+            etat.nb_matchs[b] += 1
+            while etat.nb_matchs[etat.dernier] == 0:
+                etat.dernier -= 1
+            nouvelle = etat.energie()
+            admissible = regles is None or etat.respecte(regles, m1, b)
+            if admissible and (nouvelle <= energie or rng.random() < math.exp((energie - nouvelle) / temperature)):
+                energie = nouvelle
+                acceptes += 1
+                if energie < meilleure_energie:
+                    meilleure_energie, meilleur_repos = energie, etat.energie_repos
+                    meilleure_grille = [list(matchs) for matchs in grille[:etat.dernier + 1]]
+                continue
+            etat.deplacer(m1, b, a)
+            grille[a][sa], grille[b][sb] = m1, None
+            etat.nb_matchs[a] += 1
+            etat.nb_matchs[b] -= 1
+            etat.dernier = dernier
+        else:
+            equipes2 = {m2['equipe1'], m2['equipe2']}
+            if (equipes1 - equipes2) & etat.occupees[b] or (equipes2 - equipes1) & etat.occupees[a]:
+                continue
+            etat.echanger(m1, a, m2, b)
+            grille[a][sa], grille[b][sb] = m2, m1
+            nouvelle = etat.energie()
+            admissible = regles is None or (etat.respecte(regles, m1, b) and etat.respecte(regles, m2, a))
+            if admissible and (nouvelle <= energie or rng.random() < math.exp((energie - nouvelle) / temperature)):
+                energie = nouvelle
+                acceptes += 1
+                if energie < meilleure_energie:
+                    meilleure_energie, meilleur_repos = energie, etat.energie_repos
+                    meilleure_grille = [list(matchs) for matchs in grille[:etat.dernier + 1]]
+                continue
+            etat.echanger(m1, b, m2, a)
+            grille[a][sa], grille[b][sb] = m1, m2
+
+    avant = objectif(resultats) + (repos_initial,)
+    if meilleure_grille is None:
+        return _inchange(resultats, debut, iterations, acceptes, avant)
+
+    equipes = []
+    vues = set()
+    for poule in poules:
+        if len(poule['equipes']) < 2:
+            continue
+        for e in poule['equipes']:
+            if e not in vues:
+                vues.add(e)
+                equipes.append(e)
+
+    nouveau_planning = []
+    for r, matchs in enumerate(meilleure_grille):
+        occupees = set()
+        for match in matchs:
+            if match is not None:
+                occupees.update((match['equipe1'], match['equipe2']))
+        nouveau_planning.append({
+            "tour": r + 1,
+            "matches": matchs,
+            "repos": [e for e in equipes if e not in occupees]
+        })
+
+    candidat = dict(resultats)
+    candidat.update({
+        "planning": nouveau_planning,
+        "terrains": transposer_terrains(nouveau_planning, nb_terrains),
+        "nb_tours": len(nouveau_planning),
+        "metriques": calculer_metriques(nouveau_planning, poules, nb_terrains)
+    })
+    apres = objectif(candidat) + (meilleur_repos,)
+    valide = regles is None or regles.violations(nouveau_planning) <= regles.violations(planning)
+    retenu = candidat if valide and apres < avant else dict(resultats)
+    if retenu is candidat:
+        if "calendrier" in resultats:
+            retenu["calendrier"] = placer_creneaux(nouveau_planning, nb_terrains,
+                                                   resultats["calendrier"]["options"])
+        texte = f"{resultats['id_planning']}:amelioration:{iterations}:{graine}"
+        retenu["id_planning"] = hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+    retenu["amelioration"] = {
+        "iterations": iterations,
+        "acceptes": acceptes,
+        "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+        "avant": list(avant),
+        "apres": list(apres),
+        "retenu": retenu is candidat
+    }
+    return retenu
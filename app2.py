@@ -1,12 +1,12 @@
 from flask import Flask, render_template_string, request, jsonify, send_file
-from itertools import combinations
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import cm
 import io
-import random
+
+from planificateur import generer_matchs_optimise
 
 app = Flask(__name__)
 
@@ -699,83 +699,6 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
-def generer_matchs_optimise(poules, nb_terrains):
-    """
-    Génère les matchs en optimisant les pauses entre matchs pour chaque équipe
-    """
-    tous_les_matchs = []
-    toutes_les_equipes = set()
-    
-    for poule in poules:
-        if len(poule['equipes']) < 2:
-            continue
-        equipes = poule['equipes']
-        toutes_les_equipes.update(equipes)
-        
-        for equipe1, equipe2 in combinations(equipes, 2):
-            tous_les_matchs.append({
-                'equipe1': equipe1,
-                'equipe2': equipe2,
-                'poule': poule['nom']
-            })
-    
-    if not tous_les_matchs:
-        return {"terrains": [[] for _ in range(nb_terrains)], "planning": []}
-    
-    random.shuffle(tous_les_matchs)
-    matchs_restants = tous_les_matchs.copy()
-    dernier_tour = {e: -10 for e in toutes_les_equipes}
-    tour = 0
-    planning = []
-
-    while matchs_restants:
-        tour += 1
-        matchs_tour = []
-        equipes_occupees = set()
-        matchs_scores = []
-        
-        for match in matchs_restants:
-            e1, e2 = match['equipe1'], match['equipe2']
-            score_pause = (tour - dernier_tour[e1]) + (tour - dernier_tour[e2])
-            matchs_scores.append((score_pause, random.random(), match))
-        
-        matchs_scores.sort(reverse=True)
-        
-        for _, _, match in matchs_scores:
-            e1, e2 = match['equipe1'], match['equipe2']
-            if e1 not in equipes_occupees and e2 not in equipes_occupees:
-                matchs_tour.append(match)
-                equipes_occupees.update([e1, e2])
-                dernier_tour[e1] = tour
-                dernier_tour[e2] = tour
-                matchs_restants.remove(match)
-                if len(matchs_tour) == nb_terrains:
-                    break
-        
-        while len(matchs_tour) < nb_terrains:
-            matchs_tour.append(None)
-        
-        equipes_repos = [e for e in toutes_les_equipes if e not in equipes_occupees]
-        planning.append({
-            "tour": tour,
-            "matches": matchs_tour,
-            "repos": equipes_repos
-        })
-        
-        if all(m is None for m in matchs_tour):
-            break
-
-    terrains = [[] for _ in range(nb_terrains)]
-    for tour in planning:
-        for i, match in enumerate(tour["matches"]):
-            terrains[i].append(match)
-    
-    for terrain in terrains:
-        while terrain and terrain[-1] is None:
-            terrain.pop()
-    
-    return {"terrains": terrains, "planning": planning}
-
 
 @app.route('/')
 def index():
@@ -0,0 +1,255 @@
+"""
+Comparaison de performance du planificateur sur des tournois de taille croissante.
+
+Usage : python benchmark.py
+        python benchmark.py --suite [--sortie resultats.json]
+
+La suite couvre des journées de club, des festivals de 64 équipes et des tournois
+synthétiques de plus de 1000 équipes, de 1 à 20 terrains, avec des poules de tailles
+déséquilibrées. Pour chaque stratégie elle mesure le temps, le pic mémoire, le nombre
+de tours et les indicateurs de qualité, et produit un JSON comparable d'une version
+à l'autre : les graines sont dérivées de la configuration, donc reproductibles.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from itertools import combinations
+
+from planificateur import STRATEGIES, generer_matchs_optimise
+
+
+def generer_matchs_reference(poules, nb_terrains):
+    """
+    Version d'origine (tri complet et suppression linéaire à chaque tour), gardée pour comparaison
+    """
+    tous_les_matchs = []
+    toutes_les_equipes = set()
+
+    for poule in poules:
+        if len(poule['equipes']) < 2:
+            continue
+        equipes = poule['equipes']
+        toutes_les_equipes.update(equipes)
+
+        for equipe1, equipe2 in combinations(equipes, 2):
+            tous_les_matchs.append({
+                'equipe1': equipe1,
+                'equipe2': equipe2,
+                'poule': poule['nom']
+            })
+
+    if not tous_les_matchs:
+        return {"terrains": [[] for _ in range(nb_terrains)], "planning": []}
+
+    random.shuffle(tous_les_matchs)
+    matchs_restants = tous_les_matchs.copy()
+    dernier_tour = {e: -10 for e in toutes_les_equipes}
+    tour = 0
+    planning = []
+
+    while matchs_restants:
+        tour += 1
+        matchs_tour = []
+        equipes_occupees = set()
+        matchs_scores = []
+
+        for match in matchs_restants:
+            e1, e2 = match['equipe1'], match['equipe2']
+            score_pause = (tour - dernier_tour[e1]) + (tour - dernier_tour[e2])
+            matchs_scores.append((score_pause, random.random(), match))
+
+        matchs_scores.sort(key=lambda x: (x[0], x[1]), reverse=True)
+
+        for _, _, match in matchs_scores:
+            e1, e2 = match['equipe1'], match['equipe2']
+            if e1 not in equipes_occupees and e2 not in equipes_occupees:
+                matchs_tour.append(match)
+                equipes_occupees.update([e1, e2])
+                dernier_tour[e1] = tour
+                dernier_tour[e2] = tour
+                matchs_restants.remove(match)
+                if len(matchs_tour) == nb_terrains:
+                    break
+
+        while len(matchs_tour) < nb_terrains:
+            matchs_tour.append(None)
+
+        equipes_repos = [e for e in toutes_les_equipes if e not in equipes_occupees]
+        planning.append({
+            "tour": tour,
+            "matches": matchs_tour,
+            "repos": equipes_repos
+        })
+
+        if all(m is None for m in matchs_tour):
+            break
+
+    terrains = [[] for _ in range(nb_terrains)]
+    for tour in planning:
+        for i, match in enumerate(tour["matches"]):
+            terrains[i].append(match)
+
+    for terrain in terrains:
+        while terrain and terrain[-1] is None:
+            terrain.pop()
+
+    return {"terrains": terrains, "planning": planning}
+
+
+def creer_poules(nb_poules, taille):
+    return [
+        {'nom': f"Poule {p + 1}", 'equipes': [f"P{p + 1}-E{e + 1}" for e in range(taille)]}
+        for p in range(nb_poules)
+    ]
+
+
+def creer_poules_tailles(tailles):
+    return [
+        {'nom': f"Poule {p + 1}", 'equipes': [f"P{p + 1}-E{e + 1}" for e in range(taille)]}
+        for p, taille in enumerate(tailles)
+    ]
+
+
+def chronometrer(fonction, poules, nb_terrains):
+    debut = time.perf_counter()
+    resultats = fonction(poules, nb_terrains)
+    return time.perf_counter() - debut, len(resultats["planning"])
+
+
+def comparer_echelle():
+    scenarios = [
+        (2, 6, 2),
+        (4, 8, 4),
+        (8, 10, 6),
+        (10, 16, 8),
+        (20, 20, 10),
+        # Grandes poules : beaucoup de matchs restants par équipe à chaque tour
+        (2, 60, 30),
+        (1, 80, 40),
+        (1, 160, 80),
+    ]
+
+    print(f"{'Poules':>6} {'Equipes':>8} {'Matchs':>7} {'Terrains':>9} "
+          f"{'Référence (s)':>14} {'Indexé (s)':>11} {'Gain':>7} {'Tours':>11}")
+    for nb_poules, taille, nb_terrains in scenarios:
+        poules = creer_poules(nb_poules, taille)
+        nb_matchs = nb_poules * taille * (taille - 1) // 2
+        t_ref, tours_ref = chronometrer(generer_matchs_reference, poules, nb_terrains)
+        t_new, tours_new = chronometrer(generer_matchs_optimise, poules, nb_terrains)
+        print(f"{nb_poules:>6} {nb_poules * taille:>8} {nb_matchs:>7} {nb_terrains:>9} "
+              f"{t_ref:>14.4f} {t_new:>11.4f} {t_ref / t_new:>6.1f}x {tours_ref:>5}/{tours_new:<5}")
+
+
+def comparer_strategies():
+    scenarios = [
+        (1, 6, 3),
+        (2, 7, 4),
+        (4, 8, 8),
+        (3, 12, 10),
+        (10, 16, 8),
+        (1, 20, 10),
+    ]
+
+    print(f"{'Poules':>6} {'Equipes':>8} {'Terrains':>9} "
+          f"{'Glouton (s)':>12} {'Tours':>6} {'Cercle (s)':>11} {'Tours':>6} "
+          f"{'Couplage (s)':>13} {'Tours':>6}")
+    for nb_poules, taille, nb_terrains in scenarios:
+        poules = creer_poules(nb_poules, taille)
+        mesures = [
+            chronometrer(lambda p, n: generer_matchs_optimise(p, n, strategie), poules, nb_terrains)
+            for strategie in ('glouton', 'cercle', 'couplage')
+        ]
+        (t_glouton, tours_glouton), (t_cercle, tours_cercle), (t_couplage, tours_couplage) = mesures
+        print(f"{nb_poules:>6} {nb_poules * taille:>8} {nb_terrains:>9} "
+              f"{t_glouton:>12.4f} {tours_glouton:>6} {t_cercle:>11.4f} {tours_cercle:>6} "
+              f"{t_couplage:>13.4f} {tours_couplage:>6}")
+
+# (nom, tailles des poules, nombres de terrains)
+SCENARIOS_SUITE = [
+    ("club_matinee", [4, 4], [1, 2]),
+    ("club_journee", [5, 4, 3], [1, 2, 3]),
+    ("festival_64", [8] * 8, [4, 8, 12]),
+    ("festival_64_petites_poules", [4] * 16, [6, 16]),
+    ("desequilibre", [16, 8, 5, 3, 3, 2], [3, 10]),
+    ("desequilibre_festival", [12, 10, 9, 7, 6, 6, 5, 4, 3, 2], [5, 20]),
+    ("evenement_1000", [8] * 125, [10, 20]),
+    ("evenement_1200_desequilibre", [20] * 20 + [10] * 50 + [6] * 50, [20]),
+]
+
+INDICATEURS = ("borne_inferieure", "ecart_borne", "repos_min", "repos_moyen", "serie_max",
+               "emplacements_vides", "utilisation_terrains")
+
+
+def mesurer(poules, nb_terrains, strategie, repetitions=3):
+    """
+    Meilleur temps sur quelques exécutions sans instrumentation, puis pic mémoire
+    mesuré à part (tracemalloc ralentit fortement l'exécution)
+    """
+    duree = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultats = generer_matchs_optimise(poules, nb_terrains, strategie)
+        ecoule = time.perf_counter() - debut
+        duree = ecoule if duree is None else min(duree, ecoule)
+
+    tracemalloc.start()
+    try:
+        generer_matchs_optimise(poules, nb_terrains, strategie)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mesure = {
+        "duree_s": round(duree, 4),
+        "pic_memoire_ko": round(pic / 1024, 1),
+        "nb_tours": resultats["nb_tours"],
+        "id_planning": resultats["id_planning"]
+    }
+    mesure.update({cle: resultats["metriques"][cle] for cle in INDICATEURS})
+    return mesure
+
+
+def executer_suite(strategies=STRATEGIES):
+    scenarios = []
+    for nom, tailles, terrains in SCENARIOS_SUITE:
+        poules = creer_poules_tailles(tailles)
+        for nb_terrains in terrains:
+            scenarios.append({
+                "nom": nom,
+                "nb_poules": len(tailles),
+                "nb_equipes": sum(tailles),
+                "nb_matchs": sum(n * (n - 1) // 2 for n in tailles),
+                "nb_terrains": nb_terrains,
+                "tailles_poules": tailles,
+                "strategies": {strategie: mesurer(poules, nb_terrains, strategie) for strategie in strategies}
+            })
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "scenarios": scenarios
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mesures de performance du planificateur")
+    parser.add_argument('--suite', action='store_true', help="exécuter la suite complète en JSON")
+    parser.add_argument('--sortie', help="fichier JSON de sortie (sortie standard par défaut)")
+    arguments = parser.parse_args()
+
+    if arguments.suite:
+        rapport = executer_suite()
+        if arguments.sortie:
+            with open(arguments.sortie, 'w', encoding='utf-8') as fichier:
+                json.dump(rapport, fichier, indent=2, ensure_ascii=False)
+        else:
+            json.dump(rapport, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+    else:
+        comparer_echelle()
+        print()
+        comparer_strategies()
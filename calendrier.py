@@ -0,0 +1,250 @@
+"""
+Passage des tours abstraits à de vrais horaires de coup d'envoi par terrain.
+
+Chaque terrain a ses fenêtres d'ouverture (plusieurs jours possibles), dont on retire
+les pauses (déjeuner...). Elles sont découpées en créneaux de durée fixe séparés par
+un temps de battement. Les créneaux d'un terrain forment un index : débuts triés pour
+la recherche par dichotomie, et chaînage « prochain créneau libre » compressé
+(union-find), si bien que trouver le premier créneau libre après un instant donné
+coûte un temps quasi constant, même avec des centaines de créneaux par terrain.
+
+Options reconnues (durées en minutes, instants au format ISO 8601) :
+    duree_match, battement, repos_minimum,
+    disponibilites : [[debut, fin], ...] appliquées à tous les terrains,
+    terrains : [[[debut, fin], ...], ...] fenêtres propres à chaque terrain,
+    pauses : [[debut, fin], ...], en "HH:MM" pour une pause quotidienne,
+    indisponibilites : {equipe: [[debut, fin], ...]} horaires où une équipe ne peut pas jouer.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+FORMAT_HORAIRE = '%Y-%m-%dT%H:%M'
+# Garde-fou contre des fenêtres démesurées par rapport à la durée d'un match
+CRENEAUX_MAX = 100000
+
+
+class IndexCreneaux:
+    """
+    Créneaux d'un terrain : débuts triés et chaînage vers le prochain créneau libre
+    """
+    __slots__ = ('debuts', 'suivant')
+
+    def __init__(self, debuts):
+        self.debuts = debuts
+        self.suivant = list(range(len(debuts) + 1))
+
+    def premier_libre(self, instant):
+        """
+        Indice du premier créneau libre commençant à partir de l'instant, ou len(debuts)
+        """
+        i = bisect_left(self.debuts, instant)
+        racine = i
+        while self.suivant[racine] != racine:
+            racine = self.suivant[racine]
+        while self.suivant[i] != racine:
+            self.suivant[i], i = racine, self.suivant[i]
+        return racine
+
+    def occuper(self, i):
+        self.suivant[i] = i + 1
+
+
+def _lire_instant(texte):
+    return datetime.fromisoformat(texte)
+
+
+def _valider_fenetres(fenetres, nom, quotidiennes=False):
+    if not isinstance(fenetres, list):
+        raise ValueError(f"{nom} : liste de fenêtres [debut, fin] attendue")
+    for fenetre in fenetres:
+        if (not isinstance(fenetre, (list, tuple)) or len(fenetre) != 2
+                or not all(isinstance(instant, str) for instant in fenetre)):
+            raise ValueError(f"{nom} : fenêtre invalide {fenetre!r}, [debut, fin] attendu")
+        try:
+            if quotidiennes and all(len(instant) <= 5 for instant in fenetre):
+                debut, fin = (datetime.strptime(instant, '%H:%M') for instant in fenetre)
+            else:
+                debut, fin = map(_lire_instant, fenetre)
+        except ValueError:
+            raise ValueError(f"{nom} : horaire illisible dans {fenetre!r}") from None
+        if debut >= fin:
+            raise ValueError(f"{nom} : la fenêtre {fenetre!r} ne finit pas après son début")
+
+
+def valider_options(options):
+    """
+    Vérifie les options avant tout calcul ; une option invalide lève ValueError
+    """
+    if not isinstance(options, dict):
+        raise ValueError("Les options de calendrier doivent être un objet")
+    if 'duree_match' not in options:
+        raise ValueError("Option de calendrier manquante : duree_match")
+    for cle, minimum in (('duree_match', 1), ('battement', 0), ('repos_minimum', 0)):
+        valeur = options.get(cle, 0)
+        if not isinstance(valeur, int) or isinstance(valeur, bool) or valeur < minimum:
+            attendu = "strictement positif" if minimum else "positif ou nul"
+            raise ValueError(f"{cle} doit être un nombre entier de minutes {attendu}")
+
+    _valider_fenetres(options.get('disponibilites') or [], 'disponibilites')
+    terrains = options.get('terrains') or []
+    if not isinstance(terrains, list):
+        raise ValueError("terrains : une liste de fenêtres par terrain est attendue")
+    for t, fenetres in enumerate(terrains, start=1):
+        if fenetres is not None:
+            _valider_fenetres(fenetres, f"terrains (terrain {t})")
+    _valider_fenetres(options.get('pauses') or [], 'pauses', quotidiennes=True)
+    indisponibilites = options.get('indisponibilites') or {}
+    if not isinstance(indisponibilites, dict):
+        raise ValueError("indisponibilites : un objet {equipe: fenêtres} est attendu")
+    for equipe, fenetres in indisponibilites.items():
+        _valider_fenetres(fenetres, f"indisponibilites ({equipe})")
+
+
+def _pauses_du_jour(pauses, jour):
+    for debut, fin in pauses:
+        if len(debut) <= 5:
+            h1, m1 = map(int, debut.split(':'))
+            h2, m2 = map(int, fin.split(':'))
+            yield (datetime.combine(jour, datetime.min.time()) + timedelta(hours=h1, minutes=m1),
+                   datetime.combine(jour, datetime.min.time()) + timedelta(hours=h2, minutes=m2))
+        else:
+            yield _lire_instant(debut), _lire_instant(fin)
+
+
+def _retirer_pauses(debut, fin, pauses):
+    """
+    Découpe la fenêtre [debut, fin[ autour des pauses qui la chevauchent
+    """
+    jours = set()
+    jour = debut.date()
+    while jour <= fin.date():
+        jours.add(jour)
+        jour += timedelta(days=1)
+
+    coupures = sorted(p for j in jours for p in _pauses_du_jour(pauses, j) if p[1] > debut and p[0] < fin)
+    morceaux = []
+    curseur = debut
+    for p_debut, p_fin in coupures:
+        if p_debut > curseur:
+            morceaux.append((curseur, p_debut))
+        curseur = max(curseur, p_fin)
+    if curseur < fin:
+        morceaux.append((curseur, fin))
+    return morceaux
+
+
+def construire_index(options, nb_terrains, origine):
+    duree = options['duree_match']
+    pas = duree + options.get('battement', 0)
+    pauses = options.get('pauses', [])
+    fenetres_terrains = options.get('terrains') or []
+
+    index = []
+    for t in range(nb_terrains):
+        fenetres = fenetres_terrains[t] if t < len(fenetres_terrains) else None
+        if fenetres is None:
+            fenetres = options.get('disponibilites', [])
+        debuts = []
+        for debut, fin in sorted((_lire_instant(d), _lire_instant(f)) for d, f in fenetres):
+            for m_debut, m_fin in _retirer_pauses(debut, fin, pauses):
+                instant = int((m_debut - origine).total_seconds() // 60)
+                limite = int((m_fin - origine).total_seconds() // 60)
+                if limite - duree >= instant and len(debuts) + (limite - duree - instant) // pas >= CRENEAUX_MAX:
+                    raise ValueError(f"Plus de {CRENEAUX_MAX} créneaux sur un terrain : fenêtres trop longues")
+                while instant + duree <= limite:
+                    debuts.append(instant)
+                    instant += pas
+        debuts.sort()
+        index.append(IndexCreneaux(debuts))
+    return index
+
+
+def _origine(options):
+    instants = [d for d, _ in options.get('disponibilites', [])]
+    for fenetres in options.get('terrains') or []:
+        instants.extend(d for d, _ in fenetres or [])
+    if not instants:
+        raise ValueError("Aucune fenêtre de disponibilité des terrains")
+    return min(map(_lire_instant, instants))
+
+
+def _fin_conflit(fenetres, debut, fin):
+    """
+    Fin de la dernière indisponibilité qui chevauche [debut, fin[, ou None
+    """
+    conflit = None
+    for f_debut, f_fin in fenetres:
+        if f_debut < fin and f_fin > debut:
+            conflit = f_fin if conflit is None else max(conflit, f_fin)
+    return conflit
+
+
+def _premier_creneau(index, instant, terrain_prevu):
+    meilleur = None
+    for t, creneaux_terrain in enumerate(index):
+        i = creneaux_terrain.premier_libre(instant)
+        if i == len(creneaux_terrain.debuts):
+            continue
+        cle = (creneaux_terrain.debuts[i], t != terrain_prevu, t)
+        if meilleur is None or cle < meilleur[0]:
+            meilleur = (cle, t, i)
+    return meilleur
+
+
+def placer_creneaux(planning, nb_terrains, options):
+    """
+    Attribue à chaque match, tour après tour, le premier créneau libre où ses deux équipes
+    sont disponibles, de préférence sur le terrain prévu par le planning
+    """
+    valider_options(options)
+    origine = _origine(options)
+    index = construire_index(options, nb_terrains, origine)
+    duree = options['duree_match']
+    delai = options.get('battement', 0) + options.get('repos_minimum', 0)
+    minutes = lambda texte: int((_lire_instant(texte) - origine).total_seconds() // 60)
+    indisponibilites = {
+        equipe: [(minutes(debut), minutes(fin)) for debut, fin in fenetres]
+        for equipe, fenetres in (options.get('indisponibilites') or {}).items()
+    }
+
+    pret = {}
+    creneaux = []
+    non_places = []
+    for tour in planning:
+        for terrain_prevu, match in enumerate(tour["matches"]):
+            if match is None:
+                continue
+            e1, e2 = match['equipe1'], match['equipe2']
+            instant = max(pret.get(e1, 0), pret.get(e2, 0))
+
+            # Un créneau qui tombe pendant une indisponibilité repousse la recherche à sa fin
+            while True:
+                meilleur = _premier_creneau(index, instant, terrain_prevu)
+                if meilleur is None:
+                    break
+                debut = meilleur[0][0]
+                fins = [_fin_conflit(indisponibilites.get(e, ()), debut, debut + duree) for e in (e1, e2)]
+                fins = [f for f in fins if f is not None]
+                if not fins:
+                    break
+                instant = max(fins)
+
+            if meilleur is None:
+                non_places.append(dict(match, tour=tour["tour"]))
+                continue
+            (debut, _, _), t, i = meilleur
+            index[t].occuper(i)
+            pret[e1] = pret[e2] = debut + duree + delai
+            creneaux.append((debut, t, tour["tour"], match))
+
+    creneaux.sort(key=lambda c: (c[0], c[1]))
+    horaire = lambda minutes: (origine + timedelta(minutes=minutes)).strftime(FORMAT_HORAIRE)
+    return {
+        "options": options,
+        "creneaux": [
+            dict(match, tour=numero, terrain=t + 1, debut=horaire(debut), fin=horaire(debut + duree))
+            for debut, t, numero, match in creneaux
+        ],
+        "non_places": non_places,
+        "fin": horaire(creneaux[-1][0] + duree) if creneaux else None
+    }
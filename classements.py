@@ -0,0 +1,250 @@
+"""
+Classements des poules tenus à jour score par score, côté serveur.
+
+Barème (le même que celui de la page) : 4 points pour une victoire, 1 point de
+bonus défensif pour le perdant si l'écart est de 3 points ou moins, rien pour un nul.
+Départage : points, puis différence, puis points marqués.
+
+Chaque poule garde ses équipes dans une liste triée sur leur clé de classement.
+Enregistrer, corriger ou annuler un score ne touche que les deux équipes du match :
+chacune est retirée de la liste et réinsérée à sa nouvelle place par dichotomie.
+
+Chaque modification est un événement numéroté transmis au journal (s'il y en a un)
+avant d'être appliquée ; instantane() et rejouer() permettent de reconstruire l'état.
+Tous les `intervalle` événements, l'instantané est passé à `instantanes`, sous le
+même verrou que l'événement : deux saisies simultanées ne peuvent pas le sauter.
+Une fois appliquée, elle est passée à la diffusion sous forme de delta compact : le
+score, les lignes des deux équipes et le nouvel ordre de la poule.
+"""
+import threading
+from bisect import bisect_left, insort
+
+POINTS_VICTOIRE = 4
+POINTS_BONUS_DEFENSIF = 1
+ECART_BONUS_DEFENSIF = 3
+
+
+def ordonner(equipe1, equipe2, score1=None, score2=None):
+    """
+    Forme canonique d'un match : équipes dans l'ordre alphabétique, scores suivant
+    """
+    if equipe2 < equipe1:
+        return equipe2, equipe1, score2, score1
+    return equipe1, equipe2, score1, score2
+
+
+class StatsEquipe:
+    __slots__ = ('joues', 'gagnes', 'perdus', 'points', 'marques', 'encaisses')
+
+    def __init__(self):
+        self.joues = self.gagnes = self.perdus = self.points = self.marques = self.encaisses = 0
+
+    def cle(self, equipe):
+        return (-self.points, self.encaisses - self.marques, -self.marques, equipe)
+
+    def appliquer(self, marques, encaisses, signe):
+        """
+        Ajoute (signe=1) ou retire (signe=-1) le résultat d'un match
+        """
+        self.joues += signe
+        self.marques += signe * marques
+        self.encaisses += signe * encaisses
+        if marques > encaisses:
+            self.gagnes += signe
+            self.points += signe * POINTS_VICTOIRE
+        elif marques < encaisses:
+            self.perdus += signe
+            if encaisses - marques <= ECART_BONUS_DEFENSIF:
+                self.points += signe * POINTS_BONUS_DEFENSIF
+
+    def description(self, equipe, position):
+        return {
+            "position": position,
+            "equipe": equipe,
+            "joues": self.joues,
+            "gagnes": self.gagnes,
+            "perdus": self.perdus,
+            "points": self.points,
+            "marques": self.marques,
+            "encaisses": self.encaisses,
+            "diff": self.marques - self.encaisses
+        }
+
+
+class ClassementPoule:
+    def __init__(self, equipes=()):
+        self.stats = {}
+        self.ordre = []
+        for equipe in equipes:
+            self.ajouter_equipe(equipe)
+
+    def ajouter_equipe(self, equipe):
+        if equipe not in self.stats:
+            stats = self.stats[equipe] = StatsEquipe()
+            insort(self.ordre, stats.cle(equipe))
+
+    def appliquer(self, equipe, marques, encaisses, signe):
+        stats = self.stats[equipe]
+        del self.ordre[bisect_left(self.ordre, stats.cle(equipe))]
+        stats.appliquer(marques, encaisses, signe)
+        insort(self.ordre, stats.cle(equipe))
+
+    def position(self, equipe):
+        return bisect_left(self.ordre, self.stats[equipe].cle(equipe)) + 1
+
+    def tableau(self):
+        return [self.stats[cle[-1]].description(cle[-1], i) for i, cle in enumerate(self.ordre, start=1)]
+
+
+class Classements:
+    """
+    Scores et classements d'un tournoi ; un match est identifié par sa poule et ses deux équipes
+    """
+
+    def __init__(self, poules=(), journal=None, diffusion=None, instantanes=None, intervalle=100):
+        self.poules = {}
+        self.scores = {}
+        # Numéro du dernier événement appliqué ; journal(numero, poule, e1, e2, s1, s2) le conserve
+        self.numero = 0
+        self.journal = journal
+        self.diffusion = diffusion
+        # instantanes(numero, scores) reçoit l'état tous les intervalle événements
+        self.instantanes = instantanes
+        self.intervalle = intervalle
+        self._dernier_instantane = 0
+        self._verrou = threading.Lock()
+        self.definir_poules(poules)
+
+    def definir_poules(self, poules):
+        """
+        Déclare les poules et leurs équipes ; les résultats déjà saisis sont conservés
+        """
+        with self._verrou:
+            for poule in poules:
+                classement = self.poules.setdefault(poule['nom'], ClassementPoule())
+                for equipe in poule['equipes']:
+                    classement.ajouter_equipe(equipe)
+
+    def _match(self, poule, equipe1, equipe2):
+        classement = self.poules.get(poule)
+        if classement is None:
+            raise ValueError(f"Poule inconnue : {poule}")
+        for equipe in (equipe1, equipe2):
+            if equipe not in classement.stats:
+                raise ValueError(f"Équipe inconnue dans {poule} : {equipe}")
+        if equipe1 == equipe2:
+            raise ValueError("Une équipe ne peut pas se rencontrer elle-même")
+        return classement
+
+    def _retirer(self, classement, cle):
+        ancien = self.scores.pop(cle, None)
+        if ancien is not None:
+            _, equipe1, equipe2 = cle
+            classement.appliquer(equipe1, ancien[0], ancien[1], -1)
+            classement.appliquer(equipe2, ancien[1], ancien[0], -1)
+        return ancien
+
+    def enregistrer(self, poule, equipe1, equipe2, score1, score2):
+        """
+        Enregistre ou corrige le score d'un match et retourne les lignes des deux équipes
+        """
+        if not all(isinstance(s, int) and not isinstance(s, bool) and s >= 0 for s in (score1, score2)):
+            raise ValueError("Les scores doivent être des entiers positifs")
+        equipe1, equipe2, score1, score2 = ordonner(equipe1, equipe2, score1, score2)
+        with self._verrou:
+            self._match(poule, equipe1, equipe2)
+            self._journaliser(poule, equipe1, equipe2, score1, score2)
+            classement = self._appliquer(poule, equipe1, equipe2, score1, score2)
+            self._instantane_du()
+            return self._diffuser(classement, poule, equipe1, equipe2, score1, score2)
+
+    def annuler(self, poule, equipe1, equipe2):
+        """
+        Retire le score d'un match ; retourne les lignes des deux équipes, ou None s'il n'y en avait pas
+        """
+        equipe1, equipe2, _, _ = ordonner(equipe1, equipe2)
+        with self._verrou:
+            classement = self._match(poule, equipe1, equipe2)
+            if (poule, equipe1, equipe2) not in self.scores:
+                return None
+            self._journaliser(poule, equipe1, equipe2, None, None)
+            self._appliquer(poule, equipe1, equipe2, None, None)
+            self._instantane_du()
+            return self._diffuser(classement, poule, equipe1, equipe2, None, None)
+
+    def _journaliser(self, *evenement):
+        # Le journal reçoit l'événement avant qu'il ne modifie le classement
+        numero = self.numero + 1
+        if self.journal is not None:
+            self.journal(numero, *evenement)
+        self.numero = numero
+
+    def _instantane_du(self):
+        # Appelé sous le verrou, après l'application de l'événement
+        if self.instantanes is not None and self.numero - self._dernier_instantane >= self.intervalle:
+            self.instantanes(self.numero, self._scores())
+            self._dernier_instantane = self.numero
+
+    def _scores(self):
+        return [[*cle, *score] for cle, score in self.scores.items()]
+
+    def _diffuser(self, classement, poule, equipe1, equipe2, score1, score2):
+        # Appelé sous le verrou : les deltas sont diffusés dans l'ordre des numéros
+        lignes = self._lignes(classement, equipe1, equipe2)
+        if self.diffusion is not None:
+            self.diffusion(self.numero, {
+                "numero": self.numero, "poule": poule,
+                "equipe1": equipe1, "equipe2": equipe2, "score1": score1, "score2": score2,
+                "equipes": lignes, "ordre": [cle[-1] for cle in classement.ordre]
+            })
+        return lignes
+
+    def _appliquer(self, poule, equipe1, equipe2, score1, score2):
+        """
+        Remplace le score d'un match (équipes ordonnées) ; des scores None l'annulent
+        """
+        classement = self._match(poule, equipe1, equipe2)
+        cle = (poule, equipe1, equipe2)
+        self._retirer(classement, cle)
+        if score1 is not None:
+            classement.appliquer(equipe1, score1, score2, 1)
+            classement.appliquer(equipe2, score2, score1, 1)
+            self.scores[cle] = (score1, score2)
+        return classement
+
+    def instantane(self):
+        """
+        État compact : numéro du dernier événement et scores en vigueur
+        """
+        with self._verrou:
+            return self.numero, self._scores()
+
+    def restaurer(self, numero, scores):
+        """
+        Repart d'un instantané, sans rien journaliser
+        """
+        with self._verrou:
+            for poule, equipe1, equipe2, score1, score2 in scores:
+                self._appliquer(poule, equipe1, equipe2, score1, score2)
+            self.numero = self._dernier_instantane = numero
+
+    def rejouer(self, evenements):
+        """
+        Applique des événements (numero, poule, e1, e2, s1, s2) déjà journalisés
+        """
+        with self._verrou:
+            for numero, poule, equipe1, equipe2, score1, score2 in evenements:
+                self._appliquer(poule, equipe1, equipe2, score1, score2)
+                self.numero = numero
+
+    @staticmethod
+    def _lignes(classement, *equipes):
+        return [classement.stats[e].description(e, classement.position(e)) for e in equipes]
+
+    def tableau(self, poule):
+        with self._verrou:
+            return self.poules[poule].tableau()
+
+    def tableaux(self):
+        with self._verrou:
+            return {nom: classement.tableau() for nom, classement in self.poules.items()}
@@ -0,0 +1,173 @@
+"""
+Contraintes dures du planning : tours (ou horaires) où une équipe est indisponible,
+nombre maximal de tours joués d'affilée et nombre minimal de tours de repos.
+
+Le moteur les évalue sous forme de masques de bits (un bit par équipe) : à chaque
+tour, les équipes interdites sont calculées en quelques opérations sur des entiers,
+puis chaque match candidat n'est testé que par un ET binaire.
+
+Format attendu :
+    {"indisponibilites": {"Équipe": [3, 4]},
+     "horaires_indisponibles": {"Équipe": [["2026-05-01T09:00", "2026-05-01T10:30"]]},
+     "serie_max": 2,
+     "repos_minimum": 1}
+
+Les valeurs sont vérifiées avant tout calcul (ValueError). Rapportées à la taille du
+tournoi, repos_minimum ne dépasse pas le nombre d'équipes et les tours indisponibles
+ne vont pas au-delà du plus long planning possible : le nombre de tours vides qu'un
+planning peut attendre reste ainsi borné.
+"""
+from collections import deque
+
+
+def _entier(valeur):
+    return isinstance(valeur, int) and not isinstance(valeur, bool)
+
+
+def valider_contraintes(donnees):
+    """
+    Vérifie la forme des contraintes avant tout calcul ; une valeur invalide lève ValueError
+    """
+    if donnees is None:
+        return
+    if not isinstance(donnees, dict):
+        raise ValueError("Les contraintes doivent être un objet")
+    indisponibilites = donnees.get('indisponibilites') or {}
+    if not isinstance(indisponibilites, dict):
+        raise ValueError("indisponibilites : un objet {equipe: tours} est attendu")
+    for equipe, tours in indisponibilites.items():
+        if not isinstance(tours, list) or not all(_entier(tour) and tour >= 1 for tour in tours):
+            raise ValueError(f"indisponibilites ({equipe}) : une liste de numéros de tour (entiers à partir de 1) "
+                             f"est attendue")
+    horaires = donnees.get('horaires_indisponibles') or {}
+    if not isinstance(horaires, dict) or not all(isinstance(f, list) for f in horaires.values()):
+        raise ValueError("horaires_indisponibles : un objet {equipe: fenêtres} est attendu")
+    serie_max = donnees.get('serie_max')
+    if serie_max is not None and (not _entier(serie_max) or serie_max < 1):
+        raise ValueError("serie_max doit être un nombre entier de tours au moins égal à 1")
+    repos_minimum = donnees.get('repos_minimum')
+    if repos_minimum is not None and (not _entier(repos_minimum) or repos_minimum < 0):
+        raise ValueError("repos_minimum doit être un nombre entier de tours positif ou nul")
+
+
+class Contraintes:
+    __slots__ = ('indisponibles', 'serie_max', 'repos_minimum', 'horaires')
+
+    def __init__(self, donnees=None):
+        valider_contraintes(donnees)
+        donnees = donnees or {}
+        self.indisponibles = {e: set(tours) for e, tours in (donnees.get('indisponibilites') or {}).items()}
+        self.serie_max = donnees.get('serie_max')
+        self.repos_minimum = donnees.get('repos_minimum') or 0
+        self.horaires = donnees.get('horaires_indisponibles') or {}
+
+    def verifier_taille(self, poules):
+        """
+        Refuse (ValueError) les valeurs hors de proportion avec le tournoi : elles ne
+        feraient qu'allonger le planning de tours vides
+        """
+        nb_equipes = nb_matchs = 0
+        for poule in poules:
+            n = len(poule['equipes'])
+            if n >= 2:
+                nb_equipes += n
+                nb_matchs += n * (n - 1) // 2
+        if self.repos_minimum > nb_equipes:
+            raise ValueError(f"repos_minimum ne peut pas dépasser le nombre d'équipes ({nb_equipes})")
+        # Chaque match, ses repos imposés, une pause de série et chaque tour indisponible
+        tours_max = max(1, nb_matchs) * (self.repos_minimum + 2) + len(set().union(*self.indisponibles.values()))
+        for equipe, tours in self.indisponibles.items():
+            if tours and max(tours) > tours_max:
+                raise ValueError(f"indisponibilites ({equipe}) : le tour {max(tours)} dépasse le plus long "
+                                 f"planning possible ({tours_max} tours)")
+
+    def respecte(self, equipe, tours, tour):
+        """
+        Indique si l'équipe, qui joue déjà les tours (triés) donnés, peut aussi jouer ce tour
+        """
+        if tour in self.indisponibles.get(equipe, ()):
+            return False
+        joues = set(tours)
+        if any(tour + k in joues or tour - k in joues for k in range(1, self.repos_minimum + 1)):
+            return False
+        if self.serie_max is not None:
+            serie = 1
+            k = tour - 1
+            while k in joues:
+                serie += 1
+                k -= 1
+            k = tour + 1
+            while k in joues:
+                serie += 1
+                k += 1
+            if serie > self.serie_max:
+                return False
+        return True
+
+    def violations(self, planning):
+        """
+        Nombre de matchs qui enfreignent une contrainte, tous tours confondus
+        """
+        tours_equipe = {}
+        for tour in planning:
+            for match in tour["matches"]:
+                if match is not None:
+                    for e in (match['equipe1'], match['equipe2']):
+                        tours_equipe.setdefault(e, []).append(tour["tour"])
+
+        total = 0
+        for e, tours in tours_equipe.items():
+            for i, tour in enumerate(tours):
+                if not self.respecte(e, tours[:i] + tours[i + 1:], tour):
+                    total += 1
+        return total
+
+
+class MasquesContraintes:
+    """
+    Forme binaire des contraintes pour le moteur : un entier par tour sert d'ensemble d'équipes
+    """
+
+    def __init__(self, contraintes, noms_equipes):
+        self.contraintes = contraintes or Contraintes()
+        index = {nom: i for i, nom in enumerate(noms_equipes)}
+
+        self.indisponibles_tour = {}
+        for equipe, tours in self.contraintes.indisponibles.items():
+            if equipe not in index:
+                continue
+            for tour in tours:
+                self.indisponibles_tour[tour] = self.indisponibles_tour.get(tour, 0) | (1 << index[equipe])
+        self.dernier_tour_indisponible = max(self.indisponibles_tour, default=0)
+
+        # Une équipe joue au plus len(noms_equipes) - 1 matchs : une série plus longue
+        # ne peut pas se produire, la borner ne change rien
+        self.serie_max = self.contraintes.serie_max
+        if self.serie_max is not None:
+            self.serie_max = min(self.serie_max, max(1, len(noms_equipes)))
+        self.repos_minimum = self.contraintes.repos_minimum
+        # Équipes ayant joué lors des derniers tours, le plus récent en tête
+        self.historique = deque(maxlen=max(self.serie_max or 0, self.repos_minimum))
+
+    def interdits(self, tour):
+        masque = self.indisponibles_tour.get(tour, 0)
+        historique = self.historique
+        for k in range(min(self.repos_minimum, len(historique))):
+            masque |= historique[k]
+        if self.serie_max is not None and len(historique) >= self.serie_max:
+            serie = historique[0]
+            for k in range(1, self.serie_max):
+                serie &= historique[k]
+            masque |= serie
+        return masque
+
+    def jouer(self, joueurs):
+        if self.historique.maxlen:
+            self.historique.appendleft(joueurs)
+
+    def peut_attendre(self, tour, tours_vides):
+        """
+        Un tour vide n'est utile que si une contrainte peut encore se relâcher ensuite
+        """
+        return tour <= self.dernier_tour_indisponible or tours_vides <= max(self.repos_minimum,
+                                                                            1 if self.serie_max else 0)
@@ -0,0 +1,91 @@
+"""
+Couplage de cardinalité maximale dans un graphe quelconque (algorithme d'Edmonds,
+contraction des fleurs), sans dépendance externe.
+
+Le couplage de départ est fourni par l'appelant : les chemins augmentants ne font
+jamais perdre son partenaire à un sommet déjà couplé, ils ne font qu'en ajouter.
+Partir d'un couplage glouton pondéré (repos) conserve donc ses priorités tout en
+remplissant le plus de terrains possible.
+"""
+from collections import deque
+
+
+def _ancetre_commun(a, b, base, partenaire, parent):
+    vus = set()
+    while True:
+        a = base[a]
+        vus.add(a)
+        if partenaire[a] == -1:
+            break
+        a = parent[partenaire[a]]
+    while True:
+        b = base[b]
+        if b in vus:
+            return b
+        b = parent[partenaire[b]]
+
+
+def _marquer_chemin(v, b, enfant, base, partenaire, parent, fleur):
+    while base[v] != b:
+        fleur[base[v]] = fleur[base[partenaire[v]]] = True
+        parent[v] = enfant
+        enfant = partenaire[v]
+        v = parent[partenaire[v]]
+
+
+def _chemin_augmentant(racine, voisins, partenaire):
+    n = len(voisins)
+    utilise = [False] * n
+    parent = [-1] * n
+    base = list(range(n))
+    utilise[racine] = True
+    file = deque([racine])
+
+    while file:
+        v = file.popleft()
+        for u in voisins[v]:
+            if base[v] == base[u] or partenaire[v] == u:
+                continue
+            if u == racine or (partenaire[u] != -1 and parent[partenaire[u]] != -1):
+                # Cycle impair : on contracte la fleur sur sa base
+                b = _ancetre_commun(v, u, base, partenaire, parent)
+                fleur = [False] * n
+                _marquer_chemin(v, b, u, base, partenaire, parent, fleur)
+                _marquer_chemin(u, b, v, base, partenaire, parent, fleur)
+                for i in range(n):
+                    if fleur[base[i]]:
+                        base[i] = b
+                        if not utilise[i]:
+                            utilise[i] = True
+                            file.append(i)
+            elif parent[u] == -1:
+                parent[u] = v
+                if partenaire[u] == -1:
+                    return u, parent
+                utilise[partenaire[u]] = True
+                file.append(partenaire[u])
+    return -1, parent
+
+
+def augmenter_couplage(voisins, partenaire, limite):
+    """
+    Agrandit en place le couplage (partenaire[v] = sommet couplé ou -1) jusqu'à
+    atteindre limite arêtes ou la cardinalité maximale ; retourne sa taille
+    """
+    taille = sum(1 for p in partenaire if p != -1) // 2
+    for racine in range(len(voisins)):
+        if taille >= limite:
+            break
+        if partenaire[racine] != -1 or not voisins[racine]:
+            continue
+        v, parent = _chemin_augmentant(racine, voisins, partenaire)
+        if v == -1:
+            continue
+        while v != -1:
+            pv = parent[v]
+            suivant = partenaire[pv]
+            partenaire[v] = pv
+            partenaire[pv] = v
+            v = suivant
+        taille += 1
+    return taille
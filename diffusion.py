@@ -0,0 +1,122 @@
+"""
+Diffusion en direct (Server-Sent Events) des scores et classements d'un tournoi.
+
+Chaque tournoi a un canal : un tampon circulaire des derniers messages, déjà
+sérialisés au format SSE une seule fois à la publication, et une condition qui
+réveille les auditeurs. Un auditeur ne fait que recopier les messages qu'il n'a pas
+encore envoyés ; rien n'est recalculé ni sérialisé par client, et publier ne coûte
+pas plus cher avec des centaines d'abonnés.
+
+Un client resté trop loin derrière (messages sortis du tampon) reçoit un message
+« resynchroniser » et doit relire l'état complet. L'identifiant SSE est le numéro
+d'événement du tournoi, ce qui permet la reprise via Last-Event-ID.
+"""
+import json
+import threading
+from collections import deque
+
+TAILLE_TAMPON = 256
+INTERVALLE_BATTEMENT = 15
+
+
+class Canal:
+    def __init__(self, taille=TAILLE_TAMPON):
+        # (rang, numero, message) ; le rang est la position absolue dans le flux du canal
+        self.messages = deque(maxlen=taille)
+        self.rang = 0
+        self.abonnes = 0
+        self.condition = threading.Condition()
+
+    def publier(self, numero, message):
+        with self.condition:
+            self.rang += 1
+            self.messages.append((self.rang, numero, message))
+            self.condition.notify_all()
+
+    def rang_depuis(self, numero):
+        """
+        Rang du dernier message d'un numéro d'événement donné (reprise Last-Event-ID),
+        ou None s'il n'est plus dans le tampon
+        """
+        with self.condition:
+            if numero is None:
+                return self.rang
+            for rang, numero_message, _ in self.messages:
+                if numero_message == numero:
+                    return rang
+            return None
+
+    def suivants(self, rang):
+        """
+        Messages publiés après rang, ou None si certains sont déjà sortis du tampon
+        """
+        if rang == self.rang:
+            return []
+        premier = self.messages[0][0] if self.messages else self.rang + 1
+        if rang + 1 < premier:
+            return None
+        return [message for rang_message, _, message in self.messages if rang_message > rang]
+
+
+def formater(evenement, numero, donnees):
+    return (f"id: {numero}\nevent: {evenement}\n"
+            f"data: {json.dumps(donnees, separators=(',', ':'), ensure_ascii=False)}\n\n").encode('utf-8')
+
+
+RESYNCHRONISER = b"event: resynchroniser\ndata: {}\n\n"
+BATTEMENT = b": battement\n\n"
+
+
+class Diffuseur:
+    def __init__(self, taille_tampon=TAILLE_TAMPON, battement=INTERVALLE_BATTEMENT):
+        self.taille_tampon = taille_tampon
+        self.battement = battement
+        self._canaux = {}
+        self._verrou = threading.Lock()
+
+    def _canal(self, cle):
+        canal = self._canaux.get(cle)
+        if canal is None:
+            with self._verrou:
+                canal = self._canaux.setdefault(cle, Canal(self.taille_tampon))
+        return canal
+
+    def publier(self, cle, evenement, numero, donnees):
+        """
+        Sérialise le message une fois et réveille tous les auditeurs du canal
+        """
+        self._canal(cle).publier(numero, formater(evenement, numero, donnees))
+
+    def ecouter(self, cle, dernier_numero=None):
+        """
+        Générateur des messages SSE d'un canal, à partir du dernier numéro reçu par le client
+        """
+        canal = self._canal(cle)
+        rang = canal.rang_depuis(dernier_numero)
+        with canal.condition:
+            canal.abonnes += 1
+        try:
+            if rang is None:
+                rang = canal.rang
+                yield RESYNCHRONISER
+            yield BATTEMENT
+            while True:
+                with canal.condition:
+                    if rang == canal.rang:
+                        canal.condition.wait(self.battement)
+                    messages = canal.suivants(rang)
+                    rang = canal.rang
+                if messages is None:
+                    yield RESYNCHRONISER
+                elif messages:
+                    yield b''.join(messages)
+                else:
+                    yield BATTEMENT
+        finally:
+            with canal.condition:
+                canal.abonnes -= 1
+
+    def statistiques(self):
+        with self._verrou:
+            canaux = list(self._canaux.values())
+        return {"canaux": len(canaux), "abonnes": sum(canal.abonnes for canal in canaux)}
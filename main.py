@@ -1,14 +1,41 @@
-from flask import Flask, render_template_string, request, jsonify, send_file
-from itertools import combinations
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import cm
+from flask import Flask, g, redirect, render_template_string, request, jsonify, send_file, url_for
+import hashlib
 import io
-import random
+import json
+import os
+import uuid
+from functools import partial
+
+from planificateur import (STRATEGIES, comparer_strategies, empreinte_tournoi,
+                           generer_matchs_optimise, graine_par_defaut, iterer_planning, valider_graine)
+from amelioration import ameliorer_planning
+from classements import Classements
+from contraintes import Contraintes
+from diffusion import Diffuseur
+from mesures import Registre, arreter, configurer_journal, demarrer, journaliser, phase
+from modifications import ajouter_equipe, retirer_equipe
+from plannings import CacheDocuments, CachePlannings, CacheTableaux, regenerer, serialiser
+from recherche import rechercher_multi_depart
+from rendu_pdf import empreinte_pdf, rendre_pdf
+from stockage import INTERVALLE_INSTANTANE, Stockage
+from taches import TERMINEE, FileSaturee, FileTaches
 
 app = Flask(__name__)
+cache_plannings = CachePlannings()
+cache_pdf = CacheDocuments()
+registre = Registre()
+exports_pdf = FileTaches(nb_travailleurs=2, max_actives=16, duree_vie=600)
+stockage = Stockage(os.environ.get('BASE_TOURNOIS', 'tournois.db'))
+diffuseur = Diffuseur()
+cache_tableaux = CacheTableaux()
+# Classements en mémoire, reconstruits depuis la base au premier accès à un tournoi
+tournois = {}
+configurer_journal(os.environ.get('JOURNAL_PERFORMANCES', 'performances.log'))
+
+# Matchs non joués affichés par terrain sur le tableau public
+MATCHS_A_VENIR = 3
+# Tours d'un planning diffusé écrits ensemble dans la table des matchs
+TOURS_PAR_LOT = 64
 
 # Template HTML
 HTML_TEMPLATE = '''
@@ -272,6 +299,14 @@ HTML_TEMPLATE = '''
                 <label for="nbTerrains">Nombre de terrains :</label>
                 <input type="number" id="nbTerrains" min="1" max="10" value="2">
             </div>
+            <div class="form-group">
+                <label for="strategie">Méthode de planification :</label>
+                <select id="strategie">
+                    <option value="glouton">Gloutonne (repos maximal)</option>
+                    <option value="cercle">Méthode du cercle (moins de tours)</option>
+                    <option value="couplage">Couplage maximal (terrains remplis)</option>
+                </select>
+            </div>
             <button id="btnValider">Valider la configuration</button>
         </div>
         
@@ -299,10 +334,19 @@ HTML_TEMPLATE = '''
             nommerPoules: false,
             nomsPoules: [],
             nbTerrains: 2,
+            strategie: 'glouton',
+            graine: null,
+            idPlanning: null,
+            idTournoi: null,
             poules: []
         };
         
         var matchsData = {};
+        var classementsAffiches = {};
+        var sourceDirect = null;
+        
+        // Au-delà de ce nombre de matchs, le planning est reçu et affiché tour par tour
+        var SEUIL_FLUX = 500;
         
         document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('nommerPoules').addEventListener('change', function() {
@@ -323,6 +367,11 @@ HTML_TEMPLATE = '''
             
             document.getElementById('btnValider').addEventListener('click', validerConfig);
             document.getElementById('exportBtn').addEventListener('click', exportPDF);
+            
+            // Un tournoi enregistré est rouvert depuis son adresse (#identifiant)
+            if (location.hash.length > 1) {
+                restaurerTournoi(location.hash.substring(1));
+            }
         });
         
         function updateNomsPoules() {
@@ -341,6 +390,7 @@ HTML_TEMPLATE = '''
         function validerConfig() {
             config.nbPoules = parseInt(document.getElementById('nbPoules').value);
             config.nbTerrains = parseInt(document.getElementById('nbTerrains').value);
+            config.strategie = document.getElementById('strategie').value;
             config.nommerPoules = document.getElementById('nommerPoules').value === 'oui';
             
             if (config.nommerPoules) {
@@ -365,6 +415,166 @@ HTML_TEMPLATE = '''
             document.getElementById('config-section').classList.add('hidden');
             document.getElementById('poules-section').classList.remove('hidden');
             afficherPoules();
+            creerTournoi();
+        }
+        
+        function creerTournoi() {
+            fetch('/tournois', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ poules: config.poules })
+            })
+            .then(function(response) { return response.json(); })
+            .then(function(data) {
+                config.idTournoi = data.id_tournoi;
+                history.replaceState(null, '', '#' + data.id_tournoi);
+                ecouterTournoi();
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
+        }
+        
+        function restaurerTournoi(idTournoi) {
+            fetch('/tournois/' + idTournoi)
+            .then(function(response) {
+                if (!response.ok) throw new Error('Tournoi inconnu');
+                return response.json();
+            })
+            .then(function(tournoi) {
+                config.idTournoi = idTournoi;
+                ecouterTournoi();
+                config.poules = tournoi.poules;
+                config.nbPoules = tournoi.poules.length;
+                config.nomsPoules = tournoi.poules.map(function(poule) { return poule.nom; });
+                if (tournoi.nb_terrains) config.nbTerrains = tournoi.nb_terrains;
+                if (tournoi.strategie) config.strategie = tournoi.strategie;
+                
+                document.getElementById('config-section').classList.add('hidden');
+                document.getElementById('poules-section').classList.remove('hidden');
+                afficherPoules();
+                for (var i = 0; i < config.poules.length; i++) {
+                    afficherEquipesPoule(i);
+                }
+                
+                var planning = tournoi.planning;
+                if (!planning) return;
+                config.graine = planning.graine;
+                config.idPlanning = planning.id_planning;
+                
+                // Les scores enregistrés sont replacés sur les matchs du planning
+                var scores = {};
+                for (var i = 0; i < tournoi.scores.length; i++) {
+                    var score = tournoi.scores[i];
+                    scores[score.poule + '|' + score.equipe1 + '|' + score.equipe2] = score;
+                }
+                matchsData = {};
+                for (var i = 0; i < planning.planning.length; i++) {
+                    var tour = planning.planning[i];
+                    for (var j = 0; j < tour.matches.length; j++) {
+                        var match = tour.matches[j];
+                        if (!match) continue;
+                        var inverse = match.equipe2 < match.equipe1;
+                        var cle = match.poule + '|' + (inverse ? match.equipe2 + '|' + match.equipe1 : match.equipe1 + '|' + match.equipe2);
+                        var trouve = scores[cle];
+                        if (!trouve) continue;
+                        matchsData['match_' + tour.tour + '_' + j] = {
+                            completed: true,
+                            score1: inverse ? trouve.score2 : trouve.score1,
+                            score2: inverse ? trouve.score1 : trouve.score2,
+                            equipe1: match.equipe1,
+                            equipe2: match.equipe2,
+                            poule: match.poule
+                        };
+                    }
+                }
+                afficherMatchs(planning.planning);
+                calculerClassements();
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
+        }
+        
+        function ecouterTournoi() {
+            // Les résultats saisis sur d'autres appareils arrivent en direct
+            if (!window.EventSource || !config.idTournoi) return;
+            if (sourceDirect) sourceDirect.close();
+            sourceDirect = new EventSource('/tournois/' + config.idTournoi + '/flux');
+            sourceDirect.addEventListener('score', function(evenement) {
+                appliquerDelta(JSON.parse(evenement.data));
+            });
+            sourceDirect.addEventListener('resynchroniser', calculerClassements);
+        }
+        
+        function appliquerDelta(delta) {
+            // Seules les lignes des deux équipes changent ; l'ordre de la poule est fourni
+            var lignes = {};
+            var anciennes = classementsAffiches[delta.poule] || [];
+            for (var i = 0; i < anciennes.length; i++) {
+                lignes[anciennes[i].equipe] = anciennes[i];
+            }
+            for (var i = 0; i < delta.equipes.length; i++) {
+                lignes[delta.equipes[i].equipe] = delta.equipes[i];
+            }
+            var tableau = [];
+            for (var i = 0; i < delta.ordre.length; i++) {
+                var ligne = lignes[delta.ordre[i]];
+                if (!ligne) {
+                    calculerClassements();
+                    return;
+                }
+                ligne.position = i + 1;
+                tableau.push(ligne);
+            }
+            classementsAffiches[delta.poule] = tableau;
+            afficherClassements(classementsAffiches);
+            marquerMatch(delta);
+        }
+        
+        function marquerMatch(delta) {
+            var boutons = document.querySelectorAll('.btn-valider-score');
+            for (var i = 0; i < boutons.length; i++) {
+                var bouton = boutons[i];
+                var equipe1 = bouton.getAttribute('data-equipe1');
+                var equipe2 = bouton.getAttribute('data-equipe2');
+                if (bouton.getAttribute('data-poule') !== delta.poule) continue;
+                var inverse = equipe1 === delta.equipe2 && equipe2 === delta.equipe1;
+                if (!inverse && !(equipe1 === delta.equipe1 && equipe2 === delta.equipe2)) continue;
+                
+                var matchId = bouton.getAttribute('data-matchid');
+                var matchDiv = document.getElementById(matchId);
+                var scoresDiv = document.getElementById('scores_' + matchId);
+                var checkbox = matchDiv.querySelector('.match-checkbox');
+                if (delta.score1 === null) {
+                    delete matchsData[matchId];
+                    checkbox.checked = false;
+                    matchDiv.classList.remove('completed');
+                    scoresDiv.classList.add('hidden');
+                } else {
+                    var score1 = inverse ? delta.score2 : delta.score1;
+                    var score2 = inverse ? delta.score1 : delta.score2;
+                    matchsData[matchId] = {
+                        completed: true,
+                        score1: score1,
+                        score2: score2,
+                        equipe1: equipe1,
+                        equipe2: equipe2,
+                        poule: delta.poule
+                    };
+                    document.getElementById('score1_' + matchId).value = score1;
+                    document.getElementById('score2_' + matchId).value = score2;
+                    checkbox.checked = true;
+                    matchDiv.classList.add('completed');
+                    scoresDiv.classList.remove('hidden');
+                }
+            }
+        }
+        
+        function declarerPoules() {
+            if (!config.idTournoi) return;
+            fetch('/tournois/' + config.idTournoi + '/poules', {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ poules: config.poules })
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
         }
         
         function afficherPoules() {
@@ -403,7 +613,56 @@ HTML_TEMPLATE = '''
             config.poules[pouleIndex].equipes.push(nomEquipe);
             input.value = '';
             afficherEquipesPoule(pouleIndex);
-            genererMatchs();
+            declarerPoules();
+            if (config.idPlanning) {
+                modifierEquipe('ajouter', config.poules[pouleIndex].nom, nomEquipe);
+            } else {
+                genererMatchs();
+            }
+        }
+        
+        function toursJoues() {
+            // Les tours contenant un match terminé ne doivent plus bouger
+            var dernier = 0;
+            for (var matchId in matchsData) {
+                var tour = parseInt(matchId.split('_')[1]);
+                if (matchsData[matchId].completed && tour > dernier) {
+                    dernier = tour;
+                }
+            }
+            return dernier;
+        }
+        
+        function modifierEquipe(action, poule, equipe) {
+            var data = {
+                id_planning: config.idPlanning,
+                id_tournoi: config.idTournoi,
+                action: action,
+                poule: poule,
+                equipe: equipe,
+                tours_figes: toursJoues()
+            };
+            
+            fetch('/modifier_equipe', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(data)
+            })
+            .then(function(response) {
+                if (!response.ok) {
+                    // Planning inconnu du serveur : on le régénère entièrement
+                    genererMatchs();
+                    return null;
+                }
+                return response.json();
+            })
+            .then(function(data) {
+                if (!data) return;
+                config.idPlanning = data.id_planning;
+                afficherMatchs(data.planning);
+                calculerClassements();
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
         }
         
         function afficherEquipesPoule(pouleIndex) {
@@ -416,10 +675,27 @@ HTML_TEMPLATE = '''
             list.innerHTML = html;
         }
         
+        function nombreDeMatchs() {
+            var total = 0;
+            for (var i = 0; i < config.poules.length; i++) {
+                var n = config.poules[i].equipes.length;
+                total += n * (n - 1) / 2;
+            }
+            return total;
+        }
+        
         function genererMatchs() {
+            // « couplage » compare des plannings complets : il n'a rien à diffuser avant la fin
+            if (nombreDeMatchs() > SEUIL_FLUX && config.strategie !== 'couplage') {
+                genererMatchsFlux();
+                return;
+            }
+            
             var data = {
+                id_tournoi: config.idTournoi,
                 poules: config.poules,
-                nbTerrains: config.nbTerrains
+                nbTerrains: config.nbTerrains,
+                strategie: config.strategie
             };
             
             fetch('/generer_matchs', {
@@ -429,12 +705,68 @@ HTML_TEMPLATE = '''
             })
             .then(function(response) { return response.json(); })
             .then(function(data) {
+                config.graine = data.graine;
+                config.idPlanning = data.id_planning;
                 afficherMatchs(data.planning);
                 calculerClassements();
             })
             .catch(function(error) { console.error('Erreur:', error); });
         }
         
+        function genererMatchsFlux() {
+            // Les tours arrivent un par un (une ligne JSON chacun) et sont affichés aussitôt
+            var data = {
+                id_tournoi: config.idTournoi,
+                poules: config.poules,
+                nbTerrains: config.nbTerrains,
+                strategie: config.strategie
+            };
+            
+            document.getElementById('matchesContainer').innerHTML = '';
+            fetch('/generer_matchs_flux', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(data)
+            })
+            .then(function(response) {
+                var lecteur = response.body.getReader();
+                var decodeur = new TextDecoder();
+                var tampon = '';
+                
+                function traiterLigne(ligne) {
+                    if (ligne.trim() === '') return;
+                    var element = JSON.parse(ligne);
+                    if (element.entete) {
+                        config.graine = element.entete.graine;
+                        // Le serveur conserve le planning diffusé sous cet identifiant
+                        config.idPlanning = element.entete.id_planning;
+                    } else if (element.fin) {
+                        calculerClassements();
+                    } else {
+                        ajouterTour(element);
+                    }
+                }
+                
+                function lire() {
+                    return lecteur.read().then(function(resultat) {
+                        if (resultat.done) {
+                            traiterLigne(tampon);
+                            return;
+                        }
+                        tampon += decodeur.decode(resultat.value, { stream: true });
+                        var lignes = tampon.split('\\n');
+                        tampon = lignes.pop();
+                        for (var i = 0; i < lignes.length; i++) {
+                            traiterLigne(lignes[i]);
+                        }
+                        return lire();
+                    });
+                }
+                return lire();
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
+        }
+        
         function afficherMatchs(planning) {
             var section = document.getElementById('matches-section');
             var container = document.getElementById('matchesContainer');
@@ -450,61 +782,80 @@ HTML_TEMPLATE = '''
             
             var html = '';
             for (var i = 0; i < planning.length; i++) {
-                var tour = planning[i];
-                html += '<div class="tour">';
-                html += '<h4>Tour ' + tour.tour + '</h4>';
+                html += htmlTour(planning[i]);
+            }
+            container.innerHTML = html;
+            attacherEvenementsMatchs(container);
+        }
+        
+        function ajouterTour(tour) {
+            var container = document.getElementById('matchesContainer');
+            document.getElementById('matches-section').classList.remove('hidden');
+            document.getElementById('exportBtn').classList.remove('hidden');
+            
+            var bloc = document.createElement('div');
+            bloc.innerHTML = htmlTour(tour);
+            var element = bloc.firstChild;
+            container.appendChild(element);
+            attacherEvenementsMatchs(element);
+        }
+        
+        function htmlTour(tour) {
+            var html = '<div class="tour">';
+            html += '<h4>Tour ' + tour.tour + '</h4>';
+            
+            for (var j = 0; j < tour.matches.length; j++) {
+                var match = tour.matches[j];
+                var matchId = 'match_' + tour.tour + '_' + j;
                 
-                for (var j = 0; j < tour.matches.length; j++) {
-                    var match = tour.matches[j];
-                    var matchId = 'match_' + tour.tour + '_' + j;
+                if (match === null || match === undefined) {
+                    html += '<div class="match" style="opacity: 0.5; font-style: italic;">';
+                    html += '<span class="match-number">Terrain ' + (j + 1) + ':</span> Pas de match';
+                    html += '</div>';
+                } else {
+                    var isCompleted = matchsData[matchId] && matchsData[matchId].completed;
+                    var matchClass = isCompleted ? 'match completed' : 'match';
                     
-                    if (match === null || match === undefined) {
-                        html += '<div class="match" style="opacity: 0.5; font-style: italic;">';
-                        html += '<span class="match-number">Terrain ' + (j + 1) + ':</span> Pas de match';
-                        html += '</div>';
-                    } else {
-                        var isCompleted = matchsData[matchId] && matchsData[matchId].completed;
-                        var matchClass = isCompleted ? 'match completed' : 'match';
-                        
-                        html += '<div class="' + matchClass + '" id="' + matchId + '">';
-                        html += '<div class="match-header">';
-                        html += '<span class="match-number">Terrain ' + (j + 1) + ':</span>';
-                        html += '<span class="match-teams">' + match.equipe1 + ' vs ' + match.equipe2 + '</span>';
-                        html += '<span style="color: #888; font-size: 12px;">(' + match.poule + ')</span>';
-                        html += '<input type="checkbox" class="match-checkbox" data-matchid="' + matchId + '" ' + (isCompleted ? 'checked' : '') + '>';
-                        html += '</div>';
-                        html += '<div class="score-inputs ' + (isCompleted ? '' : 'hidden') + '" id="scores_' + matchId + '">';
-                        html += '<label>' + match.equipe1 + ':</label>';
-                        html += '<input type="number" id="score1_' + matchId + '" min="0" value="' + (matchsData[matchId] ? matchsData[matchId].score1 : 0) + '">';
-                        html += '<span>-</span>';
-                        html += '<label>' + match.equipe2 + ':</label>';
-                        html += '<input type="number" id="score2_' + matchId + '" min="0" value="' + (matchsData[matchId] ? matchsData[matchId].score2 : 0) + '">';
-                        html += '<button class="btn-valider-score" data-matchid="' + matchId + '" data-equipe1="' + match.equipe1 + '" data-equipe2="' + match.equipe2 + '" data-poule="' + match.poule + '">Valider</button>';
-                        html += '</div>';
-                        html += '</div>';
-                    }
-                }
-                
-                // Afficher les équipes au repos
-                if (tour.repos && tour.repos.length > 0) {
-                    html += '<div class="tour-repos">';
-                    html += '🪑 Équipes au repos : <strong>' + tour.repos.join(', ') + '</strong>';
+                    html += '<div class="' + matchClass + '" id="' + matchId + '">';
+                    html += '<div class="match-header">';
+                    html += '<span class="match-number">Terrain ' + (j + 1) + ':</span>';
+                    html += '<span class="match-teams">' + match.equipe1 + ' vs ' + match.equipe2 + '</span>';
+                    html += '<span style="color: #888; font-size: 12px;">(' + match.poule + ')</span>';
+                    html += '<input type="checkbox" class="match-checkbox" data-matchid="' + matchId + '" ' + (isCompleted ? 'checked' : '') + '>';
+                    html += '</div>';
+                    html += '<div class="score-inputs ' + (isCompleted ? '' : 'hidden') + '" id="scores_' + matchId + '">';
+                    html += '<label>' + match.equipe1 + ':</label>';
+                    html += '<input type="number" id="score1_' + matchId + '" min="0" value="' + (matchsData[matchId] ? matchsData[matchId].score1 : 0) + '">';
+                    html += '<span>-</span>';
+                    html += '<label>' + match.equipe2 + ':</label>';
+                    html += '<input type="number" id="score2_' + matchId + '" min="0" value="' + (matchsData[matchId] ? matchsData[matchId].score2 : 0) + '">';
+                    html += '<button class="btn-valider-score" data-matchid="' + matchId + '" data-equipe1="' + match.equipe1 + '" data-equipe2="' + match.equipe2 + '" data-poule="' + match.poule + '">Valider</button>';
+                    html += '</div>';
                     html += '</div>';
                 }
-                
+            }
+            
+            // Afficher les équipes au repos
+            if (tour.repos && tour.repos.length > 0) {
+                html += '<div class="tour-repos">';
+                html += '🪑 Équipes au repos : <strong>' + tour.repos.join(', ') + '</strong>';
                 html += '</div>';
             }
-            container.innerHTML = html;
             
+            html += '</div>';
+            return html;
+        }
+        
+        function attacherEvenementsMatchs(element) {
             // Ajouter les event listeners après l'insertion du HTML
-            var checkboxes = document.querySelectorAll('.match-checkbox');
+            var checkboxes = element.querySelectorAll('.match-checkbox');
             for (var k = 0; k < checkboxes.length; k++) {
                 checkboxes[k].addEventListener('change', function() {
                     toggleMatch(this.getAttribute('data-matchid'));
                 });
             }
             
-            var btnValiders = document.querySelectorAll('.btn-valider-score');
+            var btnValiders = element.querySelectorAll('.btn-valider-score');
             for (var k = 0; k < btnValiders.length; k++) {
                 btnValiders[k].addEventListener('click', function() {
                     var matchId = this.getAttribute('data-matchid');
@@ -529,10 +880,14 @@ HTML_TEMPLATE = '''
             } else {
                 scoresDiv.classList.add('hidden');
                 matchDiv.classList.remove('completed');
-                if (matchsData[matchId]) {
+                var ancien = matchsData[matchId];
+                if (ancien) {
                     delete matchsData[matchId];
+                    // Un score validé est retiré du classement du serveur
+                    if (ancien.equipe1) {
+                        envoyerScore('DELETE', { poule: ancien.poule, equipe1: ancien.equipe1, equipe2: ancien.equipe2 });
+                    }
                 }
-                calculerClassements();
             }
         }
         
@@ -550,68 +905,36 @@ HTML_TEMPLATE = '''
             };
             
             document.getElementById(matchId).classList.add('completed');
-            calculerClassements();
+            envoyerScore('POST', { poule: poule, equipe1: equipe1, equipe2: equipe2, score1: score1, score2: score2 });
         }
         
         function calculerClassements() {
-            var classements = {};
-            
-            for (var i = 0; i < config.poules.length; i++) {
-                var poule = config.poules[i];
-                classements[poule.nom] = {};
-                
-                for (var j = 0; j < poule.equipes.length; j++) {
-                    var equipe = poule.equipes[j];
-                    classements[poule.nom][equipe] = {
-                        equipe: equipe,
-                        joues: 0,
-                        gagnes: 0,
-                        perdus: 0,
-                        points: 0,
-                        marques: 0,
-                        encaisses: 0,
-                        diff: 0
-                    };
-                }
-            }
-            
-            for (var matchId in matchsData) {
-                var match = matchsData[matchId];
-                if (match.completed) {
-                    var stats1 = classements[match.poule][match.equipe1];
-                    var stats2 = classements[match.poule][match.equipe2];
-                    
-                    stats1.joues++;
-                    stats2.joues++;
-                    stats1.marques += match.score1;
-                    stats1.encaisses += match.score2;
-                    stats2.marques += match.score2;
-                    stats2.encaisses += match.score1;
-                    
-                    var ecart = Math.abs(match.score1 - match.score2);
-                    
-                    if (match.score1 > match.score2) {
-                        stats1.gagnes++;
-                        stats1.points += 4;
-                        stats2.perdus++;
-                        if (ecart <= 3) {
-                            stats2.points += 1;
-                        }
-                    } else if (match.score2 > match.score1) {
-                        stats2.gagnes++;
-                        stats2.points += 4;
-                        stats1.perdus++;
-                        if (ecart <= 3) {
-                            stats1.points += 1;
-                        }
-                    }
-                    
-                    stats1.diff = stats1.marques - stats1.encaisses;
-                    stats2.diff = stats2.marques - stats2.encaisses;
-                }
-            }
-            
-            afficherClassements(classements);
+            // Les classements sont tenus à jour par le serveur, score par score
+            if (!config.idTournoi) return;
+            fetch('/tournois/' + config.idTournoi + '/classements')
+            .then(function(response) { return response.json(); })
+            .then(function(classements) {
+                classementsAffiches = classements;
+                afficherClassements(classementsAffiches);
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
+        }
+        
+        function envoyerScore(methode, donnees) {
+            if (!config.idTournoi) return;
+            fetch('/tournois/' + config.idTournoi + '/scores', {
+                method: methode,
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(donnees)
+            })
+            .then(function(response) { return response.json(); })
+            .then(function(data) {
+                if (data.erreur) throw new Error(data.erreur);
+                // Seule la poule du match a changé
+                classementsAffiches[data.poule] = data.classement;
+                afficherClassements(classementsAffiches);
+            })
+            .catch(function(error) { console.error('Erreur:', error); });
         }
         
         function afficherClassements(classements) {
@@ -620,8 +943,8 @@ HTML_TEMPLATE = '''
             
             var hasData = false;
             for (var poule in classements) {
-                for (var equipe in classements[poule]) {
-                    if (classements[poule][equipe].joues > 0) {
+                for (var i = 0; i < classements[poule].length; i++) {
+                    if (classements[poule][i].joues > 0) {
                         hasData = true;
                         break;
                     }
@@ -637,16 +960,8 @@ HTML_TEMPLATE = '''
             var html = '';
             
             for (var poule in classements) {
-                var equipes = [];
-                for (var equipe in classements[poule]) {
-                    equipes.push(classements[poule][equipe]);
-                }
-                
-                equipes.sort(function(a, b) {
-                    if (b.points !== a.points) return b.points - a.points;
-                    if (b.diff !== a.diff) return b.diff - a.diff;
-                    return b.marques - a.marques;
-                });
+                // Lignes déjà triées par le serveur
+                var equipes = classements[poule];
                 
                 html += '<div class="classement-poule">';
                 html += '<h3>Classement - ' + poule + '</h3>';
@@ -659,7 +974,7 @@ HTML_TEMPLATE = '''
                     var eq = equipes[i];
                     if (eq.joues > 0) {
                         html += '<tr>';
-                        html += '<td>' + (i + 1) + '</td>';
+                        html += '<td>' + eq.position + '</td>';
                         html += '<td><strong>' + eq.equipe + '</strong></td>';
                         html += '<td>' + eq.joues + '</td>';
                         html += '<td>' + eq.gagnes + '</td>';
@@ -681,15 +996,30 @@ HTML_TEMPLATE = '''
         function exportPDF() {
             var data = {
                 poules: config.poules,
-                nbTerrains: config.nbTerrains
+                nbTerrains: config.nbTerrains,
+                strategie: config.strategie,
+                graine: config.graine,
+                id_planning: config.idPlanning,
+                id_tournoi: config.idTournoi,
+                asynchrone: true
             };
             
+            // Le PDF est rendu en arrière-plan : on suit la tâche puis on télécharge le fichier
             fetch('/export_pdf', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(data)
             })
-            .then(function(response) { return response.blob(); })
+            .then(function(response) {
+                return response.json().then(function(tache) {
+                    if (!response.ok) throw new Error(tache.erreur || response.statusText);
+                    // PDF déjà rendu pour ce planning : téléchargement direct
+                    if (tache.url) {
+                        return fetch(tache.url).then(function(reponse) { return reponse.blob(); });
+                    }
+                    return attendreExport(tache.id_tache);
+                });
+            })
             .then(function(blob) {
                 var url = window.URL.createObjectURL(blob);
                 var a = document.createElement('a');
@@ -700,89 +1030,62 @@ HTML_TEMPLATE = '''
                 window.URL.revokeObjectURL(url);
                 document.body.removeChild(a);
             })
-            .catch(function(error) { console.error('Erreur export:', error); });
+            .catch(function(error) {
+                console.error('Erreur export:', error);
+                alert('Export PDF impossible : ' + error.message);
+            });
+        }
+        
+        function attendreExport(idTache) {
+            return new Promise(function(resolve) { setTimeout(resolve, 500); })
+            .then(function() { return fetch('/export_pdf/' + idTache); })
+            .then(function(response) { return response.json(); })
+            .then(function(tache) {
+                if (tache.etat === 'terminee') {
+                    return fetch('/export_pdf/' + idTache + '/fichier').then(function(response) {
+                        return response.blob();
+                    });
+                }
+                if (tache.etat === 'en_attente' || tache.etat === 'en_cours') {
+                    return attendreExport(idTache);
+                }
+                throw new Error(tache.erreur || 'export ' + tache.etat);
+            });
         }
     </script>
 </body>
 </html>
 '''
 
-def generer_matchs_optimise(poules, nb_terrains):
-    """
-    Génère les matchs en optimisant les pauses entre matchs pour chaque équipe
-    """
-    tous_les_matchs = []
-    toutes_les_equipes = set()
-    
-    for poule in poules:
-        if len(poule['equipes']) < 2:
-            continue
-        equipes = poule['equipes']
-        toutes_les_equipes.update(equipes)
-        
-        for equipe1, equipe2 in combinations(equipes, 2):
-            tous_les_matchs.append({
-                'equipe1': equipe1,
-                'equipe2': equipe2,
-                'poule': poule['nom']
-            })
-    
-    if not tous_les_matchs:
-        return {"terrains": [[] for _ in range(nb_terrains)], "planning": []}
-    
-    random.shuffle(tous_les_matchs)
-    matchs_restants = tous_les_matchs.copy()
-    dernier_tour = {e: -10 for e in toutes_les_equipes}
-    tour = 0
-    planning = []
-
-    while matchs_restants:
-        tour += 1
-        matchs_tour = []
-        equipes_occupees = set()
-        matchs_scores = []
-        
-        for match in matchs_restants:
-            e1, e2 = match['equipe1'], match['equipe2']
-            score_pause = (tour - dernier_tour[e1]) + (tour - dernier_tour[e2])
-            matchs_scores.append((score_pause, random.random(), match))
-        
-        matchs_scores.sort(reverse=True)
-        
-        for _, _, match in matchs_scores:
-            e1, e2 = match['equipe1'], match['equipe2']
-            if e1 not in equipes_occupees and e2 not in equipes_occupees:
-                matchs_tour.append(match)
-                equipes_occupees.update([e1, e2])
-                dernier_tour[e1] = tour
-                dernier_tour[e2] = tour
-                matchs_restants.remove(match)
-                if len(matchs_tour) == nb_terrains:
-                    break
-        
-        while len(matchs_tour) < nb_terrains:
-            matchs_tour.append(None)
-        
-        equipes_repos = [e for e in toutes_les_equipes if e not in equipes_occupees]
-        planning.append({
-            "tour": tour,
-            "matches": matchs_tour,
-            "repos": equipes_repos
-        })
-        
-        if all(m is None for m in matchs_tour):
-            break
 
-    terrains = [[] for _ in range(nb_terrains)]
-    for tour in planning:
-        for i, match in enumerate(tour["matches"]):
-            terrains[i].append(match)
-    
-    for terrain in terrains:
-        while terrain and terrain[-1] is None:
-            terrain.pop()
-    
-    return {"terrains": terrains, "planning": planning}
+@app.before_request
+def demarrer_chronometre():
+    registre.debut_requete()
+    g.chronometre = demarrer()
+    if request.is_json:
+        # Le corps lu ici est gardé en cache par Flask pour request.json
+        with phase('parse'):
+            request.get_json(silent=True)
+
+
+@app.after_request
+def publier_chronometre(response):
+    chronometre = g.pop('chronometre', None)
+    if chronometre is not None:
+        response.headers['Server-Timing'] = chronometre.server_timing()
+        route = request.url_rule.rule if request.url_rule else 'inconnue'
+        journaliser(route, request.method, response.status_code, chronometre)
+        registre.fin_requete(route, request.method, response.status_code, chronometre.total())
+        arreter()
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    texte = registre.exposer({'plannings': cache_plannings.statistiques(), 'pdf': cache_pdf.statistiques(),
+                              'tableaux': cache_tableaux.statistiques()},
+                             flux=diffuseur.statistiques(), taches=exports_pdf.statistiques())
+    return app.response_class(texte, mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/')
@@ -793,137 +1096,531 @@ def index():
 @app.route('/generer_matchs', methods=['POST'])
 def generer_matchs():
     data = request.json
-    poules = data['poules']
-    nb_terrains = data['nbTerrains']
-    resultats = generer_matchs_optimise(poules, nb_terrains)
-    return jsonify(resultats)
+    id_tournoi = data.get('id_tournoi')
+    tournoi = stockage.tournoi(id_tournoi) if id_tournoi else None
+    if id_tournoi and tournoi is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    
+    # Sans poules dans la requête, on planifie la configuration enregistrée du tournoi
+    if tournoi is not None and 'poules' not in data:
+        poules = tournoi['poules']
+        nb_terrains = data.get('nbTerrains') or tournoi['nb_terrains'] or 1
+        strategie = data.get('strategie') or tournoi['strategie'] or 'glouton'
+    else:
+        poules = data['poules']
+        nb_terrains = data['nbTerrains']
+        strategie = data.get('strategie', 'glouton')
+    if strategie not in STRATEGIES:
+        return jsonify({"erreur": f"Stratégie inconnue : {strategie}"}), 400
+    graine = data.get('graine')
+    calendrier = data.get('calendrier')
+    contraintes = data.get('contraintes')
+    
+    # Recherche multi-départs et amélioration locale : le résultat dépend du temps accordé,
+    # il est mis en cache sous son propre identifiant
+    try:
+        valider_graine(graine)
+        if data.get('budget_ms') or data.get('amelioration_ms'):
+            if data.get('budget_ms'):
+                resultats = rechercher_multi_depart(poules, nb_terrains, strategie, graine, data['budget_ms'],
+                                                    calendrier=calendrier, contraintes=contraintes)
+            else:
+                resultats = generer_matchs_optimise(poules, nb_terrains, strategie, graine, calendrier,
+                                                    contraintes)
+            if data.get('amelioration_ms'):
+                resultats = ameliorer_planning(poules, resultats, data['amelioration_ms'])
+            registre.observer_planning(resultats["metriques"]["nb_matchs"], resultats["nb_tours"])
+            corps = cache_plannings.enregistrer(poules, resultats)
+        else:
+            if graine is None:
+                graine = graine_par_defaut(poules, nb_terrains, strategie)
+            
+            id_planning = empreinte_tournoi(poules, nb_terrains, strategie, graine, calendrier, contraintes)
+            if tournoi is not None and tournoi['id_planning'] == id_planning:
+                id_tournoi = None
+            corps = cache_plannings.corps(id_planning)
+            if corps is None:
+                resultats = generer_matchs_optimise(poules, nb_terrains, strategie, graine, calendrier,
+                                                    contraintes)
+                registre.observer_planning(resultats["metriques"]["nb_matchs"], resultats["nb_tours"])
+                corps = cache_plannings.enregistrer(poules, resultats)
+    except ValueError as erreur:
+        return jsonify({"erreur": str(erreur)}), 400
+    _persister_planning(id_tournoi, nb_terrains, corps)
+    return app.response_class(corps, mimetype='application/json')
 
 
-@app.route('/export_pdf', methods=['POST'])
-def export_pdf():
+def _persister_planning(id_tournoi, nb_terrains, corps):
+    """
+    Le planning servi devient le planning courant du tournoi, s'il y en a un
+    """
+    if id_tournoi:
+        stockage.enregistrer_planning(id_tournoi, nb_terrains, json.loads(corps), corps)
+        cache_tableaux.invalider(id_tournoi)
+
+
+@app.route('/generer_matchs_flux', methods=['POST'])
+def generer_matchs_flux():
     data = request.json
     poules = data['poules']
     nb_terrains = data['nbTerrains']
+    strategie = data.get('strategie', 'glouton')
+    if strategie not in STRATEGIES:
+        return jsonify({"erreur": f"Stratégie inconnue : {strategie}"}), 400
+    if strategie == 'couplage':
+        # Tous les tours sont calculés avant le premier (voir planificateur.py) : la
+        # requête est renvoyée vers la génération complète, qui répond en un bloc
+        return redirect(url_for('generer_matchs'), code=307)
+    try:
+        valider_graine(data.get('graine'))
+        Contraintes(data.get('contraintes')).verifier_taille(poules)
+    except ValueError as erreur:
+        return jsonify({"erreur": str(erreur)}), 400
+    id_tournoi = data.get('id_tournoi')
+    tournoi = stockage.tournoi(id_tournoi) if id_tournoi else None
+    if id_tournoi and tournoi is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
     
-    resultats = generer_matchs_optimise(poules, nb_terrains)
-    terrains = resultats["terrains"]
-    planning = resultats["planning"]
+    # Une ligne NDJSON par tour, envoyée dès que le tour est fixé. Seule la recette du
+    # planning est gardée, en cache sous son identifiant (modification, export) et comme
+    # planning du tournoi ; les tours envoyés sont écrits par lots dans la table des matchs
+    def lignes():
+        elements = iterer_planning(poules, nb_terrains, strategie, data.get('graine'), data.get('contraintes'))
+        persister, lot, nb_matchs = False, [], 0
+        
+        def ecrire(lot):
+            if lot:
+                stockage.ajouter_matchs(id_tournoi, lot)
+                cache_tableaux.invalider(id_tournoi)
+            return []
+        
+        try:
+            for element in elements:
+                if 'entete' in element:
+                    entete = element['entete']
+                    recette = {"poules": poules, "nbTerrains": nb_terrains, "strategie": strategie,
+                               "graine": entete['graine'], "contraintes": data.get('contraintes')}
+                    if not cache_plannings.contient(entete['id_planning']):
+                        cache_plannings.enregistrer_recette(entete['id_planning'], recette)
+                    persister = tournoi is not None and tournoi['id_planning'] != entete['id_planning']
+                    if persister:
+                        stockage.commencer_planning(id_tournoi, nb_terrains, strategie, entete['id_planning'], recette)
+                        cache_tableaux.invalider(id_tournoi)
+                elif 'fin' in element:
+                    lot = ecrire(lot)
+                    registre.observer_planning(nb_matchs, element['fin']['nb_tours'])
+                else:
+                    nb_matchs += len(element['matches']) - element['matches'].count(None)
+                    if persister:
+                        lot.append(element)
+                        if len(lot) >= TOURS_PAR_LOT:
+                            lot = ecrire(lot)
+                yield json.dumps(element, ensure_ascii=False) + '\n'
+        except GeneratorExit:
+            # Client parti en cours de diffusion : le tournoi a déjà la recette, ses matchs sont complétés
+            if persister:
+                for element in elements:
+                    if 'matches' in element:
+                        lot.append(element)
+                        if len(lot) >= TOURS_PAR_LOT:
+                            lot = ecrire(lot)
+                ecrire(lot)
+            raise
     
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-    elements = []
+    return app.response_class(lignes(), mimetype='application/x-ndjson')
+
+
+@app.route('/comparer_strategies', methods=['POST'])
+def comparer():
+    data = request.json
+    return jsonify(comparer_strategies(data['poules'], data['nbTerrains']))
+
+
+@app.route('/modifier_equipe', methods=['POST'])
+def modifier_equipe():
+    data = request.json
+    operation = {'ajouter': ajouter_equipe, 'retirer': retirer_equipe}.get(data.get('action'))
+    if operation is None:
+        return jsonify({"erreur": "Action attendue : ajouter ou retirer"}), 400
+    tours_figes = data.get('tours_figes', 0)
+    if not isinstance(tours_figes, int) or isinstance(tours_figes, bool) or tours_figes < 0:
+        return jsonify({"erreur": "tours_figes doit être un entier positif ou nul"}), 400
+    enregistrement = cache_plannings.obtenir(data.get('id_planning'))
+    if enregistrement is None:
+        return jsonify({"erreur": "Planning inconnu"}), 404
     
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2d5016'),
-        spaceAfter=30,
-        alignment=1
-    )
+    poules, resultats = enregistrement
+    try:
+        poules, resultats = operation(poules, resultats, data['poule'], data['equipe'], tours_figes)
+    except ValueError as erreur:
+        return jsonify({"erreur": str(erreur)}), 400
     
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#4a7c2e'),
-        spaceAfter=12
-    )
+    corps = cache_plannings.enregistrer(poules, resultats)
+    if data.get('id_tournoi') and stockage.existe(data['id_tournoi']):
+        _persister_planning(data['id_tournoi'], len(resultats['terrains']), corps)
+    return app.response_class(corps, mimetype='application/json')
+
+
+@app.route('/planning/<id_planning>')
+def obtenir_planning(id_planning):
+    corps = cache_plannings.corps(id_planning)
+    if corps is None:
+        return jsonify({"erreur": "Planning inconnu"}), 404
+    return app.response_class(corps, mimetype='application/json')
+
+
+def _envoyer_pdf(contenu, cle):
+    return send_file(io.BytesIO(contenu), as_attachment=True, download_name='tournoi_rugby.pdf',
+                     mimetype='application/pdf', etag=cle)
+
+
+def _rendre_pdf_en_cache(cle, poules, resultats):
+    contenu = rendre_pdf(poules, resultats)
+    cache_pdf.enregistrer(cle, contenu)
+    return contenu
+
+
+def _exporter_pdf(cle, poules, resultats):
+    # Tâche d'export : le document ne reste que dans cache_pdf, la tâche garde sa clé
+    _rendre_pdf_en_cache(cle, poules, resultats)
+    return cle
+
+
+def _empreinte_reconstruite(data):
+    """
+    Identifiant du planning que les poules et la graine de la requête reconstruisent
+    """
+    if 'poules' not in data:
+        return None
+    strategie = data.get('strategie', 'glouton')
+    graine = data.get('graine')
+    if graine is None:
+        graine = graine_par_defaut(data['poules'], data['nbTerrains'], strategie)
+    return empreinte_tournoi(data['poules'], data['nbTerrains'], strategie, graine,
+                             data.get('calendrier'), data.get('contraintes'))
+
+
+def _identifiants_export(data):
+    """
+    Identifiants candidats du planning à exporter, calculés sans le générer : celui
+    demandé, et seulement s'il est introuvable, le planning courant du tournoi puis
+    celui que reconstruisent les poules et la graine
+    """
+    stocke = None
+    if data.get('id_tournoi'):
+        tournoi = stockage.tournoi(data['id_tournoi'])
+        if tournoi is not None:
+            stocke = tournoi['id_planning']
+    reconstruit = _empreinte_reconstruite(data)
     
-    # Titre principal
-    elements.append(Paragraph("🏉 Tournoi de Rugby - Planning des Matchs", title_style))
-    elements.append(Spacer(1, 0.5*cm))
+    demande = data.get('id_planning')
+    if demande and (cache_pdf.contient(empreinte_pdf(demande)) or cache_plannings.contient(demande)
+                    or demande in (stocke, reconstruit)):
+        return [demande]
+    return [identifiant for identifiant in (stocke, reconstruit) if identifiant]
+
+
+def _planning_export(data, id_planning):
+    """
+    Retourne (poules, resultats) du planning id_planning, ou None ; une source n'est
+    utilisée que si elle contient exactement ce planning
+    """
+    enregistrement = cache_plannings.obtenir(id_planning)
+    if enregistrement is not None:
+        return enregistrement
+    if data.get('id_tournoi'):
+        tournoi = stockage.tournoi(data['id_tournoi'])
+        if tournoi is not None and tournoi['id_planning'] == id_planning:
+            return _planning_tournoi(data['id_tournoi'])
+    if _empreinte_reconstruite(data) == id_planning:
+        # La graine permet de reconstruire le planning à l'identique
+        resultats = generer_matchs_optimise(data['poules'], data['nbTerrains'], data.get('strategie', 'glouton'),
+                                            data.get('graine'), data.get('calendrier'), data.get('contraintes'))
+        cache_plannings.enregistrer(data['poules'], resultats)
+        return data['poules'], resultats
+    return None
+
+
+@app.route('/export_pdf', methods=['POST'])
+def export_pdf():
+    data = request.json
+    strategie = data.get('strategie', 'glouton')
+    if strategie not in STRATEGIES:
+        return jsonify({"erreur": f"Stratégie inconnue : {strategie}"}), 400
+    try:
+        valider_graine(data.get('graine'))
+    except ValueError as erreur:
+        return jsonify({"erreur": str(erreur)}), 400
     
-    # Informations sur les poules
-    elements.append(Paragraph("Composition des poules", heading_style))
-    for poule in poules:
-        if poule['equipes']:
-            elements.append(Paragraph(f"<b>{poule['nom']}</b>: {', '.join(poule['equipes'])}", styles['Normal']))
-            elements.append(Spacer(1, 0.3*cm))
-    elements.append(Spacer(1, 0.7*cm))
+    enregistrement = None
+    for id_planning in _identifiants_export(data):
+        # Un PDF déjà rendu pour ce planning est renvoyé tel quel, sans replanifier
+        cle = empreinte_pdf(id_planning)
+        contenu = cache_pdf.obtenir(cle)
+        if contenu is not None:
+            if data.get('asynchrone'):
+                return jsonify({"etat": TERMINEE, "url": url_for('pdf_planning', id_planning=id_planning)})
+            return _envoyer_pdf(contenu, cle)
+        enregistrement = _planning_export(data, id_planning)
+        if enregistrement is not None:
+            break
+    if enregistrement is None:
+        return jsonify({"erreur": "Planning inconnu"}), 404
     
-    # Planning global par tour
-    elements.append(Paragraph("Planning des matchs (par tour)", heading_style))
-    for tour in planning:
-        elements.append(Spacer(1, 0.3*cm))
-        elements.append(Paragraph(f"<b>Tour {tour['tour']}</b>", styles['Heading3']))
-        
-        table_data = [['Terrain', 'Équipe 1', 'vs', 'Équipe 2', 'Poule']]
-        for i, match in enumerate(tour['matches'], start=1):
-            if match is None:
-                table_data.append([f"{i}", '-', '-', '-', 'Aucun match'])
-            else:
-                table_data.append([
-                    f"{i}",
-                    match['equipe1'],
-                    'vs',
-                    match['equipe2'],
-                    match['poule']
-                ])
-        
-        table = Table(table_data, colWidths=[2*cm, 5*cm, 1.5*cm, 5*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5016')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')])
-        ]))
-        elements.append(table)
-
-        if tour['repos']:
-            elements.append(Spacer(1, 0.2*cm))
-            elements.append(Paragraph(f"Équipes au repos : <b>{', '.join(tour['repos'])}</b>", styles['Normal']))
-        else:
-            elements.append(Paragraph("Toutes les équipes jouent ce tour.", styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
+    poules, resultats = enregistrement
+    cle = empreinte_pdf(resultats['id_planning'])
     
-    elements.append(Spacer(1, 1*cm))
+    # Mode asynchrone : le document est rendu en arrière-plan, le client suit la tâche
+    if data.get('asynchrone'):
+        try:
+            tache = exports_pdf.soumettre(_exporter_pdf, cle, poules, resultats,
+                                          reference=(resultats['id_planning'], data.get('id_tournoi')))
+        except FileSaturee as erreur:
+            reponse = jsonify({"erreur": str(erreur)})
+            reponse.status_code = 429
+            reponse.headers['Retry-After'] = '5'
+            return reponse
+        reponse = jsonify(tache.description())
+        reponse.status_code = 202
+        reponse.headers['Location'] = url_for('etat_export_pdf', id_tache=tache.id)
+        return reponse
     
-    # Répartition par terrain
-    elements.append(Paragraph("Organisation par terrain", heading_style))
-    for terrain_idx, terrain in enumerate(terrains):
-        elements.append(Spacer(1, 0.3*cm))
-        elements.append(Paragraph(f"<b>Terrain {terrain_idx + 1}</b>", styles['Heading3']))
-        
-        table_data = [['Match', 'Équipe 1', 'vs', 'Équipe 2', 'Poule']]
-        for match_idx, match in enumerate(terrain):
-            if match is None:
-                table_data.append([str(match_idx + 1), '-', '-', '-', 'Pas de match'])
-            else:
-                table_data.append([
-                    str(match_idx + 1),
-                    match['equipe1'],
-                    'vs',
-                    match['equipe2'],
-                    match['poule']
-                ])
-        
-        table = Table(table_data, colWidths=[2*cm, 5*cm, 1.5*cm, 5*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5016')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')])
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.5*cm))
+    return _envoyer_pdf(_rendre_pdf_en_cache(cle, poules, resultats), cle)
+
+
+@app.route('/planning/<id_planning>/pdf')
+def pdf_planning(id_planning):
+    # L'ETag ne dépend que de l'identifiant : un client à jour reçoit 304 sans rendu
+    cle = empreinte_pdf(id_planning)
+    if cle in request.if_none_match:
+        reponse = app.response_class(status=304)
+        reponse.set_etag(cle)
+        return reponse
     
-    doc.build(elements)
-    buffer.seek(0)
+    contenu = cache_pdf.obtenir(cle)
+    if contenu is None:
+        enregistrement = cache_plannings.obtenir(id_planning)
+        if enregistrement is None:
+            return jsonify({"erreur": "Planning inconnu"}), 404
+        contenu = _rendre_pdf_en_cache(cle, *enregistrement)
+    return _envoyer_pdf(contenu, cle)
+
+
+@app.route('/export_pdf/<id_tache>')
+def etat_export_pdf(id_tache):
+    tache = exports_pdf.obtenir(id_tache)
+    if tache is None:
+        return jsonify({"erreur": "Export inconnu"}), 404
+    return jsonify(tache.description())
+
+
+@app.route('/export_pdf/<id_tache>/fichier')
+def fichier_export_pdf(id_tache):
+    tache = exports_pdf.obtenir(id_tache)
+    if tache is None:
+        return jsonify({"erreur": "Export inconnu"}), 404
+    if tache.etat != TERMINEE:
+        return jsonify(tache.description()), 409
+    cle = tache.resultat
+    contenu = cache_pdf.obtenir(cle)
+    if contenu is None:
+        # Document évincé du cache depuis la fin de la tâche : il est rendu de nouveau
+        id_planning, id_tournoi = tache.reference
+        enregistrement = _planning_export({"id_tournoi": id_tournoi}, id_planning)
+        if enregistrement is None:
+            return jsonify({"erreur": "Planning inconnu"}), 404
+        contenu = _rendre_pdf_en_cache(cle, *enregistrement)
+    return _envoyer_pdf(contenu, cle)
+
+
+
+def _planning_tournoi(id_tournoi):
+    """
+    Couple (poules, resultats) du planning courant du tournoi, ou None ; un planning
+    diffusé, enregistré par sa recette, est repris du cache ou regénéré
+    """
+    resultats = stockage.planning(id_tournoi)
+    if resultats is None:
+        return None
+    if 'recette' not in resultats:
+        return stockage.poules(id_tournoi), resultats
+    enregistrement = cache_plannings.obtenir(resultats['id_planning'])
+    if enregistrement is None:
+        recette = resultats['recette']
+        enregistrement = recette['poules'], regenerer(recette)
+        cache_plannings.enregistrer(*enregistrement)
+    return enregistrement
+
+
+def _nouveaux_classements(id_tournoi, poules):
+    # Chaque score saisi est ajouté au journal du tournoi avant d'être appliqué, puis diffusé ;
+    # l'instantané est réécrit tous les INTERVALLE_INSTANTANE événements
+    return Classements(poules, journal=partial(stockage.ajouter_evenement, id_tournoi),
+                       diffusion=partial(diffuseur.publier, id_tournoi, 'score'),
+                       instantanes=partial(stockage.enregistrer_instantane, id_tournoi),
+                       intervalle=INTERVALLE_INSTANTANE)
+
+
+def _classements(id_tournoi):
+    classements = tournois.get(id_tournoi)
+    if classements is None:
+        poules = stockage.poules(id_tournoi)
+        if not poules and not stockage.existe(id_tournoi):
+            return None
+        # Reprise : dernier instantané puis événements journalisés depuis
+        classements = _nouveaux_classements(id_tournoi, poules)
+        numero, scores = stockage.instantane(id_tournoi)
+        classements.restaurer(numero, scores)
+        classements.rejouer(stockage.evenements(id_tournoi, apres=numero))
+        classements = tournois.setdefault(id_tournoi, classements)
+    return classements
+
+
+@app.route('/tournois', methods=['POST'])
+def creer_tournoi():
+    data = request.get_json(silent=True) or {}
+    id_tournoi = uuid.uuid4().hex
+    poules = data.get('poules', [])
+    stockage.creer_tournoi(id_tournoi, poules)
+    tournois[id_tournoi] = _nouveaux_classements(id_tournoi, poules)
+    return jsonify({"id_tournoi": id_tournoi}), 201
+
+
+@app.route('/tournois/<id_tournoi>')
+def obtenir_tournoi(id_tournoi):
+    tournoi = stockage.tournoi(id_tournoi)
+    if tournoi is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    tournoi["id_tournoi"] = id_tournoi
+    enregistrement = _planning_tournoi(id_tournoi)
+    tournoi["planning"] = None if enregistrement is None else enregistrement[1]
+    _, scores = _classements(id_tournoi).instantane()
+    tournoi["scores"] = [{"poule": p, "equipe1": e1, "equipe2": e2, "score1": s1, "score2": s2}
+                         for p, e1, e2, s1, s2 in scores]
+    return jsonify(tournoi)
+
+
+@app.route('/tournois/<id_tournoi>/poules', methods=['PUT'])
+def definir_poules(id_tournoi):
+    classements = _classements(id_tournoi)
+    if classements is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    stockage.definir_poules(id_tournoi, request.json['poules'])
+    classements.definir_poules(request.json['poules'])
+    cache_tableaux.invalider(id_tournoi)
+    return jsonify(classements.tableaux())
+
+
+@app.route('/tournois/<id_tournoi>/scores', methods=['POST', 'DELETE'])
+def enregistrer_score(id_tournoi):
+    classements = _classements(id_tournoi)
+    if classements is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    data = request.json
+    try:
+        if request.method == 'DELETE':
+            equipes = classements.annuler(data['poule'], data['equipe1'], data['equipe2'])
+        else:
+            equipes = classements.enregistrer(data['poule'], data['equipe1'], data['equipe2'],
+                                              data['score1'], data['score2'])
+    except ValueError as erreur:
+        return jsonify({"erreur": str(erreur)}), 400
+    if equipes:
+        cache_tableaux.invalider(id_tournoi)
+    return jsonify({"poule": data['poule'], "equipes": equipes or [],
+                    "classement": classements.tableau(data['poule'])})
+
+
+@app.route('/tournois/<id_tournoi>/flux')
+def flux_tournoi(id_tournoi):
+    """
+    Scores et classements en direct (Server-Sent Events)
+    """
+    classements = _classements(id_tournoi)
+    if classements is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    dernier = request.headers.get('Last-Event-ID') or request.args.get('depuis')
+    try:
+        dernier = int(dernier) if dernier else None
+    except ValueError:
+        dernier = None
+    if dernier is not None and dernier >= classements.numero:
+        dernier = None
+    reponse = app.response_class(diffuseur.ecouter(id_tournoi, dernier), mimetype='text/event-stream')
+    reponse.headers['Cache-Control'] = 'no-cache'
+    reponse.headers['X-Accel-Buffering'] = 'no'
+    return reponse
+
+
+def _construire_tableau(id_tournoi, classements):
+    """
+    Classements et prochains matchs non joués de chaque terrain
+    """
+    numero, scores = classements.instantane()
+    joues = {(poule, equipe1, equipe2) for poule, equipe1, equipe2, _, _ in scores}
+    # Lecture indexée des matchs du planning courant, sans désérialiser le planning entier
+    tournoi = stockage.tournoi(id_tournoi)
+    prochains = stockage.prochains_matchs(id_tournoi, joues, MATCHS_A_VENIR) if tournoi['id_planning'] else []
+    return {
+        "id_tournoi": id_tournoi,
+        "numero": numero,
+        "id_planning": tournoi['id_planning'],
+        "classements": classements.tableaux(),
+        "prochains": [{"terrain": i, "matchs": matchs} for i, matchs in enumerate(prochains, start=1)]
+    }
+
+
+@app.route('/tournois/<id_tournoi>/tableau')
+def tableau_public(id_tournoi):
+    """
+    Tableau d'affichage public, servi depuis le cache jusqu'au prochain score
+    """
+    entree = cache_tableaux.obtenir(id_tournoi)
+    if entree is None:
+        generation = cache_tableaux.generation(id_tournoi)
+        classements = _classements(id_tournoi)
+        if classements is None:
+            return jsonify({"erreur": "Tournoi inconnu"}), 404
+        corps = serialiser(_construire_tableau(id_tournoi, classements))
+        entree = hashlib.sha256(corps).hexdigest(), corps
+        cache_tableaux.enregistrer(id_tournoi, generation, *entree)
     
-    return send_file(buffer, as_attachment=True, download_name='tournoi_rugby.pdf', mimetype='application/pdf')
+    etag, corps = entree
+    if etag in request.if_none_match:
+        reponse = app.response_class(status=304)
+    else:
+        reponse = app.response_class(corps, mimetype='application/json')
+    reponse.set_etag(etag)
+    reponse.headers['Cache-Control'] = 'public, no-cache'
+    return reponse
+
+
+@app.route('/tournois/<id_tournoi>/equipes/<equipe>/matchs')
+def matchs_equipe(id_tournoi, equipe):
+    # Calendrier d'une équipe, lu par index sans relire le planning
+    if not stockage.existe(id_tournoi):
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    return jsonify(stockage.matchs_equipe(id_tournoi, equipe))
+
+
+@app.route('/tournois/<id_tournoi>/evenements')
+def obtenir_evenements(id_tournoi):
+    if not stockage.existe(id_tournoi):
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    try:
+        apres = int(request.args.get('apres', 0))
+        limite = min(int(request.args.get('limite', 1000)), 10000)
+    except ValueError:
+        return jsonify({"erreur": "Paramètres apres et limite entiers attendus"}), 400
+    return jsonify(stockage.journal(id_tournoi, apres, limite))
+
+
+@app.route('/tournois/<id_tournoi>/classements')
+def obtenir_classements(id_tournoi):
+    classements = _classements(id_tournoi)
+    if classements is None:
+        return jsonify({"erreur": "Tournoi inconnu"}), 404
+    return jsonify(classements.tableaux())
 
 
 if __name__ == '__main__':
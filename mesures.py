@@ -0,0 +1,266 @@
+"""
+Instrumentation des requêtes : durée de chaque phase (lecture du JSON, appariements,
+remplissage des tours, vue par terrain, construction et rendu du PDF, sérialisation).
+
+Le chronomètre de la requête en cours est porté par une variable de contexte : le
+moteur marque ses phases avec phase(...) sans rien savoir de Flask, et ce marquage ne
+coûte presque rien quand aucune requête n'est chronométrée (scripts, benchmark).
+Les durées sont renvoyées dans l'en-tête Server-Timing et écrites, une ligne JSON par
+requête, dans un journal à rotation.
+
+Les compteurs exposés au format Prometheus (route /metrics) suivent le même principe :
+une requête ne fait qu'ajouter un événement à une deque, opération atomique sans
+verrou ; les événements sont agrégés à la lecture des métriques, ou par paquets quand
+la file grossit, par le premier thread qui obtient le verrou sans attendre.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+_chronometre = ContextVar('chronometre', default=None)
+
+journal = logging.getLogger('rugbytournament.performances')
+journal.propagate = False
+
+
+class Chronometre:
+    __slots__ = ('debut', 'phases')
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.phases = {}
+
+    def ajouter(self, nom, duree):
+        self.phases[nom] = self.phases.get(nom, 0.0) + duree
+
+    def total(self):
+        return time.perf_counter() - self.debut
+
+    def server_timing(self):
+        """
+        Valeur de l'en-tête Server-Timing, durées en millisecondes
+        """
+        mesures = [f"{nom};dur={duree * 1000:.2f}" for nom, duree in self.phases.items()]
+        mesures.append(f"total;dur={self.total() * 1000:.2f}")
+        return ', '.join(mesures)
+
+
+def demarrer():
+    """
+    Démarre le chronomètre de la requête en cours et le retourne
+    """
+    chronometre = Chronometre()
+    _chronometre.set(chronometre)
+    return chronometre
+
+
+def arreter():
+    _chronometre.set(None)
+
+
+@contextmanager
+def phase(nom):
+    """
+    Ajoute la durée du bloc à la phase nom du chronomètre en cours, s'il y en a un
+    """
+    chronometre = _chronometre.get()
+    if chronometre is None:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        chronometre.ajouter(nom, time.perf_counter() - debut)
+
+
+def marquer(nom, debut):
+    """
+    Ajoute à la phase nom le temps écoulé depuis debut (time.perf_counter())
+    """
+    chronometre = _chronometre.get()
+    if chronometre is not None:
+        chronometre.ajouter(nom, time.perf_counter() - debut)
+
+
+BORNES_LATENCE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BORNES_MATCHS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+BORNES_TOURS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogramme:
+    __slots__ = ('bornes', 'comptes', 'somme', 'nombre')
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.comptes = [0] * (len(bornes) + 1)
+        self.somme = 0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        self.comptes[bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.nombre += 1
+
+    def lignes(self, nom, etiquettes=''):
+        separateur = ',' if etiquettes else ''
+        cumul = 0
+        for borne, compte in zip(self.bornes, self.comptes):
+            cumul += compte
+            yield f'{nom}_bucket{{{etiquettes}{separateur}le="{borne}"}} {cumul}'
+        yield f'{nom}_bucket{{{etiquettes}{separateur}le="+Inf"}} {self.nombre}'
+        suffixe = f'{{{etiquettes}}}' if etiquettes else ''
+        yield f'{nom}_sum{suffixe} {self.somme}'
+        yield f'{nom}_count{suffixe} {self.nombre}'
+
+
+class Registre:
+    """
+    Compteurs du serveur : requêtes, latences par route, requêtes en cours, taille des
+    plannings générés. L'enregistrement ne prend jamais de verrou bloquant.
+    """
+    TAILLE_PAQUET = 1024
+
+    def __init__(self):
+        self._evenements = deque()
+        self._verrou = threading.Lock()
+        self.requetes = {}
+        self.latences = {}
+        self.debuts = 0
+        self.fins = 0
+        self.matchs = Histogramme(BORNES_MATCHS)
+        self.tours = Histogramme(BORNES_TOURS)
+
+    def _enregistrer(self, evenement):
+        self._evenements.append(evenement)
+        if len(self._evenements) >= self.TAILLE_PAQUET and self._verrou.acquire(blocking=False):
+            try:
+                self._agreger()
+            finally:
+                self._verrou.release()
+
+    def _agreger(self):
+        evenements = self._evenements
+        while True:
+            try:
+                evenement = evenements.popleft()
+            except IndexError:
+                return
+            if evenement is None:
+                self.debuts += 1
+            elif evenement[0] == 'requete':
+                _, route, methode, statut, duree = evenement
+                self.fins += 1
+                cle = (route, methode, statut)
+                self.requetes[cle] = self.requetes.get(cle, 0) + 1
+                histogramme = self.latences.get(route)
+                if histogramme is None:
+                    histogramme = self.latences[route] = Histogramme(BORNES_LATENCE)
+                histogramme.observer(duree)
+            else:
+                _, nb_matchs, nb_tours = evenement
+                self.matchs.observer(nb_matchs)
+                self.tours.observer(nb_tours)
+
+    def debut_requete(self):
+        self._enregistrer(None)
+
+    def fin_requete(self, route, methode, statut, duree):
+        self._enregistrer(('requete', route, methode, statut, duree))
+
+    def observer_planning(self, nb_matchs, nb_tours):
+        self._enregistrer(('planning', nb_matchs, nb_tours))
+
+    def exposer(self, caches=None, flux=None, taches=None):
+        """
+        Texte au format d'exposition Prometheus ; caches associe un nom de cache
+        à ses statistiques (voir CachePlannings.statistiques), flux donne celles
+        de la diffusion en direct (voir Diffuseur.statistiques) et taches le nombre
+        de tâches par état (voir FileTaches.statistiques)
+        """
+        with self._verrou:
+            self._agreger()
+            lignes = [
+                '# HELP rugby_requetes_total Requêtes HTTP traitées',
+                '# TYPE rugby_requetes_total counter'
+            ]
+            for (route, methode, statut), nombre in sorted(self.requetes.items()):
+                lignes.append(f'rugby_requetes_total{{route="{route}",methode="{methode}",'
+                              f'statut="{statut}"}} {nombre}')
+            lignes += [
+                '# HELP rugby_requete_duree_secondes Durée de traitement des requêtes par route',
+                '# TYPE rugby_requete_duree_secondes histogram'
+            ]
+            for route, histogramme in sorted(self.latences.items()):
+                lignes.extend(histogramme.lignes('rugby_requete_duree_secondes', f'route="{route}"'))
+            lignes += [
+                '# HELP rugby_requetes_en_cours Requêtes en cours de traitement',
+                '# TYPE rugby_requetes_en_cours gauge',
+                f'rugby_requetes_en_cours {self.debuts - self.fins}',
+                '# HELP rugby_planning_matchs Nombre de matchs des plannings générés',
+                '# TYPE rugby_planning_matchs histogram'
+            ]
+            lignes.extend(self.matchs.lignes('rugby_planning_matchs'))
+            lignes += [
+                '# HELP rugby_planning_tours Nombre de tours des plannings générés',
+                '# TYPE rugby_planning_tours histogram'
+            ]
+            lignes.extend(self.tours.lignes('rugby_planning_tours'))
+
+        for nom, statistiques in (caches or {}).items():
+            for cle, type_metrique in (('succes', 'counter'), ('echecs', 'counter'),
+                                       ('evictions', 'counter'), ('entrees', 'gauge'),
+                                       ('memoire', 'gauge'), ('taux_succes', 'gauge')):
+                if cle not in statistiques:
+                    continue
+                metrique = f'rugby_cache_{nom}_{cle}' + ('_total' if type_metrique == 'counter' else '')
+                lignes.append(f'# TYPE {metrique} {type_metrique}')
+                lignes.append(f'{metrique} {statistiques[cle]}')
+
+        if flux is not None:
+            lignes += [
+                '# HELP rugby_flux_canaux Tournois suivis en direct',
+                '# TYPE rugby_flux_canaux gauge',
+                f'rugby_flux_canaux {flux["canaux"]}',
+                '# HELP rugby_flux_abonnes Clients abonnés au direct (Server-Sent Events)',
+                '# TYPE rugby_flux_abonnes gauge',
+                f'rugby_flux_abonnes {flux["abonnes"]}'
+            ]
+        if taches is not None:
+            lignes += [
+                '# HELP rugby_exports_pdf Exports PDF asynchrones conservés, par état',
+                '# TYPE rugby_exports_pdf gauge'
+            ]
+            for etat, nombre in taches.items():
+                lignes.append(f'rugby_exports_pdf{{etat="{etat}"}} {nombre}')
+        return '\n'.join(lignes) + '\n'
+
+
+def configurer_journal(chemin, taille_max=5 * 1024 * 1024, nb_archives=3):
+    """
+    Écrit le journal des performances dans chemin, avec rotation par taille
+    """
+    gestionnaire = RotatingFileHandler(chemin, maxBytes=taille_max, backupCount=nb_archives,
+                                       encoding='utf-8', delay=True)
+    gestionnaire.setFormatter(logging.Formatter('%(message)s'))
+    journal.addHandler(gestionnaire)
+    journal.setLevel(logging.INFO)
+
+
+def journaliser(route, methode, statut, chronometre):
+    if not journal.isEnabledFor(logging.INFO):
+        return
+    journal.info(json.dumps({
+        "horodatage": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "route": route,
+        "methode": methode,
+        "statut": statut,
+        "duree_ms": round(chronometre.total() * 1000, 2),
+        "phases_ms": {nom: round(duree * 1000, 2) for nom, duree in chronometre.phases.items()}
+    }, ensure_ascii=False))
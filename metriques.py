@@ -0,0 +1,105 @@
+"""
+Indicateurs de qualité d'un planning.
+
+Les apparitions des équipes sont aplaties dans un tableau d'entiers (équipe, tour)
+trié une seule fois ; les écarts de repos et les séries de matchs enchaînés sont
+ensuite obtenus en quelques passages linéaires sur ce tableau (map, compress,
+groupby), sans dictionnaire par tour. Ces passages restent des boucles Python : le
+calcul n'est pas vectorisé, il évite seulement les structures intermédiaires.
+"""
+from array import array
+from itertools import compress, groupby
+from operator import eq, sub
+
+
+def borne_inferieure_tours(poules, nb_terrains):
+    """
+    Nombre minimal de tours, maximum de trois bornes :
+    - tournoi toutes-rondes de chaque poule (une poule impaire a une équipe au repos par tour) ;
+    - nombre de matchs d'une équipe inscrite dans plusieurs poules (un match par tour) ;
+    - total des matchs sur la capacité d'un tour, limitée par les terrains et par le
+      nombre de paires d'équipes disjointes que chaque poule peut aligner.
+    """
+    total = 0
+    borne = 0
+    paires = 0
+    matchs_equipe = {}
+    for poule in poules:
+        n = len(poule['equipes'])
+        if n < 2:
+            continue
+        total += n * (n - 1) // 2
+        paires += n // 2
+        borne = max(borne, n if n % 2 else n - 1)
+        for e in poule['equipes']:
+            matchs_equipe[e] = matchs_equipe.get(e, 0) + n - 1
+    if total == 0 or nb_terrains < 1:
+        return 0
+    capacite = min(nb_terrains, paires, len(matchs_equipe) // 2)
+    return max(borne, max(matchs_equipe.values()), -(-total // capacite))
+
+
+def calculer_metriques(planning, poules, nb_terrains):
+    nb_tours = len(planning)
+    pas = nb_tours + 2
+
+    index = {}
+    noms = []
+    apparitions = array('q')
+    nb_matchs = 0
+    occupation = array('q', bytes(8 * nb_terrains))
+    for tour in planning:
+        base = tour["tour"]
+        for terrain, match in enumerate(tour["matches"]):
+            if match is None:
+                continue
+            nb_matchs += 1
+            occupation[terrain] += 1
+            for e in (match['equipe1'], match['equipe2']):
+                i = index.get(e)
+                if i is None:
+                    i = index[e] = len(noms)
+                    noms.append(e)
+                apparitions.append(i * pas + base)
+
+    cles = array('q', sorted(apparitions))
+    equipes = array('q', (c // pas for c in cles))
+    tours = array('q', (c % pas for c in cles))
+
+    # Écart entre deux apparitions successives, gardé seulement au sein d'une même équipe
+    meme_equipe = list(map(eq, equipes[1:], equipes[:-1]))
+    ecarts = list(map(sub, tours[1:], tours[:-1]))
+    repos = array('q', (e - 1 for e in compress(ecarts, meme_equipe)))
+    equipes_repos = array('q', compress(equipes[1:], meme_equipe))
+
+    par_equipe = {nom: {"matchs": 0, "repos_min": None, "repos_moyen": None, "serie_max": 1}
+                  for nom in noms}
+    for i, groupe in groupby(equipes):
+        par_equipe[noms[i]]["matchs"] = sum(1 for _ in groupe)
+
+    position = 0
+    for i, groupe in groupby(equipes_repos):
+        n = sum(1 for _ in groupe)
+        tranche = repos[position:position + n]
+        position += n
+        stats = par_equipe[noms[i]]
+        stats["repos_min"] = min(tranche)
+        stats["repos_moyen"] = round(sum(tranche) / n, 2)
+        # Plus longue suite de repos nuls = plus longue série de matchs enchaînés - 1
+        stats["serie_max"] = 1 + max((sum(1 for _ in g) for nul, g in groupby(tranche, (0).__eq__) if nul),
+                                     default=0)
+
+    emplacements = nb_tours * nb_terrains
+    borne = borne_inferieure_tours(poules, nb_terrains)
+    return {
+        "nb_matchs": nb_matchs,
+        "repos_min": min(repos) if repos else None,
+        "repos_moyen": round(sum(repos) / len(repos), 2) if repos else None,
+        "serie_max": max((s["serie_max"] for s in par_equipe.values()), default=0),
+        "emplacements_vides": emplacements - nb_matchs,
+        "utilisation_terrains": round(nb_matchs / emplacements, 4) if emplacements else 0.0,
+        "utilisation_par_terrain": [round(n / nb_tours, 4) if nb_tours else 0.0 for n in occupation],
+        "borne_inferieure": borne,
+        "ecart_borne": nb_tours - borne,
+        "equipes": par_equipe
+    }
@@ -0,0 +1,169 @@
+"""
+Retouche d'un planning existant quand une seule équipe est ajoutée ou retirée.
+
+Seuls les tours postérieurs aux tours figés (déjà joués) sont modifiés : les matchs
+déjà placés gardent leur tour et leur terrain, et seuls les matchs de l'équipe
+concernée sont placés ou retirés. Rien n'est replanifié, mais le travail reste
+linéaire en la taille du planning : un passage sur les tours, puis la vue par
+terrain, les métriques, l'éventuel calendrier et l'identifiant sont recalculés.
+Les résultats sont modifiés en place ; le cache des plannings en fournit une copie.
+"""
+import hashlib
+import json
+
+from bisect import insort
+
+from calendrier import placer_creneaux
+from contraintes import Contraintes
+from metriques import calculer_metriques
+from planificateur import transposer_terrains
+
+
+def _empreinte_contenu(poules, resultats):
+    """
+    Empreinte du planning retouché lui-même : les caches traitent l'identifiant comme
+    une empreinte de contenu, et une même retouche donne des plannings différents
+    selon les tours figés
+    """
+    contenu = {cle: valeur for cle, valeur in resultats.items() if cle != "id_planning"}
+    texte = json.dumps({"poules": poules, "resultats": contenu}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+def _trouver_poule(poules, nom_poule):
+    for poule in poules:
+        if poule['nom'] == nom_poule:
+            return poule
+    raise ValueError(f"Poule inconnue : {nom_poule}")
+
+
+def _finaliser(poules, resultats, planning, nb_terrains):
+    while planning and all(m is None for m in planning[-1]["matches"]):
+        planning.pop()
+    resultats["terrains"] = transposer_terrains(planning, nb_terrains)
+    resultats["nb_tours"] = len(planning)
+    resultats["metriques"] = calculer_metriques(planning, poules, nb_terrains)
+    if "calendrier" in resultats:
+        resultats["calendrier"] = placer_creneaux(planning, nb_terrains, resultats["calendrier"]["options"])
+    resultats["id_planning"] = _empreinte_contenu(poules, resultats)
+    return resultats
+
+
+def ajouter_equipe(poules, resultats, nom_poule, equipe, tours_figes=0):
+    """
+    Ajoute une équipe à une poule et place ses matchs dans les terrains libres
+    des tours non figés, puis dans de nouveaux tours si nécessaire
+    """
+    poule = _trouver_poule(poules, nom_poule)
+    if equipe in poule['equipes']:
+        raise ValueError(f"L'équipe {equipe} est déjà dans la poule {nom_poule}")
+    adversaires = list(poule['equipes'])
+    poule['equipes'].append(equipe)
+
+    planning = resultats["planning"]
+    nb_terrains = len(resultats["terrains"])
+    regles = Contraintes(resultats.get("contraintes"))
+    tours_equipe = {e: [] for e in poule['equipes']}
+    for tour in planning:
+        for match in tour["matches"]:
+            if match is not None and match['poule'] == nom_poule:
+                tours_equipe[match['equipe1']].append(tour["tour"])
+                tours_equipe[match['equipe2']].append(tour["tour"])
+
+    def autorise(adversaire, numero):
+        return (regles.respecte(equipe, tours_equipe[equipe], numero)
+                and regles.respecte(adversaire, tours_equipe[adversaire], numero))
+
+    def placer(adversaire, numero):
+        insort(tours_equipe[equipe], numero)
+        insort(tours_equipe[adversaire], numero)
+
+    # Une poule qui n'avait qu'une équipe n'apparaissait pas encore dans le planning
+    arrivees = [equipe] if len(adversaires) != 1 else [equipe, adversaires[0]]
+    for tour in planning:
+        for e in arrivees:
+            if e not in tour["repos"]:
+                tour["repos"].append(e)
+
+    for tour in planning[tours_figes:]:
+        if not adversaires:
+            break
+        matchs = tour["matches"]
+        if None not in matchs:
+            continue
+        occupees = set()
+        for match in matchs:
+            if match is not None:
+                occupees.add(match['equipe1'])
+                occupees.add(match['equipe2'])
+        for i, adversaire in enumerate(adversaires):
+            if adversaire not in occupees and autorise(adversaire, tour["tour"]):
+                placer(adversaire, tour["tour"])
+                matchs[matchs.index(None)] = {'equipe1': adversaire, 'equipe2': equipe, 'poule': nom_poule}
+                del adversaires[i]
+                tour["repos"].remove(adversaire)
+                tour["repos"].remove(equipe)
+                break
+
+    # Les matchs qui n'ont pas trouvé de place ouvrent chacun un nouveau tour
+    toutes_les_equipes = []
+    if adversaires:
+        vues = set()
+        for p in poules:
+            if len(p['equipes']) < 2:
+                continue
+            for e in p['equipes']:
+                if e not in vues:
+                    vues.add(e)
+                    toutes_les_equipes.append(e)
+    for adversaire in adversaires:
+        # Des tours vides sont intercalés tant qu'une contrainte interdit le match
+        while not autorise(adversaire, len(planning) + 1):
+            planning.append({
+                "tour": len(planning) + 1,
+                "matches": [None] * nb_terrains,
+                "repos": list(toutes_les_equipes)
+            })
+        placer(adversaire, len(planning) + 1)
+        matchs = [{'equipe1': adversaire, 'equipe2': equipe, 'poule': nom_poule}]
+        matchs.extend([None] * (nb_terrains - 1))
+        planning.append({
+            "tour": len(planning) + 1,
+            "matches": matchs,
+            "repos": [e for e in toutes_les_equipes if e != adversaire and e != equipe]
+        })
+
+    return poules, _finaliser(poules, resultats, planning, nb_terrains)
+
+
+def retirer_equipe(poules, resultats, nom_poule, equipe, tours_figes=0):
+    """
+    Retire une équipe d'une poule et libère ses terrains dans les tours non figés
+    """
+    poule = _trouver_poule(poules, nom_poule)
+    if equipe not in poule['equipes']:
+        raise ValueError(f"L'équipe {equipe} n'est pas dans la poule {nom_poule}")
+    poule['equipes'].remove(equipe)
+
+    planning = resultats["planning"]
+    nb_terrains = len(resultats["terrains"])
+
+    for tour in planning[tours_figes:]:
+        matchs = tour["matches"]
+        for i, match in enumerate(matchs):
+            if match is None or match['poule'] != nom_poule:
+                continue
+            if match['equipe1'] == equipe:
+                adversaire = match['equipe2']
+            elif match['equipe2'] == equipe:
+                adversaire = match['equipe1']
+            else:
+                continue
+            matchs[i] = None
+            tour["repos"].append(adversaire)
+        if equipe in tour["repos"]:
+            tour["repos"].remove(equipe)
+        if len(poule['equipes']) == 1 and poule['equipes'][0] in tour["repos"]:
+            tour["repos"].remove(poule['equipes'][0])
+
+    return poules, _finaliser(poules, resultats, planning, nb_terrains)
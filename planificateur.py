@@ -0,0 +1,646 @@
+"""
+Moteur de planification des matchs de poule.
+
+Trois stratégies sont disponibles :
+- "glouton" : à chaque tour, les équipes les plus reposées affrontent en priorité
+  leurs adversaires restants les plus reposés (matchs restants rangés par équipe) ;
+- "cercle" : chaque poule est construite par la méthode du cercle (table de
+  Berger), puis les rondes des poules sont entrelacées sur les terrains ;
+- "couplage" : le glouton, dont chaque tour incomplet est agrandi en couplage de
+  cardinalité maximale sur le graphe des matchs restants, pour remplir les terrains.
+  Remplir un tour n'assure pas d'en économiser : avec des poules très inégales, les
+  équipes ajoutées peuvent manquer plus tard et coûter un tour. Le planning agrandi
+  n'est donc gardé que s'il n'a pas plus de tours que le glouton de même graine ; le
+  glouton n'est calculé que si le planning agrandi n'atteint pas la borne inférieure,
+  et abandonné dès qu'il atteint sa longueur. Ce choix portant sur la longueur totale,
+  "couplage" calcule tous ses tours avant le premier et ne se diffuse pas au fil de
+  l'eau : la page et /generer_matchs_flux passent par la génération complète.
+
+Le tirage est entièrement déterminé par une graine : la même configuration et la
+même graine donnent toujours le même planning, identifié par son empreinte.
+"""
+import hashlib
+import heapq
+import json
+import random
+from array import array
+from collections import deque
+
+from calendrier import placer_creneaux, valider_options
+from contraintes import Contraintes, MasquesContraintes
+from couplage import augmenter_couplage
+from mesures import phase
+from metriques import borne_inferieure_tours, calculer_metriques
+
+# Au-delà de ce nombre d'adversaires restants, on cherche d'abord dans la tête de chaîne
+_ADVERSAIRES_PARCOURUS = 32
+
+
+class Tournoi:
+    """
+    Forme compacte d'un tournoi : équipes et poules sont internées en entiers et les
+    rencontres tiennent dans trois tableaux parallèles (équipe 1, équipe 2, poule).
+
+    Les noms ne sont retrouvés qu'à la sortie du moteur, pour le JSON et le PDF.
+    """
+    __slots__ = ('noms_equipes', 'noms_poules', 'equipes_poule', 'debut_poule',
+                 'equipe1', 'equipe2', 'poule')
+
+    def __init__(self, poules):
+        self.noms_equipes = []
+        self.noms_poules = []
+        self.equipes_poule = []
+        self.debut_poule = array('i')
+        self.equipe1 = array('i')
+        self.equipe2 = array('i')
+        self.poule = array('i')
+        index = {}
+
+        for poule in poules:
+            noms = poule['equipes']
+            if len(noms) < 2:
+                continue
+            ids = []
+            for nom in noms:
+                i = index.get(nom)
+                if i is None:
+                    i = index[nom] = len(self.noms_equipes)
+                    self.noms_equipes.append(nom)
+                ids.append(i)
+
+            p = len(self.noms_poules)
+            self.noms_poules.append(poule['nom'])
+            self.equipes_poule.append(ids)
+            self.debut_poule.append(len(self.equipe1))
+            for i in range(len(ids)):
+                for j in range(i + 1, len(ids)):
+                    self.equipe1.append(ids[i])
+                    self.equipe2.append(ids[j])
+                    self.poule.append(p)
+
+    def __len__(self):
+        return len(self.equipe1)
+
+    def index_match(self, p, i, j):
+        """
+        Indice de la rencontre entre les i-ème et j-ème équipes (i < j) de la poule p
+        """
+        n = len(self.equipes_poule[p])
+        return self.debut_poule[p] + i * (2 * n - i - 1) // 2 + (j - i - 1)
+
+
+def iterer_tours_glouton(tournoi, nb_terrains, rng, contraintes=None, couplage=False):
+    """
+    Remplit les tours un par un en donnant la priorité aux équipes les plus reposées,
+    et fournit chaque tour (liste d'indices de matchs) dès qu'il est fixé.
+
+    Chaque match choisi est celui dont les deux équipes cumulent le plus de repos.
+    Les équipes actives forment une liste chaînée rangée du dernier tour joué le plus
+    ancien au plus récent, et chacune garde ses matchs restants rangés par adversaire :
+    le meilleur adversaire libre d'une équipe est le premier de ses adversaires restants
+    rencontré dans la chaîne, et l'examen des équipes s'arrête dès qu'aucune ne peut
+    plus faire mieux. Seules les équipes qui viennent de jouer changent de place (elles
+    passent en queue), les matchs ne sont jamais reclassés : le coût ne dépend plus du
+    nombre de matchs restants à chaque tour.
+
+    Les équipes interdites par une contrainte sont sorties de la chaîne pour le tour ;
+    un tour peut rester vide quand les contraintes bloquent tous les matchs restants.
+
+    Avec couplage=True, un tour qui laisse des terrains vides est complété par chemins
+    augmentants jusqu'à un couplage de cardinalité maximale (voir couplage.py).
+    """
+    equipe1, equipe2 = tournoi.equipe1, tournoi.equipe2
+    nb_equipes = len(tournoi.noms_equipes)
+    dernier_tour = array('i', [-10]) * nb_equipes
+    # adversaires[e] : adversaire -> indices des matchs restants contre lui
+    adversaires = [{} for _ in range(nb_equipes)]
+    for i, (e1, e2) in enumerate(zip(equipe1, equipe2)):
+        adversaires[e1].setdefault(e2, []).append(i)
+        adversaires[e2].setdefault(e1, []).append(i)
+    actives = 0
+    for e in range(nb_equipes):
+        if adversaires[e]:
+            actives |= 1 << e
+    masques = MasquesContraintes(contraintes, tournoi.noms_equipes)
+
+    # Liste circulaire doublement chaînée ; le nœud nb_equipes sert de sentinelle
+    chaine = _Chaine(nb_equipes)
+    suivant, presente, fin = chaine.suivant, chaine.presente, chaine.fin
+    initiales = list(_bits(actives))
+    rng.shuffle(initiales)
+    for e in initiales:
+        chaine.ajouter(e)
+
+    tour = 0
+    tours_vides = 0
+    nb_restants = len(tournoi)
+    while nb_restants:
+        tour += 1
+        interdits = masques.interdits(tour)
+        for e in _bits(interdits & actives):
+            chaine.retirer(e)
+
+        # Candidats (repos cumulé, rang, équipe, meilleur adversaire) des équipes déjà
+        # examinées ; la frontière n'avance que tant qu'une équipe suivante peut faire mieux
+        candidats = []
+        frontiere = suivant[fin]
+        matchs_tour = []
+        while len(matchs_tour) < nb_terrains:
+            while frontiere != fin:
+                tete = suivant[fin]
+                if tete == fin or (candidats and
+                                   dernier_tour[frontiere] + dernier_tour[tete] >= candidats[0][0]):
+                    break
+                a, frontiere = frontiere, suivant[frontiere]
+                if presente[a]:
+                    _examiner(chaine, candidats, adversaires[a], a, dernier_tour)
+            if not candidats:
+                break
+            _, _, a, b = heapq.heappop(candidats)
+            if not presente[a]:
+                continue
+            if not presente[b]:
+                # Adversaire pris entre-temps : le suivant ne peut être que moins reposé
+                _examiner(chaine, candidats, adversaires[a], a, dernier_tour)
+                continue
+            chaine.retirer(a)
+            chaine.retirer(b)
+            matchs_tour.append(adversaires[a][b][0])
+
+        if couplage and len(matchs_tour) < nb_terrains:
+            matchs_tour = _completer_couplage(tournoi, matchs_tour, actives & ~interdits,
+                                              adversaires, nb_terrains)
+        chaine.restaurer()
+
+        joueurs = []
+        for i in matchs_tour:
+            e1, e2 = equipe1[i], equipe2[i]
+            joueurs += (e1, e2)
+            dernier_tour[e1] = dernier_tour[e2] = tour
+            for e, autre in ((e1, e2), (e2, e1)):
+                matchs = adversaires[e][autre]
+                matchs.remove(i)
+                if not matchs:
+                    del adversaires[e][autre]
+        # Les équipes qui viennent de jouer passent en queue, départagées au hasard
+        rng.shuffle(joueurs)
+        masque_joueurs = 0
+        for e in joueurs:
+            masque_joueurs |= 1 << e
+            chaine.retirer(e)
+            if adversaires[e]:
+                chaine.ajouter(e)
+            else:
+                actives &= ~(1 << e)
+        chaine.oublier()
+        nb_restants -= len(matchs_tour)
+        masques.jouer(masque_joueurs)
+
+        if not matchs_tour:
+            tours_vides += 1
+            if masques.peut_attendre(tour, tours_vides):
+                yield matchs_tour
+                continue
+            break
+        tours_vides = 0
+        yield matchs_tour
+
+
+class _Chaine:
+    """
+    Équipes chaînées par priorité, avec retraits annulables en fin de tour
+    """
+    __slots__ = ('fin', 'suivant', 'precedent', 'rang', 'presente', 'retraits', 'compteur')
+
+    def __init__(self, nb_equipes):
+        self.fin = nb_equipes
+        self.suivant = array('i', [nb_equipes]) * (nb_equipes + 1)
+        self.precedent = array('i', [nb_equipes]) * (nb_equipes + 1)
+        self.rang = array('q', bytes(8 * nb_equipes))
+        self.presente = bytearray(nb_equipes)
+        self.retraits = []
+        self.compteur = 0
+
+    def premier(self):
+        return self.suivant[self.fin]
+
+    def ajouter(self, e):
+        dernier = self.precedent[self.fin]
+        self.suivant[dernier] = e
+        self.precedent[e] = dernier
+        self.suivant[e] = self.fin
+        self.precedent[self.fin] = e
+        self.rang[e] = self.compteur
+        self.compteur += 1
+        self.presente[e] = 1
+
+    def retirer(self, e):
+        if not self.presente[e]:
+            return
+        self.suivant[self.precedent[e]] = self.suivant[e]
+        self.precedent[self.suivant[e]] = self.precedent[e]
+        self.presente[e] = 0
+        self.retraits.append(e)
+
+    def restaurer(self):
+        # Réinsertion dans l'ordre inverse des retraits : chaque équipe retrouve sa place
+        for e in reversed(self.retraits):
+            self.suivant[self.precedent[e]] = e
+            self.precedent[self.suivant[e]] = e
+            self.presente[e] = 1
+        self.retraits.clear()
+
+    def oublier(self):
+        self.retraits.clear()
+
+
+def _examiner(chaine, candidats, restants, a, dernier_tour):
+    b = _adversaire_libre(chaine, restants, a)
+    if b < 0:
+        # Plus aucun adversaire libre ce tour-ci
+        chaine.retirer(a)
+    else:
+        heapq.heappush(candidats, (dernier_tour[a] + dernier_tour[b], chaine.rang[a], a, b))
+
+
+def _adversaire_libre(chaine, restants, a):
+    """
+    Adversaire restant de a le plus tôt dans la chaîne, ou -1 ; avec beaucoup
+    d'adversaires restants la chaîne est d'abord parcourue sur quelques maillons
+    """
+    if len(restants) > _ADVERSAIRES_PARCOURUS:
+        b = chaine.premier()
+        for _ in range(_ADVERSAIRES_PARCOURUS):
+            if b == chaine.fin:
+                return -1
+            if b != a and b in restants:
+                return b
+            b = chaine.suivant[b]
+    presente, rang = chaine.presente, chaine.rang
+    meilleur, rang_meilleur = -1, -1
+    for b in restants:
+        if presente[b] and (meilleur < 0 or rang[b] < rang_meilleur):
+            meilleur, rang_meilleur = b, rang[b]
+    return meilleur
+
+
+def _bits(masque):
+    while masque:
+        bas = masque & -masque
+        yield bas.bit_length() - 1
+        masque ^= bas
+
+
+def _completer_couplage(tournoi, matchs_tour, disponibles, adversaires, nb_terrains):
+    """
+    Agrandit la sélection gloutonne d'un tour sur le graphe des matchs restants entre
+    équipes disponibles ; les équipes déjà retenues restent sur le terrain.
+    """
+    equipe1, equipe2 = tournoi.equipe1, tournoi.equipe2
+    sommets = list(_bits(disponibles))
+    local = {e: k for k, e in enumerate(sommets)}
+    voisins = [[] for _ in sommets]
+    arete = {}
+    for k, e in enumerate(sommets):
+        for autre, matchs in adversaires[e].items():
+            j = local.get(autre)
+            if j is not None and k < j:
+                arete[(k, j)] = matchs[0]
+                voisins[k].append(j)
+                voisins[j].append(k)
+
+    partenaire = [-1] * len(sommets)
+    for i in matchs_tour:
+        a, b = local[equipe1[i]], local[equipe2[i]]
+        partenaire[a], partenaire[b] = b, a
+    augmenter_couplage(voisins, partenaire, nb_terrains)
+
+    # Les matchs déjà choisis gardent leur ordre, les nouveaux viennent à la suite
+    retenus = [i for i in matchs_tour
+               if partenaire[local[equipe1[i]]] == local[equipe2[i]]]
+    for k, j in enumerate(partenaire):
+        if k < j:
+            i = arete[(k, j)]
+            if i not in retenus:
+                retenus.append(i)
+    return retenus
+
+
+def planifier_glouton(tournoi, nb_terrains, rng, contraintes=None, couplage=False):
+    return list(iterer_tours_glouton(tournoi, nb_terrains, rng, contraintes, couplage))
+
+
+def rondes_berger(n):
+    """
+    Découpe le tournoi toutes-rondes d'une poule de n équipes en rondes par la méthode du cercle.
+
+    Les équipes sont désignées par leur position dans la poule. La première reste fixe
+    pendant que les autres tournent d'un cran à chaque ronde ; une place vide est
+    ajoutée quand le nombre d'équipes est impair.
+    """
+    liste = list(range(n))
+    if n % 2:
+        liste.append(None)
+    n = len(liste)
+
+    fixe, tournantes = liste[0], deque(liste[1:])
+    rondes = []
+    for _ in range(n - 1):
+        cercle = [fixe] + list(tournantes)
+        ronde = []
+        for i in range(n // 2):
+            a, b = cercle[i], cercle[n - 1 - i]
+            if a is not None and b is not None:
+                ronde.append((min(a, b), max(a, b)))
+        rondes.append(ronde)
+        tournantes.rotate(1)
+
+    return rondes
+
+
+def iterer_tours_cercle(tournoi, nb_terrains, contraintes=None):
+    """
+    Entrelace les rondes de Berger de chaque poule sur les terrains disponibles.
+
+    Chaque poule avance dans ses rondes dans l'ordre ; les terrains d'un tour sont
+    distribués à tour de rôle entre les poules pour qu'aucune ne prenne de retard.
+    Une poule dont le prochain match est bloqué par une contrainte attend le tour suivant.
+    """
+    files = []
+    for p, ids in enumerate(tournoi.equipes_poule):
+        rondes = deque()
+        for ronde in rondes_berger(len(ids)):
+            rondes.append(deque(tournoi.index_match(p, i, j) for i, j in ronde))
+        files.append(rondes)
+    masques = MasquesContraintes(contraintes, tournoi.noms_equipes)
+
+    tour = 0
+    tours_vides = 0
+    while files:
+        tour += 1
+        matchs_tour = []
+        occupees = masques.interdits(tour)
+        joueurs = 0
+        decalage = (tour - 1) % len(files)
+        ordre = files[decalage:] + files[:decalage]
+
+        progression = True
+        while progression and len(matchs_tour) < nb_terrains:
+            progression = False
+            for rondes in ordre:
+                if len(matchs_tour) == nb_terrains:
+                    break
+                i = _prochain_match(tournoi, rondes, occupees)
+                if i is not None:
+                    masque = (1 << tournoi.equipe1[i]) | (1 << tournoi.equipe2[i])
+                    matchs_tour.append(i)
+                    occupees |= masque
+                    joueurs |= masque
+                    progression = True
+        masques.jouer(joueurs)
+
+        if not matchs_tour:
+            tours_vides += 1
+            if masques.peut_attendre(tour, tours_vides):
+                yield matchs_tour
+                continue
+            break
+        tours_vides = 0
+        yield matchs_tour
+        files = [rondes for rondes in files if rondes]
+
+
+def planifier_cercle(tournoi, nb_terrains, contraintes=None):
+    return list(iterer_tours_cercle(tournoi, nb_terrains, contraintes))
+
+
+def _prochain_match(tournoi, rondes, occupees):
+    if not rondes:
+        return None
+    ronde = rondes[0]
+    i = ronde[0]
+    if occupees >> tournoi.equipe1[i] & 1 or occupees >> tournoi.equipe2[i] & 1:
+        return None
+    ronde.popleft()
+    if not ronde:
+        rondes.popleft()
+    return i
+
+
+def iterer_planning_nomme(tournoi, tours, nb_terrains):
+    """
+    Traduit au fil de l'eau les tours d'indices de matchs en tours nommés,
+    complétés par des terrains vides
+    """
+    noms, noms_poules = tournoi.noms_equipes, tournoi.noms_poules
+    equipe1, equipe2, poule = tournoi.equipe1, tournoi.equipe2, tournoi.poule
+    occupee = bytearray(len(noms))
+
+    for numero, matchs_tour in enumerate(tours, start=1):
+        matchs = []
+        for i in matchs_tour:
+            occupee[equipe1[i]] = occupee[equipe2[i]] = 1
+            matchs.append({'equipe1': noms[equipe1[i]], 'equipe2': noms[equipe2[i]],
+                           'poule': noms_poules[poule[i]]})
+        yield {
+            "tour": numero,
+            "matches": matchs + [None] * (nb_terrains - len(matchs_tour)),
+            "repos": [nom for e, nom in enumerate(noms) if not occupee[e]]
+        }
+        for i in matchs_tour:
+            occupee[equipe1[i]] = occupee[equipe2[i]] = 0
+
+
+def construire_planning(tournoi, tours, nb_terrains):
+    return list(iterer_planning_nomme(tournoi, tours, nb_terrains))
+
+
+def transposer_terrains(planning, nb_terrains):
+    """
+    Construit la vue par terrain à partir du planning par tour
+    """
+    terrains = [[] for _ in range(nb_terrains)]
+    for tour in planning:
+        for i, match in enumerate(tour["matches"]):
+            terrains[i].append(match)
+
+    for terrain in terrains:
+        while terrain and terrain[-1] is None:
+            terrain.pop()
+
+    return terrains
+
+
+STRATEGIES = ('glouton', 'cercle', 'couplage')
+
+
+def _iterer_tours(tournoi, poules, nb_terrains, strategie, graine, regles):
+    if strategie == 'cercle':
+        return iterer_tours_cercle(tournoi, nb_terrains, regles)
+    if strategie == 'couplage':
+        # Le choix dépend de la longueur totale : le planning agrandi est calculé avant
+        # le premier tour, puis le glouton seulement tant qu'il peut être plus court
+        augmente = planifier_glouton(tournoi, nb_terrains, random.Random(graine), regles, couplage=True)
+        if len(augmente) <= borne_inferieure_tours(poules, nb_terrains):
+            return iter(augmente)
+        glouton = []
+        for tour in iterer_tours_glouton(tournoi, nb_terrains, random.Random(graine), regles):
+            glouton.append(tour)
+            if len(glouton) >= len(augmente):
+                return iter(augmente)
+        return iter(glouton)
+    return iterer_tours_glouton(tournoi, nb_terrains, random.Random(graine), regles)
+
+
+def empreinte_tournoi(poules, nb_terrains, strategie, graine=None, calendrier=None, contraintes=None):
+    """
+    Empreinte SHA-256 d'une forme canonique de la configuration du tournoi
+    """
+    canonique = {
+        "poules": [[poule['nom'], list(poule['equipes'])] for poule in poules],
+        "nbTerrains": nb_terrains,
+        "strategie": strategie,
+        "graine": graine
+    }
+    if calendrier is not None:
+        canonique["calendrier"] = calendrier
+    if contraintes:
+        canonique["contraintes"] = contraintes
+    texte = json.dumps(canonique, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+def valider_graine(graine):
+    """
+    Lève ValueError si la graine fournie n'est pas un entier
+    """
+    if graine is not None and (not isinstance(graine, int) or isinstance(graine, bool)):
+        raise ValueError("La graine doit être un entier")
+
+
+def graine_par_defaut(poules, nb_terrains, strategie):
+    """
+    Graine dérivée de la configuration, pour qu'un même tournoi donne un planning stable ;
+    "couplage" part du même tirage que "glouton", dont il ne diffère que par les tours agrandis
+    """
+    if strategie == 'couplage':
+        strategie = 'glouton'
+    return int(empreinte_tournoi(poules, nb_terrains, strategie)[:8], 16)
+
+
+def generer_matchs_optimise(poules, nb_terrains, strategie='glouton', graine=None, calendrier=None,
+                            contraintes=None):
+    """
+    Génère les matchs en optimisant les pauses entre matchs pour chaque équipe.
+    Avec des options de calendrier, chaque match reçoit aussi un terrain et un horaire ;
+    les contraintes dures (voir contraintes.py) sont respectées par construction.
+    """
+    if strategie not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {strategie}")
+    valider_graine(graine)
+    if graine is None:
+        graine = graine_par_defaut(poules, nb_terrains, strategie)
+
+    resultats = {
+        "strategie": strategie,
+        "graine": graine,
+        "id_planning": empreinte_tournoi(poules, nb_terrains, strategie, graine, calendrier, contraintes)
+    }
+    if calendrier is not None:
+        valider_options(calendrier)
+    if contraintes:
+        resultats["contraintes"] = contraintes
+        if calendrier is not None and contraintes.get('horaires_indisponibles'):
+            calendrier = dict(calendrier, indisponibilites=contraintes['horaires_indisponibles'])
+    regles = Contraintes(contraintes)
+    regles.verifier_taille(poules)
+
+    with phase('appariements'):
+        tournoi = Tournoi(poules)
+    if not len(tournoi):
+        resultats.update({"terrains": [[] for _ in range(nb_terrains)], "planning": [], "nb_tours": 0,
+                          "metriques": calculer_metriques([], poules, nb_terrains)})
+        return resultats
+
+    with phase('tours'):
+        tours = list(_iterer_tours(tournoi, poules, nb_terrains, strategie, graine, regles))
+    with phase('nommage'):
+        planning = construire_planning(tournoi, tours, nb_terrains)
+    _completer_resultats(resultats, planning, poules, nb_terrains)
+    if calendrier is not None:
+        with phase('calendrier'):
+            resultats["calendrier"] = placer_creneaux(planning, nb_terrains, calendrier)
+    return resultats
+
+
+def _completer_resultats(resultats, planning, poules, nb_terrains):
+    with phase('terrains'):
+        terrains = transposer_terrains(planning, nb_terrains)
+    with phase('metriques'):
+        metriques = calculer_metriques(planning, poules, nb_terrains)
+
+    resultats.update({
+        "terrains": terrains,
+        "planning": planning,
+        "nb_tours": len(planning),
+        "metriques": metriques
+    })
+    return resultats
+
+
+def assembler_planning_diffuse(poules, entete, planning, contraintes=None):
+    """
+    Résultats complets, tels que les rend generer_matchs_optimise, d'un planning
+    reçu tour par tour depuis iterer_planning (en-tête et tours)
+    """
+    resultats = {
+        "strategie": entete["strategie"],
+        "graine": entete["graine"],
+        "id_planning": entete["id_planning"]
+    }
+    if contraintes:
+        resultats["contraintes"] = contraintes
+    return _completer_resultats(resultats, planning, poules, entete["nb_terrains"])
+
+
+def iterer_planning(poules, nb_terrains, strategie='glouton', graine=None, contraintes=None):
+    """
+    Version au fil de l'eau de generer_matchs_optimise : un en-tête, puis chaque tour
+    dès qu'il est fixé, puis un bilan. Le planning complet n'est jamais conservé, sauf
+    pour "couplage" qui calcule tous ses tours avant le premier (voir plus haut).
+    """
+    if strategie not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {strategie}")
+    valider_graine(graine)
+    if graine is None:
+        graine = graine_par_defaut(poules, nb_terrains, strategie)
+    regles = Contraintes(contraintes)
+    regles.verifier_taille(poules)
+
+    yield {"entete": {
+        "strategie": strategie,
+        "graine": graine,
+        "id_planning": empreinte_tournoi(poules, nb_terrains, strategie, graine, contraintes=contraintes),
+        "nb_terrains": nb_terrains
+    }}
+
+    tournoi = Tournoi(poules)
+    tours = _iterer_tours(tournoi, poules, nb_terrains, strategie, graine, regles)
+
+    nb_tours = 0
+    for tour in iterer_planning_nomme(tournoi, tours, nb_terrains):
+        nb_tours += 1
+        yield tour
+
+    borne = borne_inferieure_tours(poules, nb_terrains)
+    yield {"fin": {"nb_tours": nb_tours, "borne_inferieure": borne, "ecart_borne": nb_tours - borne}}
+
+
+def comparer_strategies(poules, nb_terrains):
+    """
+    Retourne le nombre de tours utilisés par chaque stratégie
+    """
+    return {
+        strategie: generer_matchs_optimise(poules, nb_terrains, strategie)["nb_tours"]
+        for strategie in STRATEGIES
+    }
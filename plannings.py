@@ -0,0 +1,192 @@
+"""
+Cache en mémoire des plannings générés, indexés par leur identifiant.
+
+L'identifiant est l'empreinte canonique de la configuration (poules, équipes,
+nombre de terrains, stratégie, graine) : une configuration déjà vue, ou à laquelle
+on revient, est servie sans replanifier, et l'export PDF relit le planning affiché.
+Les plannings sont conservés déjà sérialisés, ce qui rend la mémoire occupée exacte
+et évite de resérialiser la réponse à chaque succès. Un planning diffusé tour par tour
+n'est conservé que sous forme de recette (poules, terrains, stratégie, graine,
+contraintes) : il est regénéré à l'identique à la première lecture. Les PDF rendus sont gardés de la
+même façon, sous l'empreinte du planning et de la version de mise en page, ainsi
+que les tableaux publics des tournois jusqu'à la prochaine écriture qui les modifie.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from mesures import phase
+from planificateur import generer_matchs_optimise
+
+
+def serialiser(valeur):
+    return json.dumps(valeur, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def regenerer(recette):
+    """
+    Regénère le planning décrit par une recette (poules, nbTerrains, strategie, graine,
+    contraintes) ; la graine le rend identique à celui diffusé
+    """
+    return generer_matchs_optimise(recette['poules'], recette['nbTerrains'], recette['strategie'],
+                                   recette['graine'], contraintes=recette['contraintes'])
+
+
+class CacheLRU:
+    """
+    Cache LRU borné en nombre d'entrées et en octets, avec compteurs de succès et d'échecs
+    """
+
+    def __init__(self, capacite, memoire_max):
+        self.capacite = capacite
+        self.memoire_max = memoire_max
+        self.memoire = 0
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def _inserer(self, cle, valeur, taille):
+        if taille > self.memoire_max:
+            return
+        with self._verrou:
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self.memoire -= ancienne[1]
+            self._entrees[cle] = (valeur, taille)
+            self.memoire += taille
+            while len(self._entrees) > self.capacite or self.memoire > self.memoire_max:
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self.memoire -= taille_evincee
+                self.evictions += 1
+
+    def _retirer(self, cle):
+        with self._verrou:
+            entree = self._entrees.pop(cle, None)
+            if entree is not None:
+                self.memoire -= entree[1]
+
+    def contient(self, cle):
+        """
+        Présence d'une entrée, sans compter de succès ni la rafraîchir
+        """
+        with self._verrou:
+            return cle in self._entrees
+
+    def _lire(self, cle):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[0]
+
+    def statistiques(self):
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                "entrees": len(self._entrees),
+                "memoire": self.memoire,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "taux_succes": self.succes / total if total else 0.0
+            }
+
+
+class CachePlannings(CacheLRU):
+    """
+    Plannings sérialisés (poules et résultats), indexés par leur identifiant
+    """
+
+    def __init__(self, capacite=256, memoire_max=64 * 1024 * 1024):
+        super().__init__(capacite, memoire_max)
+
+    def enregistrer(self, poules, resultats):
+        """
+        Conserve le planning et retourne son corps JSON
+        """
+        with phase('serialisation'):
+            corps = serialiser(resultats)
+            corps_poules = serialiser(poules)
+        self._inserer(resultats['id_planning'], (corps_poules, corps), len(corps) + len(corps_poules))
+        return corps
+
+    def enregistrer_recette(self, id_planning, recette):
+        """
+        Conserve seulement de quoi regénérer le planning, qui le sera à la première lecture
+        """
+        self._inserer(id_planning, (None, recette), len(serialiser(recette)))
+
+    def _developper(self, entree):
+        corps_poules, corps = entree
+        if corps_poules is None:
+            corps_poules = serialiser(corps['poules'])
+            corps = self.enregistrer(corps['poules'], regenerer(corps))
+        return corps_poules, corps
+
+    def corps(self, id_planning):
+        """
+        Retourne le corps JSON du planning, ou None s'il n'est pas (ou plus) en cache
+        """
+        entree = self._lire(id_planning)
+        return None if entree is None else self._developper(entree)[1]
+
+    def obtenir(self, id_planning):
+        """
+        Retourne le couple (poules, resultats) enregistré, ou None
+        """
+        entree = self._lire(id_planning)
+        if entree is None:
+            return None
+        corps_poules, corps = self._developper(entree)
+        return json.loads(corps_poules), json.loads(corps)
+
+
+class CacheDocuments(CacheLRU):
+    """
+    Documents déjà rendus (PDF), indexés par l'empreinte du planning et de la mise en page
+    """
+
+    def __init__(self, capacite=64, memoire_max=128 * 1024 * 1024):
+        super().__init__(capacite, memoire_max)
+
+    def enregistrer(self, cle, contenu):
+        self._inserer(cle, contenu, len(contenu))
+
+    def obtenir(self, cle):
+        return self._lire(cle)
+
+
+class CacheTableaux(CacheLRU):
+    """
+    Tableaux publics déjà sérialisés (ETag, corps), indexés par tournoi.
+
+    Chaque tournoi a une génération, incrémentée à chaque invalidation : un tableau
+    calculé pendant une écriture porte une génération dépassée et n'est pas conservé.
+    """
+
+    def __init__(self, capacite=512, memoire_max=32 * 1024 * 1024):
+        super().__init__(capacite, memoire_max)
+        self._generations = {}
+
+    def generation(self, cle):
+        with self._verrou:
+            return self._generations.get(cle, 0)
+
+    def invalider(self, cle):
+        with self._verrou:
+            self._generations[cle] = self._generations.get(cle, 0) + 1
+        self._retirer(cle)
+
+    def enregistrer(self, cle, generation, etag, corps):
+        self._inserer(cle, (etag, corps), len(corps))
+        # Invalidé entre le calcul et l'insertion : le tableau est déjà dépassé
+        if self.generation(cle) != generation:
+            self._retirer(cle)
+
+    def obtenir(self, cle):
+        return self._lire(cle)
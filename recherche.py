@@ -0,0 +1,135 @@
+"""
+Recherche multi-départs : plusieurs tirages gloutons sont évalués en parallèle
+sur tous les cœurs disponibles pendant un budget de temps, et le meilleur est gardé.
+
+L'objectif est lexicographique : le moins de tours possible, puis le plus grand
+repos minimal entre deux matchs d'une même équipe. Les processus ne renvoient que
+le score et la graine ; le planning gagnant est reconstruit à l'identique ensuite.
+La recherche s'arrête dès qu'un essai atteint la borne inférieure du nombre de tours,
+et le budget demandé est ramené à BUDGET_MAX_MS.
+
+Les processus sont lancés par forkserver (ou spawn), jamais par fork : le serveur
+Flask est multithread, et un fork copierait des verrous tenus par d'autres threads.
+Un essai encore en cours à l'échéance s'abandonne de lui-même entre deux tours, et
+au plus un essai par processus est en vol : une recherche suivante n'attend jamais
+derrière les essais périmés d'une précédente.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from metriques import borne_inferieure_tours
+from planificateur import (assembler_planning_diffuse, generer_matchs_optimise, graine_par_defaut, iterer_planning,
+                           valider_graine)
+
+# Budget accordé au plus à une recherche, quel que soit celui demandé
+BUDGET_MAX_MS = 30000
+
+_executeur = None
+_verrou_executeur = threading.Lock()
+
+
+def objectif(resultats):
+    """
+    Clé à minimiser : (nombre de tours, -repos minimal)
+    """
+    repos_min = resultats["metriques"]["repos_min"]
+    if repos_min is None:
+        repos_min = resultats["nb_tours"]
+    return (resultats["nb_tours"], -repos_min)
+
+
+def valider_budget(budget_ms):
+    """
+    Budget en millisecondes, entier positif ou nul, ramené à BUDGET_MAX_MS
+    """
+    if not isinstance(budget_ms, int) or isinstance(budget_ms, bool) or budget_ms < 0:
+        raise ValueError("Le budget doit être un nombre entier de millisecondes, positif ou nul")
+    return min(budget_ms, BUDGET_MAX_MS)
+
+
+def _essai(poules, nb_terrains, strategie, graine, contraintes=None, echeance=None):
+    """
+    Score (clé, graine) d'un tirage ; la clé vaut None si l'échéance, en temps
+    time.time() commun à tous les processus, passe avant le dernier tour
+    """
+    entete, planning = None, []
+    for element in iterer_planning(poules, nb_terrains, strategie, graine, contraintes):
+        if echeance is not None and time.time() >= echeance:
+            return None, graine
+        if 'entete' in element:
+            entete = element['entete']
+        elif 'fin' not in element:
+            planning.append(element)
+    resultats = assembler_planning_diffuse(poules, entete, planning, contraintes)
+    return objectif(resultats), graine
+
+
+def _obtenir_executeur():
+    global _executeur
+    with _verrou_executeur:
+        if _executeur is None:
+            methodes = multiprocessing.get_all_start_methods()
+            contexte = multiprocessing.get_context('forkserver' if 'forkserver' in methodes else 'spawn')
+            _executeur = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=contexte)
+    return _executeur
+
+
+def rechercher_multi_depart(poules, nb_terrains, strategie='glouton', graine=None,
+                            budget_ms=1000, nb_essais_max=10000, calendrier=None, contraintes=None):
+    """
+    Évalue des graines successives jusqu'à épuisement du budget et retourne le meilleur planning
+    """
+    budget_ms = valider_budget(budget_ms)
+    valider_graine(graine)
+    debut = time.perf_counter()
+    echeance = debut + budget_ms / 1000
+    echeance_murale = time.time() + budget_ms / 1000
+    if graine is None:
+        graine = graine_par_defaut(poules, nb_terrains, strategie)
+
+    # Le premier essai est fait sur place : il garantit un résultat même avec un budget nul
+    meilleur, meilleure_graine = _essai(poules, nb_terrains, strategie, graine, contraintes)
+    essais = 1
+    borne = borne_inferieure_tours(poules, nb_terrains)
+
+    if strategie != 'cercle' and meilleur[0] > borne:
+        executeur = _obtenir_executeur()
+        # Un essai en vol par processus : rien n'attend dans la file du pool
+        fenetre = os.cpu_count() or 1
+        en_cours = set()
+        prochaine = 1
+        while True:
+            while len(en_cours) < fenetre and prochaine < nb_essais_max and time.perf_counter() < echeance:
+                en_cours.add(executeur.submit(_essai, poules, nb_terrains, strategie, graine + prochaine,
+                                              contraintes, echeance_murale))
+                prochaine += 1
+            if not en_cours:
+                break
+            restant = echeance - time.perf_counter()
+            if restant <= 0:
+                break
+            terminees, en_cours = wait(en_cours, timeout=restant, return_when=FIRST_COMPLETED)
+            for future in terminees:
+                cle, graine_essai = future.result()
+                if cle is None:
+                    continue
+                essais += 1
+                if (cle, graine_essai) < (meilleur, meilleure_graine):
+                    meilleur, meilleure_graine = cle, graine_essai
+            if meilleur[0] <= borne:
+                break
+        for future in en_cours:
+            future.cancel()
+
+    resultats = generer_matchs_optimise(poules, nb_terrains, strategie, meilleure_graine, calendrier, contraintes)
+    resultats["recherche"] = {
+        "essais": essais,
+        "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+        "nb_tours": meilleur[0],
+        "repos_minimal": -meilleur[1],
+        "borne_atteinte": meilleur[0] <= borne
+    }
+    return resultats
@@ -0,0 +1,474 @@
+"""
+Export du planning au format PDF avec ReportLab : composition des poules, planning
+par tour, organisation par terrain et, si un calendrier a été demandé, horaires.
+
+Deux moteurs produisent la même présentation :
+- "tableaux" : un Table platypus par tour et par terrain, mis en page par ReportLab ;
+- "rapide" : les lignes sont dessinées directement sur le canevas à partir de
+  positions calculées une fois (colonnes, hauteurs, couleurs, textes tronqués et
+  leur position), chaque ligne de tableau en un seul objet texte. Il est choisi automatiquement au-delà
+  de SEUIL_RAPIDE lignes de tableau, là où la mise en page platypus devient lente et
+  gourmande en mémoire.
+"""
+import hashlib
+import io
+import time
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from mesures import marquer, phase
+
+# À incrémenter à chaque changement de présentation, pour invalider les PDF en cache
+VERSION_MISE_EN_PAGE = 3
+
+MOTEURS = ('tableaux', 'rapide')
+SEUIL_RAPIDE = 1500
+
+# Flux compressés écrits en binaire : sans l'extension C de ReportLab, leur encodage
+# ASCII85 en Python coûte plus cher que le dessin lui-même
+rl_config.useA85 = 0
+
+
+def empreinte_pdf(id_planning):
+    """
+    Clé de cache et ETag du PDF d'un planning ; l'identifiant du planning est déjà
+    une empreinte de son contenu
+    """
+    texte = f"{id_planning}:pdf:{VERSION_MISE_EN_PAGE}"
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+def _horaire(creneau):
+    """
+    Jour et heures d'un créneau : un calendrier peut s'étendre sur plusieurs journées
+    """
+    debut, fin = creneau['debut'], creneau['fin']
+    texte_fin = fin[11:16] if fin[:10] == debut[:10] else f"{fin[8:10]}/{fin[5:7]} {fin[11:16]}"
+    return f"{debut[8:10]}/{debut[5:7]} {debut[11:16]} - {texte_fin}"
+
+
+def nombre_lignes(resultats):
+    """
+    Nombre de lignes de tableau du document : une par terrain et par tour, deux fois
+    (vue par tour et vue par terrain), plus les horaires
+    """
+    lignes = 2 * sum(len(tour['matches']) for tour in resultats["planning"])
+    if resultats.get("calendrier"):
+        lignes += len(resultats["calendrier"]["creneaux"])
+    return lignes
+
+
+def rendre_pdf(poules, resultats, moteur=None):
+    """
+    Construit le document PDF du planning et retourne son contenu ; sans moteur
+    imposé, le moteur rapide est pris pour les grands tournois
+    """
+    if moteur is None:
+        moteur = 'rapide' if nombre_lignes(resultats) > SEUIL_RAPIDE else 'tableaux'
+    if moteur not in MOTEURS:
+        raise ValueError(f"Moteur PDF inconnu : {moteur}")
+    if moteur == 'rapide':
+        return rendre_pdf_rapide(poules, resultats)
+    return rendre_pdf_tableaux(poules, resultats)
+
+
+def rendre_pdf_tableaux(poules, resultats):
+    """
+    Moteur platypus : un Table par tour et par terrain
+    """
+    terrains = resultats["terrains"]
+    planning = resultats["planning"]
+    
+    debut_story = time.perf_counter()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+    elements = []
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2d5016'),
+        spaceAfter=30,
+        alignment=1
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#4a7c2e'),
+        spaceAfter=12
+    )
+    
+    # Titre principal
+    elements.append(Paragraph("🏉 Tournoi de Rugby - Planning des Matchs", title_style))
+    elements.append(Spacer(1, 0.5*cm))
+    
+    # Informations sur les poules
+    elements.append(Paragraph("Composition des poules", heading_style))
+    for poule in poules:
+        if poule['equipes']:
+            elements.append(Paragraph(f"<b>{poule['nom']}</b>: {', '.join(poule['equipes'])}", styles['Normal']))
+            elements.append(Spacer(1, 0.3*cm))
+    elements.append(Spacer(1, 0.7*cm))
+    
+    # Planning global par tour
+    elements.append(Paragraph("Planning des matchs (par tour)", heading_style))
+    for tour in planning:
+        elements.append(Spacer(1, 0.3*cm))
+        elements.append(Paragraph(f"<b>Tour {tour['tour']}</b>", styles['Heading3']))
+        
+        table_data = [['Terrain', 'Équipe 1', 'vs', 'Équipe 2', 'Poule']]
+        for i, match in enumerate(tour['matches'], start=1):
+            if match is None:
+                table_data.append([f"{i}", '-', '-', '-', 'Aucun match'])
+            else:
+                table_data.append([
+                    f"{i}",
+                    match['equipe1'],
+                    'vs',
+                    match['equipe2'],
+                    match['poule']
+                ])
+        
+        table = Table(table_data, colWidths=[2*cm, 5*cm, 1.5*cm, 5*cm, 4*cm])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5016')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')])
+        ]))
+        elements.append(table)
+
+        if tour['repos']:
+            elements.append(Spacer(1, 0.2*cm))
+            elements.append(Paragraph(f"Équipes au repos : <b>{', '.join(tour['repos'])}</b>", styles['Normal']))
+        else:
+            elements.append(Paragraph("Toutes les équipes jouent ce tour.", styles['Normal']))
+        elements.append(Spacer(1, 0.5*cm))
+    
+    elements.append(Spacer(1, 1*cm))
+    
+    # Répartition par terrain
+    elements.append(Paragraph("Organisation par terrain", heading_style))
+    for terrain_idx, terrain in enumerate(terrains):
+        elements.append(Spacer(1, 0.3*cm))
+        elements.append(Paragraph(f"<b>Terrain {terrain_idx + 1}</b>", styles['Heading3']))
+        
+        table_data = [['Match', 'Équipe 1', 'vs', 'Équipe 2', 'Poule']]
+        for match_idx, match in enumerate(terrain):
+            if match is None:
+                table_data.append([str(match_idx + 1), '-', '-', '-', 'Pas de match'])
+            else:
+                table_data.append([
+                    str(match_idx + 1),
+                    match['equipe1'],
+                    'vs',
+                    match['equipe2'],
+                    match['poule']
+                ])
+        
+        table = Table(table_data, colWidths=[2*cm, 5*cm, 1.5*cm, 5*cm, 4*cm])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5016')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')])
+        ]))
+        
+        elements.append(table)
+        elements.append(Spacer(1, 0.5*cm))
+    
+    # Horaires de coup d'envoi, quand un calendrier a été demandé
+    if resultats.get("calendrier"):
+        elements.append(Spacer(1, 1*cm))
+        elements.append(Paragraph("Horaires par terrain", heading_style))
+        for terrain_idx in range(len(terrains)):
+            creneaux = [c for c in resultats["calendrier"]["creneaux"] if c['terrain'] == terrain_idx + 1]
+            if not creneaux:
+                continue
+            elements.append(Spacer(1, 0.3*cm))
+            elements.append(Paragraph(f"<b>Terrain {terrain_idx + 1}</b>", styles['Heading3']))
+            
+            table_data = [['Horaire', 'Équipe 1', 'vs', 'Équipe 2', 'Poule']]
+            for creneau in creneaux:
+                table_data.append([
+                    _horaire(creneau),
+                    creneau['equipe1'],
+                    'vs',
+                    creneau['equipe2'],
+                    creneau['poule']
+                ])
+            
+            table = Table(table_data, colWidths=[4*cm, 4*cm, 1.5*cm, 4*cm, 4*cm])
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2d5016')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')])
+            ]))
+            elements.append(table)
+            elements.append(Spacer(1, 0.5*cm))
+    
+    marquer('story_pdf', debut_story)
+    with phase('rendu_pdf'):
+        doc.build(elements)
+    return buffer.getvalue()
+
+
+VERT_FONCE = colors.HexColor('#2d5016')
+VERT = colors.HexColor('#4a7c2e')
+VERT_CLAIR = colors.HexColor('#e8f5e9')
+LARGEUR_PAGE, HAUTEUR_PAGE = A4
+HAUT = HAUTEUR_PAGE - 2 * cm
+BAS = 2 * cm
+MARGE = 2.5 * cm
+HAUTEUR_ENTETE = 22
+HAUTEUR_LIGNE = 18
+TAILLE_TEXTE = 10
+
+
+class _Colonnes:
+    """
+    Géométrie d'un tableau calculée une fois : bords, centres et largeur utile des colonnes
+    """
+
+    def __init__(self, largeurs):
+        largeur = sum(largeurs)
+        x = (LARGEUR_PAGE - largeur) / 2
+        self.gauche = x
+        self.largeur = largeur
+        self.bords = []
+        self.centres = []
+        self.utiles = []
+        for l in largeurs:
+            self.bords.append(x)
+            self.centres.append(x + l / 2)
+            self.utiles.append(l - 6)
+            x += l
+        self.bords.append(x)
+
+
+COLONNES_MATCHS = _Colonnes([2*cm, 5*cm, 1.5*cm, 5*cm, 4*cm])
+COLONNES_HORAIRES = _Colonnes([4*cm, 4*cm, 1.5*cm, 4*cm, 4*cm])
+
+
+class _Feuille:
+    """
+    Curseur d'écriture sur le canevas : les pages pleines sont fermées au fil de l'eau,
+    et les largeurs et positions de texte sont mémorisées, un nom d'équipe revenant
+    à chaque tour
+    """
+
+    def __init__(self, toile):
+        self.toile = toile
+        self.y = HAUT
+        self._cellules = {}
+        self._largeurs = {}
+
+    def reserver(self, hauteur):
+        if self.y - hauteur < BAS:
+            self.toile.showPage()
+            self.y = HAUT
+            return True
+        return False
+
+    def espace(self, hauteur):
+        self.y -= hauteur
+
+    def titre(self, texte, police, taille, couleur, apres, centre=False):
+        self.reserver(taille + apres)
+        self.y -= taille
+        self.toile.setFont(police, taille)
+        self.toile.setFillColor(couleur)
+        if centre:
+            self.toile.drawCentredString(LARGEUR_PAGE / 2, self.y, texte)
+        else:
+            self.toile.drawString(MARGE, self.y, texte)
+        self.y -= apres
+
+    def _largeur(self, texte):
+        largeur = self._largeurs.get(texte)
+        if largeur is None:
+            largeur = self._largeurs[texte] = stringWidth(texte, 'Helvetica', TAILLE_TEXTE)
+        return largeur
+
+    def paragraphe(self, texte):
+        """
+        Texte coupé aux espaces sur la largeur utile de la page
+        """
+        limite = LARGEUR_PAGE - 2 * MARGE
+        espace = self._largeur(' ')
+        lignes = []
+        ligne, largeur = [], 0
+        for mot in texte.split(' '):
+            l = self._largeur(mot)
+            if ligne and largeur + espace + l > limite:
+                lignes.append(' '.join(ligne))
+                ligne, largeur = [], 0
+            largeur += l + (espace if ligne else 0)
+            ligne.append(mot)
+        lignes.append(' '.join(ligne))
+
+        self.toile.setFillColor(colors.black)
+        self.toile.setFont('Helvetica', TAILLE_TEXTE)
+        for ligne in lignes:
+            if self.reserver(TAILLE_TEXTE + 4):
+                self.toile.setFont('Helvetica', TAILLE_TEXTE)
+            self.y -= TAILLE_TEXTE + 2
+            self.toile.drawString(MARGE, self.y, ligne)
+            self.y -= 2
+
+    def _cellule(self, texte, colonne, colonnes):
+        """
+        Texte tronqué à la largeur de la colonne et abscisse qui le centre
+        """
+        cle = (texte, colonne, colonnes)
+        cellule = self._cellules.get(cle)
+        if cellule is None:
+            utile = colonnes.utiles[colonne]
+            ajuste = texte
+            if self._largeur(texte) > utile:
+                while ajuste and stringWidth(ajuste + '…', 'Helvetica', TAILLE_TEXTE) > utile:
+                    ajuste = ajuste[:-1]
+                ajuste += '…'
+            x = colonnes.centres[colonne] - stringWidth(ajuste, 'Helvetica', TAILLE_TEXTE) / 2
+            cellule = self._cellules[cle] = (ajuste, x)
+        return cellule
+
+    def _entete(self, colonnes, entete):
+        toile = self.toile
+        self.y -= HAUTEUR_ENTETE
+        toile.setFillColor(VERT_FONCE)
+        toile.rect(colonnes.gauche, self.y, colonnes.largeur, HAUTEUR_ENTETE, stroke=1, fill=1)
+        toile.setFillColor(colors.whitesmoke)
+        toile.setFont('Helvetica-Bold', 12)
+        for centre, texte in zip(colonnes.centres, entete):
+            toile.drawCentredString(centre, self.y + 7, texte)
+
+    def tableau(self, colonnes, entete, lignes):
+        """
+        Tableau à entête répétée en haut de chaque nouvelle page
+        """
+        toile = self.toile
+        self.reserver(HAUTEUR_ENTETE + HAUTEUR_LIGNE)
+        self._entete(colonnes, entete)
+        toile.setFont('Helvetica', TAILLE_TEXTE)
+        haut = self.y
+        for numero, ligne in enumerate(lignes):
+            if self.reserver(HAUTEUR_LIGNE):
+                self._entete(colonnes, entete)
+                toile.setFont('Helvetica', TAILLE_TEXTE)
+                haut = self.y
+            self.y -= HAUTEUR_LIGNE
+            toile.setFillColor(VERT_CLAIR if numero % 2 else colors.white)
+            toile.rect(colonnes.gauche, self.y, colonnes.largeur, HAUTEUR_LIGNE, stroke=1, fill=1)
+            objet = toile.beginText()
+            objet.setFont('Helvetica', TAILLE_TEXTE)
+            objet.setFillColor(colors.black)
+            for colonne, texte in enumerate(ligne):
+                ajuste, x = self._cellule(texte, colonne, colonnes)
+                objet.setTextOrigin(x, self.y + 5)
+                objet.textOut(ajuste)
+            toile.drawText(objet)
+            if self.y - HAUTEUR_LIGNE < BAS or numero == len(lignes) - 1:
+                toile.lines([(x, self.y, x, haut) for x in colonnes.bords[1:-1]])
+
+
+def _lignes_matchs(matchs, vide):
+    for i, match in enumerate(matchs, start=1):
+        if match is None:
+            yield (str(i), '-', '-', '-', vide)
+        else:
+            yield (str(i), match['equipe1'], 'vs', match['equipe2'], match['poule'])
+
+
+def rendre_pdf_rapide(poules, resultats):
+    """
+    Moteur canevas : même contenu que rendre_pdf_tableaux, dessiné sans platypus
+    """
+    debut_story = time.perf_counter()
+    buffer = io.BytesIO()
+    toile = Canvas(buffer, pagesize=A4, pageCompression=1)
+    toile.setLineWidth(1)
+    toile.setStrokeColor(colors.black)
+    feuille = _Feuille(toile)
+    entete_matchs = ('Terrain', 'Équipe 1', 'vs', 'Équipe 2', 'Poule')
+
+    feuille.titre("Tournoi de Rugby - Planning des Matchs", 'Helvetica-Bold', 24, VERT_FONCE, 30 + 0.5*cm,
+                  centre=True)
+
+    feuille.titre("Composition des poules", 'Helvetica-Bold', 16, VERT, 12)
+    for poule in poules:
+        if poule['equipes']:
+            feuille.paragraphe(f"{poule['nom']}: {', '.join(poule['equipes'])}")
+            feuille.espace(0.3*cm)
+    feuille.espace(0.7*cm)
+
+    feuille.titre("Planning des matchs (par tour)", 'Helvetica-Bold', 16, VERT, 12)
+    for tour in resultats["planning"]:
+        feuille.espace(0.3*cm)
+        feuille.titre(f"Tour {tour['tour']}", 'Helvetica-Bold', 14, colors.black, 6)
+        feuille.tableau(COLONNES_MATCHS, entete_matchs, list(_lignes_matchs(tour['matches'], 'Aucun match')))
+        feuille.espace(0.2*cm)
+        if tour['repos']:
+            feuille.paragraphe(f"Équipes au repos : {', '.join(tour['repos'])}")
+        else:
+            feuille.paragraphe("Toutes les équipes jouent ce tour.")
+        feuille.espace(0.5*cm)
+
+    feuille.espace(1*cm)
+    feuille.titre("Organisation par terrain", 'Helvetica-Bold', 16, VERT, 12)
+    for terrain_idx, terrain in enumerate(resultats["terrains"]):
+        feuille.espace(0.3*cm)
+        feuille.titre(f"Terrain {terrain_idx + 1}", 'Helvetica-Bold', 14, colors.black, 6)
+        feuille.tableau(COLONNES_MATCHS, ('Match',) + entete_matchs[1:],
+                        list(_lignes_matchs(terrain, 'Pas de match')))
+        feuille.espace(0.5*cm)
+
+    if resultats.get("calendrier"):
+        par_terrain = {}
+        for creneau in resultats["calendrier"]["creneaux"]:
+            par_terrain.setdefault(creneau['terrain'], []).append(creneau)
+        feuille.espace(1*cm)
+        feuille.titre("Horaires par terrain", 'Helvetica-Bold', 16, VERT, 12)
+        for terrain_idx in range(len(resultats["terrains"])):
+            creneaux = par_terrain.get(terrain_idx + 1)
+            if not creneaux:
+                continue
+            feuille.espace(0.3*cm)
+            feuille.titre(f"Terrain {terrain_idx + 1}", 'Helvetica-Bold', 14, colors.black, 6)
+            feuille.tableau(COLONNES_HORAIRES, ('Horaire',) + entete_matchs[1:], [
+                (_horaire(c), c['equipe1'], 'vs', c['equipe2'], c['poule'])
+                for c in creneaux
+            ])
+            feuille.espace(0.5*cm)
+
+    marquer('story_pdf', debut_story)
+    with phase('rendu_pdf'):
+        toile.save()
+    return buffer.getvalue()
@@ -0,0 +1,286 @@
+"""
+Persistance des tournois dans une base SQLite embarquée : poules, équipes, planning
+courant (matchs par tour et par terrain) et journal des scores.
+
+Le planning courant est gardé entier, pour le rendre tel quel, et match par match
+dans la table matchs : le tableau d'affichage y lit les prochains matchs dans l'ordre
+de la clé primaire (tour, terrain), sans relire tout le planning, qui sert aussi
+d'index (tournoi, tour). Le calendrier d'une équipe passe par les index (tournoi,
+equipe1) et (tournoi, equipe2). Un planning diffusé
+tour par tour n'est gardé entier que sous forme de recette, et ses matchs sont écrits
+par lots au fil de la diffusion.
+
+Les scores ne sont jamais modifiés sur place : chaque saisie, correction ou annulation
+est un événement ajouté au journal, qui sert aussi de trace d'audit. Un instantané
+compact des scores en vigueur est écrit tous les INTERVALLE_INSTANTANE événements ;
+après un arrêt, l'état se reconstruit depuis le dernier instantané et la fin du journal.
+
+La base est ouverte en mode WAL, ce qui laisse les lectures se poursuivre pendant une
+écriture ; chaque thread a sa propre connexion. Les requêtes sont des textes constants
+à paramètres, que le module sqlite3 garde compilés dans son cache de requêtes.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from plannings import serialiser
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournois (
+    id TEXT PRIMARY KEY,
+    cree TEXT NOT NULL,
+    nb_terrains INTEGER,
+    strategie TEXT,
+    id_planning TEXT,
+    planning BLOB
+);
+CREATE TABLE IF NOT EXISTS poules (
+    tournoi TEXT NOT NULL REFERENCES tournois(id) ON DELETE CASCADE,
+    nom TEXT NOT NULL,
+    rang INTEGER NOT NULL,
+    PRIMARY KEY (tournoi, nom)
+);
+CREATE TABLE IF NOT EXISTS equipes (
+    tournoi TEXT NOT NULL,
+    poule TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    rang INTEGER NOT NULL,
+    PRIMARY KEY (tournoi, poule, nom),
+    FOREIGN KEY (tournoi, poule) REFERENCES poules(tournoi, nom) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS equipes_tournoi_equipe ON equipes (tournoi, nom);
+CREATE TABLE IF NOT EXISTS matchs (
+    tournoi TEXT NOT NULL REFERENCES tournois(id) ON DELETE CASCADE,
+    tour INTEGER NOT NULL,
+    terrain INTEGER NOT NULL,
+    poule TEXT NOT NULL,
+    equipe1 TEXT NOT NULL,
+    equipe2 TEXT NOT NULL,
+    PRIMARY KEY (tournoi, tour, terrain)
+);
+CREATE INDEX IF NOT EXISTS matchs_tournoi_equipe1 ON matchs (tournoi, equipe1);
+CREATE INDEX IF NOT EXISTS matchs_tournoi_equipe2 ON matchs (tournoi, equipe2);
+CREATE TABLE IF NOT EXISTS evenements (
+    tournoi TEXT NOT NULL REFERENCES tournois(id) ON DELETE CASCADE,
+    numero INTEGER NOT NULL,
+    horodatage TEXT NOT NULL,
+    poule TEXT NOT NULL,
+    equipe1 TEXT NOT NULL,
+    equipe2 TEXT NOT NULL,
+    score1 INTEGER,
+    score2 INTEGER,
+    PRIMARY KEY (tournoi, numero)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS instantanes (
+    tournoi TEXT PRIMARY KEY REFERENCES tournois(id) ON DELETE CASCADE,
+    numero INTEGER NOT NULL,
+    scores BLOB NOT NULL
+);
+"""
+
+INTERVALLE_INSTANTANE = 100
+
+INSERER_TOURNOI = "INSERT INTO tournois (id, cree) VALUES (?, ?)"
+INSERER_POULE = "INSERT OR IGNORE INTO poules (tournoi, nom, rang) VALUES (?, ?, ?)"
+INSERER_EQUIPE = "INSERT OR IGNORE INTO equipes (tournoi, poule, nom, rang) VALUES (?, ?, ?, ?)"
+LIRE_TOURNOI = "SELECT nb_terrains, strategie, id_planning FROM tournois WHERE id = ?"
+LIRE_EQUIPES = """
+SELECT p.nom, e.nom FROM poules p LEFT JOIN equipes e ON e.tournoi = p.tournoi AND e.poule = p.nom
+WHERE p.tournoi = ? ORDER BY p.rang, e.rang
+"""
+RANG_SUIVANT = "SELECT COALESCE(MAX(rang) + 1, 0) FROM {table} WHERE tournoi = ?"
+ECRIRE_PLANNING = "UPDATE tournois SET nb_terrains = ?, strategie = ?, id_planning = ?, planning = ? WHERE id = ?"
+LIRE_PLANNING = "SELECT planning FROM tournois WHERE id = ?"
+EFFACER_MATCHS = "DELETE FROM matchs WHERE tournoi = ?"
+INSERER_MATCH = "INSERT INTO matchs (tournoi, tour, terrain, poule, equipe1, equipe2) VALUES (?, ?, ?, ?, ?, ?)"
+LIRE_MATCHS = "SELECT tour, terrain, poule, equipe1, equipe2 FROM matchs WHERE tournoi = ? ORDER BY tour, terrain"
+LIRE_MATCHS_EQUIPE = """
+SELECT tour, terrain, poule, equipe1, equipe2 FROM matchs WHERE tournoi = ? AND equipe1 = ?
+UNION ALL
+SELECT tour, terrain, poule, equipe1, equipe2 FROM matchs WHERE tournoi = ? AND equipe2 = ?
+"""
+INSERER_EVENEMENT = """
+INSERT INTO evenements (tournoi, numero, horodatage, poule, equipe1, equipe2, score1, score2)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+LIRE_EVENEMENTS = """
+SELECT numero, poule, equipe1, equipe2, score1, score2 FROM evenements
+WHERE tournoi = ? AND numero > ? ORDER BY numero
+"""
+LIRE_JOURNAL = """
+SELECT numero, horodatage, poule, equipe1, equipe2, score1, score2 FROM evenements
+WHERE tournoi = ? AND numero > ? ORDER BY numero LIMIT ?
+"""
+ECRIRE_INSTANTANE = """
+INSERT INTO instantanes (tournoi, numero, scores) VALUES (?, ?, ?)
+ON CONFLICT (tournoi) DO UPDATE SET numero = excluded.numero, scores = excluded.scores
+WHERE excluded.numero > instantanes.numero
+"""
+LIRE_INSTANTANE = "SELECT numero, scores FROM instantanes WHERE tournoi = ?"
+
+
+class Stockage:
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._local = threading.local()
+        with self._connexion() as connexion:
+            connexion.executescript(SCHEMA)
+
+    def _connexion(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            connexion = sqlite3.connect(self.chemin, timeout=10, cached_statements=64)
+            connexion.execute("PRAGMA journal_mode = WAL")
+            connexion.execute("PRAGMA synchronous = NORMAL")
+            connexion.execute("PRAGMA foreign_keys = ON")
+            self._local.connexion = connexion
+        return connexion
+
+    def creer_tournoi(self, id_tournoi, poules):
+        with self._connexion() as connexion:
+            connexion.execute(INSERER_TOURNOI, (id_tournoi, time.strftime('%Y-%m-%dT%H:%M:%S')))
+            self._ajouter_poules(connexion, id_tournoi, poules)
+
+    def definir_poules(self, id_tournoi, poules):
+        """
+        Ajoute les poules et équipes nouvelles ; celles déjà enregistrées sont conservées
+        """
+        with self._connexion() as connexion:
+            self._ajouter_poules(connexion, id_tournoi, poules)
+
+    def _ajouter_poules(self, connexion, id_tournoi, poules):
+        rang_poule = connexion.execute(RANG_SUIVANT.format(table='poules'), (id_tournoi,)).fetchone()[0]
+        rang_equipe = connexion.execute(RANG_SUIVANT.format(table='equipes'), (id_tournoi,)).fetchone()[0]
+        connexion.executemany(INSERER_POULE, [(id_tournoi, poule['nom'], rang_poule + i)
+                                              for i, poule in enumerate(poules)])
+        connexion.executemany(INSERER_EQUIPE, [(id_tournoi, poule['nom'], equipe, rang_equipe + i)
+                                               for i, (poule, equipe) in enumerate(
+                                                   (poule, equipe) for poule in poules for equipe in poule['equipes'])])
+
+    def existe(self, id_tournoi):
+        return self._connexion().execute(LIRE_TOURNOI, (id_tournoi,)).fetchone() is not None
+
+    def tournoi(self, id_tournoi):
+        """
+        Configuration enregistrée : nombre de terrains, stratégie, planning courant et poules
+        """
+        ligne = self._connexion().execute(LIRE_TOURNOI, (id_tournoi,)).fetchone()
+        if ligne is None:
+            return None
+        return {"nb_terrains": ligne[0], "strategie": ligne[1], "id_planning": ligne[2],
+                "poules": self.poules(id_tournoi)}
+
+    def poules(self, id_tournoi):
+        poules = []
+        for nom_poule, equipe in self._connexion().execute(LIRE_EQUIPES, (id_tournoi,)):
+            if not poules or poules[-1]['nom'] != nom_poule:
+                poules.append({'nom': nom_poule, 'equipes': []})
+            if equipe is not None:
+                poules[-1]['equipes'].append(equipe)
+        return poules
+
+    def enregistrer_planning(self, id_tournoi, nb_terrains, resultats, corps=None):
+        """
+        Remplace le planning courant du tournoi : résultats complets (corps JSON déjà
+        sérialisé s'il est fourni) et une ligne par match
+        """
+        with self._connexion() as connexion:
+            connexion.execute(ECRIRE_PLANNING, (nb_terrains, resultats['strategie'], resultats['id_planning'],
+                                                corps or serialiser(resultats), id_tournoi))
+            connexion.execute(EFFACER_MATCHS, (id_tournoi,))
+            self._inserer_matchs(connexion, id_tournoi, resultats['planning'])
+
+    def commencer_planning(self, id_tournoi, nb_terrains, strategie, id_planning, recette):
+        """
+        Remplace le planning courant par un planning diffusé, connu par sa recette ;
+        ses matchs sont ensuite ajoutés par ajouter_matchs
+        """
+        with self._connexion() as connexion:
+            connexion.execute(ECRIRE_PLANNING, (nb_terrains, strategie, id_planning,
+                                                serialiser({"id_planning": id_planning, "recette": recette}),
+                                                id_tournoi))
+            connexion.execute(EFFACER_MATCHS, (id_tournoi,))
+
+    def ajouter_matchs(self, id_tournoi, tours):
+        with self._connexion() as connexion:
+            self._inserer_matchs(connexion, id_tournoi, tours)
+
+    def _inserer_matchs(self, connexion, id_tournoi, tours):
+        connexion.executemany(INSERER_MATCH, [
+            (id_tournoi, tour['tour'], terrain, match['poule'], match['equipe1'], match['equipe2'])
+            for tour in tours for terrain, match in enumerate(tour['matches'], start=1) if match is not None])
+
+    def planning(self, id_tournoi):
+        """
+        Planning courant ; pour un planning diffusé, seulement {"id_planning", "recette"}
+        """
+        ligne = self._connexion().execute(LIRE_PLANNING, (id_tournoi,)).fetchone()
+        if ligne is None or ligne[0] is None:
+            return None
+        return json.loads(ligne[0])
+
+    def prochains_matchs(self, id_tournoi, joues, par_terrain):
+        """
+        Au plus par_terrain matchs non joués par terrain, dans l'ordre des tours ; joues
+        contient les triplets (poule, équipe, équipe) aux équipes triées. La lecture
+        s'arrête dès que chaque terrain est complet.
+        """
+        ligne = self._connexion().execute(LIRE_TOURNOI, (id_tournoi,)).fetchone()
+        if ligne is None or not ligne[0]:
+            return []
+        prochains = [[] for _ in range(ligne[0])]
+        incomplets = len(prochains)
+        for tour, terrain, poule, equipe1, equipe2 in self._connexion().execute(LIRE_MATCHS, (id_tournoi,)):
+            matchs = prochains[terrain - 1]
+            if len(matchs) >= par_terrain or (poule, *sorted((equipe1, equipe2))) in joues:
+                continue
+            matchs.append({"equipe1": equipe1, "equipe2": equipe2, "poule": poule, "tour": tour})
+            if len(matchs) == par_terrain:
+                incomplets -= 1
+                if not incomplets:
+                    break
+        return prochains
+
+    def matchs_equipe(self, id_tournoi, equipe):
+        """
+        Matchs de l'équipe dans le planning courant, dans l'ordre des tours ; le tri est
+        fait ici, un ORDER BY ferait préférer la clé primaire aux index par équipe
+        """
+        lignes = self._connexion().execute(LIRE_MATCHS_EQUIPE, (id_tournoi, equipe, id_tournoi, equipe)).fetchall()
+        return [{"tour": tour, "terrain": terrain, "poule": poule, "equipe1": equipe1, "equipe2": equipe2}
+                for tour, terrain, poule, equipe1, equipe2 in sorted(lignes)]
+
+    def ajouter_evenement(self, id_tournoi, numero, poule, equipe1, equipe2, score1, score2):
+        """
+        Ajoute un événement de score au journal ; des scores None annulent le match
+        """
+        with self._connexion() as connexion:
+            connexion.execute(INSERER_EVENEMENT, (id_tournoi, numero, time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                                  poule, equipe1, equipe2, score1, score2))
+
+    def evenements(self, id_tournoi, apres=0):
+        return self._connexion().execute(LIRE_EVENEMENTS, (id_tournoi, apres)).fetchall()
+
+    def journal(self, id_tournoi, apres=0, limite=1000):
+        return [{"numero": n, "horodatage": h, "poule": p, "equipe1": e1, "equipe2": e2,
+                 "score1": s1, "score2": s2}
+                for n, h, p, e1, e2, s1, s2 in self._connexion().execute(
+                    LIRE_JOURNAL, (id_tournoi, apres, limite))]
+
+    def enregistrer_instantane(self, id_tournoi, numero, scores):
+        """
+        Remplace l'instantané du tournoi, sauf s'il en existe déjà un plus récent
+        """
+        with self._connexion() as connexion:
+            connexion.execute(ECRIRE_INSTANTANE, (id_tournoi, numero,
+                                                  json.dumps(scores, separators=(',', ':'), ensure_ascii=False)))
+
+    def instantane(self, id_tournoi):
+        """
+        Dernier instantané (numero, scores), ou (0, []) s'il n'y en a pas encore
+        """
+        ligne = self._connexion().execute(LIRE_INSTANTANE, (id_tournoi,)).fetchone()
+        if ligne is None:
+            return 0, []
+        return ligne[0], json.loads(ligne[1])
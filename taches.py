@@ -0,0 +1,106 @@
+"""
+File de tâches en arrière-plan pour les exports longs.
+
+Un nombre borné de threads exécute les tâches ; au-delà d'un plafond de tâches
+actives (en attente ou en cours), une nouvelle soumission est refusée plutôt que
+d'allonger indéfiniment la file. Une tâche restée en attente plus longtemps que sa
+durée de vie est abandonnée sans être exécutée, et un résultat non récupéré est
+oublié après la même durée. Le résultat reste donc en mémoire jusque-là : il doit
+être petit, une clé de cache plutôt que le document produit.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+EN_ATTENTE = 'en_attente'
+EN_COURS = 'en_cours'
+TERMINEE = 'terminee'
+ECHOUEE = 'echouee'
+EXPIREE = 'expiree'
+
+
+class FileSaturee(Exception):
+    pass
+
+
+class Tache:
+    __slots__ = ('id', 'reference', 'etat', 'cree', 'termine', 'resultat', 'erreur')
+
+    def __init__(self, reference=None):
+        self.id = uuid.uuid4().hex
+        self.reference = reference
+        self.etat = EN_ATTENTE
+        self.cree = time.monotonic()
+        self.termine = None
+        self.resultat = None
+        self.erreur = None
+
+    def description(self):
+        description = {"id_tache": self.id, "etat": self.etat}
+        if self.erreur is not None:
+            description["erreur"] = self.erreur
+        return description
+
+
+class FileTaches:
+    def __init__(self, nb_travailleurs=2, max_actives=16, duree_vie=600):
+        self.max_actives = max_actives
+        self.duree_vie = duree_vie
+        self._executeur = ThreadPoolExecutor(max_workers=nb_travailleurs, thread_name_prefix='tache')
+        self._taches = {}
+        self._verrou = threading.Lock()
+
+    def soumettre(self, fonction, *arguments, reference=None):
+        """
+        Met fonction(*arguments) en file et retourne la tâche ; lève FileSaturee
+        quand le plafond de tâches actives est atteint. La référence est une donnée
+        libre de l'appelant, conservée avec la tâche.
+        """
+        tache = Tache(reference)
+        with self._verrou:
+            self._purger()
+            actives = sum(1 for t in self._taches.values() if t.etat in (EN_ATTENTE, EN_COURS))
+            if actives >= self.max_actives:
+                raise FileSaturee(f"{actives} tâches déjà en cours, réessayez plus tard")
+            self._taches[tache.id] = tache
+        self._executeur.submit(self._executer, tache, fonction, arguments)
+        return tache
+
+    def _executer(self, tache, fonction, arguments):
+        with self._verrou:
+            if time.monotonic() - tache.cree > self.duree_vie:
+                tache.etat = EXPIREE
+                tache.termine = time.monotonic()
+                return
+            tache.etat = EN_COURS
+        try:
+            resultat = fonction(*arguments)
+        except Exception as erreur:
+            with self._verrou:
+                tache.etat, tache.erreur = ECHOUEE, str(erreur)
+                tache.termine = time.monotonic()
+            return
+        with self._verrou:
+            tache.etat, tache.resultat = TERMINEE, resultat
+            tache.termine = time.monotonic()
+
+    def _purger(self):
+        limite = time.monotonic() - self.duree_vie
+        for id_tache in [t.id for t in self._taches.values() if t.termine is not None and t.termine < limite]:
+            del self._taches[id_tache]
+
+    def obtenir(self, id_tache):
+        """
+        Retourne la tâche, ou None si elle est inconnue ou oubliée
+        """
+        with self._verrou:
+            self._purger()
+            return self._taches.get(id_tache)
+
+    def statistiques(self):
+        with self._verrou:
+            etats = {etat: 0 for etat in (EN_ATTENTE, EN_COURS, TERMINEE, ECHOUEE, EXPIREE)}
+            for tache in self._taches.values():
+                etats[tache.etat] += 1
+            return etats
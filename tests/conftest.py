@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main ouvre sa base et son journal dès l'import : hors du dépôt pendant les tests
+_dossier = tempfile.mkdtemp()
+os.environ.setdefault('BASE_TOURNOIS', os.path.join(_dossier, 'tournois.db'))
+os.environ.setdefault('JOURNAL_PERFORMANCES', os.path.join(_dossier, 'performances.log'))
@@ -0,0 +1,124 @@
+import random
+import threading
+from functools import partial
+
+import pytest
+
+from classements import Classements
+from stockage import Stockage
+
+POULES = [
+    {"nom": "Poule A", "equipes": ["A1", "A2", "A3", "A4"]},
+    {"nom": "Poule B", "equipes": ["B1", "B2", "B3"]},
+]
+
+
+@pytest.fixture
+def stockage(tmp_path):
+    stockage = Stockage(str(tmp_path / "tournois.db"))
+    stockage.creer_tournoi("t", POULES)
+    return stockage
+
+
+def _journalise(stockage, intervalle=100):
+    return Classements(POULES, journal=partial(stockage.ajouter_evenement, "t"),
+                       instantanes=partial(stockage.enregistrer_instantane, "t"), intervalle=intervalle)
+
+
+def _reprise(stockage):
+    # Comme au redémarrage du serveur : dernier instantané, puis fin du journal
+    classements = Classements(stockage.poules("t"))
+    numero, scores = stockage.instantane("t")
+    classements.restaurer(numero, scores)
+    classements.rejouer(stockage.evenements("t", apres=numero))
+    return classements
+
+
+def _etat(classements):
+    numero, scores = classements.instantane()
+    return numero, sorted(map(tuple, scores)), classements.tableaux()
+
+
+def _matchs():
+    return [(poule["nom"], e1, e2) for poule in POULES
+            for i, e1 in enumerate(poule["equipes"]) for e2 in poule["equipes"][i + 1:]]
+
+
+@pytest.mark.parametrize("intervalle", [1, 3, 7, 1000])
+def test_instantane_et_fin_du_journal(stockage, intervalle):
+    rng = random.Random(intervalle)
+    direct = _journalise(stockage, intervalle)
+    matchs = _matchs()
+    for _ in range(60):
+        poule, e1, e2 = rng.choice(matchs)
+        if rng.random() < 0.2:
+            direct.annuler(poule, e1, e2)
+        else:
+            # Les équipes arrivent dans un ordre quelconque, y compris pour une correction
+            if rng.random() < 0.5:
+                e1, e2 = e2, e1
+            direct.enregistrer(poule, e1, e2, rng.randint(0, 40), rng.randint(0, 40))
+        assert stockage.instantane("t")[0] == direct.numero - direct.numero % intervalle
+        assert _etat(_reprise(stockage)) == _etat(direct)
+
+
+def test_instantanes_saisies_simultanees():
+    # Chaque multiple de l'intervalle donne un instantané, quel que soit l'entrelacement
+    instantanes = []
+    direct = Classements(POULES, instantanes=lambda numero, scores: instantanes.append(numero), intervalle=10)
+    matchs = _matchs()
+
+    def saisir(graine):
+        rng = random.Random(graine)
+        for _ in range(50):
+            direct.enregistrer(*rng.choice(matchs), rng.randint(0, 40), rng.randint(0, 40))
+
+    fils = [threading.Thread(target=saisir, args=(graine,)) for graine in range(8)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    assert instantanes == list(range(10, 401, 10))
+
+
+def test_instantane_plus_ancien_ignore(stockage):
+    direct = _journalise(stockage)
+    direct.enregistrer("Poule A", "A1", "A2", 10, 3)
+    direct.enregistrer("Poule A", "A3", "A4", 7, 7)
+    stockage.enregistrer_instantane("t", *direct.instantane())
+    stockage.enregistrer_instantane("t", 1, [["Poule A", "A1", "A2", 10, 3]])
+    assert stockage.instantane("t")[0] == 2
+    assert _etat(_reprise(stockage)) == _etat(direct)
+
+
+def test_annulation(stockage):
+    direct = _journalise(stockage)
+    vierge = direct.tableaux()
+    direct.enregistrer("Poule B", "B1", "B2", 12, 5)
+    direct.enregistrer("Poule B", "B2", "B1", 5, 20)
+    assert direct.instantane()[1] == [["Poule B", "B1", "B2", 20, 5]]
+
+    lignes = direct.annuler("Poule B", "B2", "B1")
+    assert {ligne["equipe"] for ligne in lignes} == {"B1", "B2"}
+    assert direct.instantane() == (3, [])
+    assert direct.tableaux() == vierge
+
+    # Annuler un match sans score ne produit aucun événement
+    assert direct.annuler("Poule B", "B1", "B2") is None
+    assert direct.numero == 3
+
+    evenements = stockage.evenements("t")
+    assert [e[0] for e in evenements] == [1, 2, 3]
+    assert evenements[-1][4:] == (None, None)
+    assert _etat(_reprise(stockage)) == _etat(direct)
+
+
+def test_evenement_invalide_non_journalise(stockage):
+    direct = _journalise(stockage)
+    for arguments in [("Poule C", "A1", "A2", 1, 0), ("Poule A", "A1", "B1", 1, 0),
+                      ("Poule A", "A1", "A1", 1, 0), ("Poule A", "A1", "A2", -1, 0),
+                      ("Poule A", "A1", "A2", True, 0)]:
+        with pytest.raises(ValueError):
+            direct.enregistrer(*arguments)
+    assert direct.numero == 0
+    assert stockage.evenements("t") == []
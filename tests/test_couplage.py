@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from benchmark import creer_poules_tailles
+from couplage import augmenter_couplage
+from planificateur import Tournoi, generer_matchs_optimise, planifier_glouton
+
+
+def _graphe(nb_sommets, aretes):
+    voisins = [[] for _ in range(nb_sommets)]
+    for a, b in aretes:
+        voisins[a].append(b)
+        voisins[b].append(a)
+    return voisins
+
+
+def _verifier(voisins, partenaire):
+    for v, p in enumerate(partenaire):
+        if p != -1:
+            assert partenaire[p] == v
+            assert p in voisins[v]
+
+
+def test_fleur_contractee():
+    # Cycle impair 0-1-2-3-4 avec une queue 4-5 : le couplage parfait passe par la fleur
+    voisins = _graphe(6, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0), (4, 5)])
+    partenaire = [-1] * 6
+    partenaire[0], partenaire[1] = 1, 0
+    partenaire[2], partenaire[3] = 3, 2
+    assert augmenter_couplage(voisins, partenaire, 3) == 3
+    _verifier(voisins, partenaire)
+    assert -1 not in partenaire
+
+
+def test_sommets_couples_restent_couples():
+    rng = random.Random(7)
+    for _ in range(50):
+        n = rng.randint(2, 14)
+        aretes = {(a, b) for a in range(n) for b in range(a + 1, n) if rng.random() < 0.3}
+        voisins = _graphe(n, aretes)
+        partenaire = [-1] * n
+        for a, b in sorted(aretes):
+            if partenaire[a] == partenaire[b] == -1 and rng.random() < 0.5:
+                partenaire[a], partenaire[b] = b, a
+        couples = {v for v, p in enumerate(partenaire) if p != -1}
+        augmenter_couplage(voisins, partenaire, n)
+        _verifier(voisins, partenaire)
+        assert couples <= {v for v, p in enumerate(partenaire) if p != -1}
+
+
+def test_limite_respectee():
+    voisins = _graphe(8, [(a, b) for a in range(8) for b in range(a + 1, 8)])
+    partenaire = [-1] * 8
+    assert augmenter_couplage(voisins, partenaire, 2) == 2
+    assert sum(p != -1 for p in partenaire) == 4
+
+
+@pytest.mark.parametrize("tailles, nb_terrains", [
+    ([16, 8, 5, 3, 3, 2], 3),
+    ([16, 8, 5, 3, 3, 2], 10),
+    ([6, 5, 4], 3),
+])
+def test_jamais_plus_de_tours_que_le_glouton(tailles, nb_terrains):
+    poules = creer_poules_tailles(tailles)
+    glouton = generer_matchs_optimise(poules, nb_terrains, 'glouton')
+    couplage = generer_matchs_optimise(poules, nb_terrains, 'couplage')
+    assert couplage["nb_tours"] <= glouton["nb_tours"]
+
+    # À graine égale, le planning agrandi n'est gardé que s'il n'allonge pas le glouton
+    tournoi = Tournoi(poules)
+    for graine in range(20):
+        augmente = planifier_glouton(tournoi, nb_terrains, random.Random(graine), couplage=True)
+        simple = planifier_glouton(tournoi, nb_terrains, random.Random(graine))
+        resultats = generer_matchs_optimise(poules, nb_terrains, 'couplage', graine)
+        assert resultats["nb_tours"] == min(len(augmente), len(simple))
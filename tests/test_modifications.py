@@ -0,0 +1,83 @@
+import copy
+import random
+from collections import Counter
+
+import pytest
+
+from benchmark import creer_poules_tailles
+from modifications import ajouter_equipe, retirer_equipe
+from planificateur import generer_matchs_optimise
+
+
+def _configurations(nombre, graine=0):
+    rng = random.Random(graine)
+    for _ in range(nombre):
+        tailles = [rng.randint(1, 9) for _ in range(rng.randint(1, 5))]
+        poules = creer_poules_tailles(tailles)
+        resultats = generer_matchs_optimise(poules, rng.randint(1, 5), 'glouton', rng.randrange(1000))
+        yield poules, resultats, rng
+
+
+def _rencontres(poules):
+    return Counter((poule['nom'], frozenset((e1, e2))) for poule in poules
+                   for i, e1 in enumerate(poule['equipes']) for e2 in poule['equipes'][i + 1:])
+
+
+def _places(planning):
+    return Counter((match['poule'], frozenset((match['equipe1'], match['equipe2'])))
+                   for tour in planning for match in tour["matches"] if match is not None)
+
+
+def _verifier(poules, resultats, debut=0):
+    """
+    Aucune équipe deux fois dans un tour, et à partir du tour debut, les équipes
+    au repos sont exactement celles qui ne jouent pas
+    """
+    equipes = {e for poule in poules if len(poule['equipes']) >= 2 for e in poule['equipes']}
+    for tour in resultats["planning"]:
+        jouent = [e for match in tour["matches"] if match is not None for e in (match['equipe1'], match['equipe2'])]
+        assert len(jouent) == len(set(jouent)), f"équipe deux fois au tour {tour['tour']}"
+        if tour["tour"] > debut:
+            assert len(tour["repos"]) == len(set(tour["repos"]))
+            assert set(tour["repos"]) == equipes - set(jouent), f"repos faux au tour {tour['tour']}"
+    assert [tour["tour"] for tour in resultats["planning"]] == list(range(1, resultats["nb_tours"] + 1))
+    assert resultats["nb_tours"] == len(resultats["planning"])
+
+
+@pytest.mark.parametrize("graine", range(20))
+def test_ajouter_equipe(graine):
+    for poules, resultats, rng in _configurations(5, graine):
+        tours_figes = rng.randint(0, resultats["nb_tours"])
+        figes = copy.deepcopy([tour["matches"] for tour in resultats["planning"][:tours_figes]])
+        poule = rng.choice(poules)['nom']
+        poules, resultats = ajouter_equipe(poules, resultats, poule, "Nouvelle", tours_figes)
+        assert _places(resultats["planning"]) == _rencontres(poules)
+        _verifier(poules, resultats)
+        assert [tour["matches"] for tour in resultats["planning"][:tours_figes]] == figes
+
+
+@pytest.mark.parametrize("graine", range(20))
+def test_retirer_equipe(graine):
+    for poules, resultats, rng in _configurations(5, graine):
+        tours_figes = rng.randint(0, resultats["nb_tours"])
+        figes = copy.deepcopy([tour["matches"] for tour in resultats["planning"][:tours_figes]])
+        poule = rng.choice(poules)
+        equipe = rng.choice(poule['equipes'])
+        # Les matchs déjà joués par l'équipe retirée restent au planning
+        joues = Counter({cle: n for cle, n in _places(resultats["planning"][:tours_figes]).items()
+                         if cle[0] == poule['nom'] and equipe in cle[1]})
+        poules, resultats = retirer_equipe(poules, resultats, poule['nom'], equipe, tours_figes)
+        assert _places(resultats["planning"]) == _rencontres(poules) + joues
+        _verifier(poules, resultats, debut=tours_figes)
+        assert [tour["matches"] for tour in resultats["planning"][:tours_figes]] == figes
+
+
+def test_equipe_deja_presente_ou_absente():
+    poules = creer_poules_tailles([4])
+    resultats = generer_matchs_optimise(poules, 2)
+    with pytest.raises(ValueError):
+        ajouter_equipe(poules, resultats, poules[0]['nom'], poules[0]['equipes'][0])
+    with pytest.raises(ValueError):
+        retirer_equipe(poules, resultats, poules[0]['nom'], "Absente")
+    with pytest.raises(ValueError):
+        ajouter_equipe(poules, resultats, "Poule inconnue", "Nouvelle")
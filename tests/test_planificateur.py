@@ -0,0 +1,113 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from benchmark import creer_poules_tailles
+from contraintes import Contraintes
+from metriques import borne_inferieure_tours
+from planificateur import STRATEGIES, generer_matchs_optimise, iterer_planning
+from plannings import serialiser
+
+
+def _configurations(nombre, graine=0):
+    rng = random.Random(graine)
+    for _ in range(nombre):
+        tailles = [rng.randint(2, 12) for _ in range(rng.randint(1, 6))]
+        yield creer_poules_tailles(tailles), rng.randint(1, 8), rng.randrange(1000)
+
+
+def _rencontres(poules):
+    rencontres = Counter()
+    for poule in poules:
+        equipes = poule['equipes']
+        for i, equipe1 in enumerate(equipes):
+            for equipe2 in equipes[i + 1:]:
+                rencontres[poule['nom'], frozenset((equipe1, equipe2))] += 1
+    return rencontres
+
+
+def _verifier_invariants(poules, nb_terrains, resultats):
+    places = Counter()
+    for tour in resultats["planning"]:
+        assert len(tour["matches"]) == nb_terrains
+        matchs = [match for match in tour["matches"] if match is not None]
+        equipes = [e for match in matchs for e in (match['equipe1'], match['equipe2'])]
+        assert len(equipes) == len(set(equipes)), f"équipe deux fois au tour {tour['tour']}"
+        for match in matchs:
+            places[match['poule'], frozenset((match['equipe1'], match['equipe2']))] += 1
+    assert places == _rencontres(poules)
+    assert resultats["nb_tours"] == len(resultats["planning"])
+    assert resultats["nb_tours"] >= borne_inferieure_tours(poules, nb_terrains)
+
+
+@pytest.mark.parametrize("strategie", STRATEGIES)
+def test_invariants(strategie):
+    for poules, nb_terrains, graine in _configurations(40):
+        resultats = generer_matchs_optimise(poules, nb_terrains, strategie, graine)
+        _verifier_invariants(poules, nb_terrains, resultats)
+
+
+@pytest.mark.parametrize("strategie", STRATEGIES)
+def test_invariants_grande_poule(strategie):
+    poules = creer_poules_tailles([40, 6, 3])
+    resultats = generer_matchs_optimise(poules, 20, strategie)
+    _verifier_invariants(poules, 20, resultats)
+
+
+@pytest.mark.parametrize("strategie", STRATEGIES)
+def test_contraintes_respectees(strategie):
+    poules = creer_poules_tailles([6, 5, 4])
+    contraintes = {"indisponibilites": {"P1-E1": [1, 2, 3], "P2-E2": [2]}, "serie_max": 2, "repos_minimum": 0}
+    resultats = generer_matchs_optimise(poules, 3, strategie, 11, contraintes=contraintes)
+    _verifier_invariants(poules, 3, resultats)
+    assert Contraintes(contraintes).violations(resultats["planning"]) == 0
+
+
+@pytest.mark.parametrize("strategie", STRATEGIES)
+def test_flux_identique(strategie):
+    # Les tours diffusés un à un forment exactement le planning généré d'un bloc
+    for poules, nb_terrains, graine in _configurations(5, graine=1):
+        elements = list(iterer_planning(poules, nb_terrains, strategie, graine))
+        resultats = generer_matchs_optimise(poules, nb_terrains, strategie, graine)
+        assert elements[0]["entete"]["id_planning"] == resultats["id_planning"]
+        assert elements[1:-1] == json.loads(serialiser(resultats["planning"]))
+        assert elements[-1]["fin"]["nb_tours"] == resultats["nb_tours"]
+
+
+@pytest.mark.parametrize("contraintes", [
+    {"serie_max": "2"},
+    {"serie_max": 0},
+    {"repos_minimum": "1"},
+    {"repos_minimum": True},
+    {"repos_minimum": 100000},
+    {"indisponibilites": {"P1-E1": 3}},
+    {"indisponibilites": {"P1-E1": [0]}},
+    {"indisponibilites": {"P1-E1": [10 ** 9]}},
+    {"horaires_indisponibles": {"P1-E1": 3}},
+    [1],
+])
+def test_contraintes_invalides(contraintes):
+    poules = creer_poules_tailles([4])
+    with pytest.raises(ValueError):
+        generer_matchs_optimise(poules, 2, 'glouton', contraintes=contraintes)
+    with pytest.raises(ValueError):
+        list(iterer_planning(poules, 2, 'glouton', contraintes=contraintes))
+
+
+@pytest.mark.parametrize("graine", ["3", 1.5, True])
+def test_graine_invalide(graine):
+    poules = creer_poules_tailles([4])
+    with pytest.raises(ValueError):
+        generer_matchs_optimise(poules, 2, 'glouton', graine)
+    with pytest.raises(ValueError):
+        list(iterer_planning(poules, 2, 'glouton', graine))
+
+
+def test_meme_graine_meme_planning():
+    poules = creer_poules_tailles([8, 7, 5])
+    premier = generer_matchs_optimise(poules, 4, 'glouton', 3)
+    second = generer_matchs_optimise(poules, 4, 'glouton', 3)
+    assert premier["planning"] == second["planning"]
+    assert premier["id_planning"] == second["id_planning"]
@@ -0,0 +1,35 @@
+import pytest
+
+from planificateur import generer_matchs_optimise
+from stockage import LIRE_MATCHS_EQUIPE, Stockage
+
+POULES = [
+    {"nom": "Poule A", "equipes": ["A1", "A2", "A3", "A4", "A5"]},
+    {"nom": "Poule B", "equipes": ["B1", "B2", "B3", "A1"]},
+]
+
+
+@pytest.fixture
+def stockage(tmp_path):
+    stockage = Stockage(str(tmp_path / "tournois.db"))
+    stockage.creer_tournoi("t", POULES)
+    stockage.enregistrer_planning("t", 2, generer_matchs_optimise(POULES, 2))
+    return stockage
+
+
+def test_matchs_equipe(stockage):
+    planning = stockage.planning("t")["planning"]
+    attendus = [(tour["tour"], terrain) for tour in planning
+                for terrain, match in enumerate(tour["matches"], start=1)
+                if match is not None and "A1" in (match["equipe1"], match["equipe2"])]
+    matchs = stockage.matchs_equipe("t", "A1")
+    assert [(m["tour"], m["terrain"]) for m in matchs] == attendus
+    assert len(matchs) == 4 + 3
+    assert stockage.matchs_equipe("t", "inconnue") == []
+
+
+def test_matchs_equipe_par_index(stockage):
+    plan = stockage._connexion().execute("EXPLAIN QUERY PLAN " + LIRE_MATCHS_EQUIPE,
+                                          ("t", "A1", "t", "A1")).fetchall()
+    details = " ".join(ligne[-1] for ligne in plan)
+    assert "matchs_tournoi_equipe1" in details and "matchs_tournoi_equipe2" in details
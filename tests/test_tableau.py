@@ -0,0 +1,106 @@
+import pytest
+
+import main
+from plannings import CacheTableaux
+from stockage import Stockage
+
+POULES = [
+    {"nom": "Poule A", "equipes": ["A1", "A2", "A3", "A4"]},
+    {"nom": "Poule B", "equipes": ["B1", "B2", "B3"]},
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'stockage', Stockage(str(tmp_path / "tournois.db")))
+    monkeypatch.setattr(main, 'cache_tableaux', CacheTableaux())
+    monkeypatch.setattr(main, 'tournois', {})
+    return main.app.test_client()
+
+
+@pytest.fixture
+def tournoi(client):
+    id_tournoi = client.post('/tournois', json={"poules": POULES}).json["id_tournoi"]
+    reponse = client.post('/generer_matchs', json={"id_tournoi": id_tournoi, "poules": POULES, "nbTerrains": 2})
+    assert reponse.status_code == 200
+    return id_tournoi
+
+
+def _etag(client, id_tournoi):
+    reponse = client.get(f'/tournois/{id_tournoi}/tableau')
+    assert reponse.status_code == 200
+    return reponse.get_etag()[0]
+
+
+def test_etag_stable(client, tournoi):
+    etag = _etag(client, tournoi)
+    assert _etag(client, tournoi) == etag
+    # Relu depuis le cache, puis recalculé à l'identique après une invalidation sans écriture
+    main.cache_tableaux.invalider(tournoi)
+    assert _etag(client, tournoi) == etag
+
+
+def test_304_si_etag_connu(client, tournoi):
+    etag = _etag(client, tournoi)
+    reponse = client.get(f'/tournois/{tournoi}/tableau', headers={"If-None-Match": f'"{etag}"'})
+    assert reponse.status_code == 304
+    assert reponse.data == b""
+    assert reponse.get_etag()[0] == etag
+    reponse = client.get(f'/tournois/{tournoi}/tableau', headers={"If-None-Match": '"autre"'})
+    assert reponse.status_code == 200
+
+
+def test_nouvel_etag_apres_score(client, tournoi):
+    etag = _etag(client, tournoi)
+    client.post(f'/tournois/{tournoi}/scores',
+                json={"poule": "Poule A", "equipe1": "A1", "equipe2": "A2", "score1": 10, "score2": 3})
+    apres_score = _etag(client, tournoi)
+    assert apres_score != etag
+    # L'annulation rend les classements d'origine, mais le tableau porte le numéro d'événement
+    client.delete(f'/tournois/{tournoi}/scores', json={"poule": "Poule A", "equipe1": "A1", "equipe2": "A2"})
+    assert _etag(client, tournoi) not in (etag, apres_score)
+
+
+def test_nouvel_etag_apres_changement_de_planning(client, tournoi):
+    etag = _etag(client, tournoi)
+    reponse = client.post('/generer_matchs', json={"id_tournoi": tournoi, "poules": POULES, "nbTerrains": 3})
+    assert reponse.status_code == 200
+    assert _etag(client, tournoi) != etag
+
+
+def test_nouvel_etag_apres_poules(client, tournoi):
+    etag = _etag(client, tournoi)
+    poules = [{"nom": "Poule A", "equipes": POULES[0]["equipes"] + ["A5"]}, POULES[1]]
+    assert client.put(f'/tournois/{tournoi}/poules', json={"poules": poules}).status_code == 200
+    assert _etag(client, tournoi) != etag
+
+
+def test_invalidation_pendant_le_calcul():
+    cache = CacheTableaux()
+    generation = cache.generation("t")
+    cache.invalider("t")
+    cache.enregistrer("t", generation, "ancien", b"{}")
+    assert cache.obtenir("t") is None
+    cache.enregistrer("t", cache.generation("t"), "nouveau", b"{}")
+    assert cache.obtenir("t") == ("nouveau", b"{}")
+
+
+def test_score_pendant_le_calcul(client, tournoi, monkeypatch):
+    # Un score écrit pendant que le tableau est calculé : le tableau calculé est servi
+    # une fois, mais n'est pas gardé, et la lecture suivante voit le score
+    construire = main._construire_tableau
+
+    def construire_puis_ecrire(id_tournoi, classements):
+        tableau = construire(id_tournoi, classements)
+        monkeypatch.setattr(main, '_construire_tableau', construire)
+        client.post(f'/tournois/{id_tournoi}/scores',
+                    json={"poule": "Poule B", "equipe1": "B1", "equipe2": "B2", "score1": 7, "score2": 0})
+        return tableau
+
+    monkeypatch.setattr(main, '_construire_tableau', construire_puis_ecrire)
+    perime = client.get(f'/tournois/{tournoi}/tableau')
+    assert perime.json["numero"] == 0
+    assert main.cache_tableaux.obtenir(tournoi) is None
+    frais = client.get(f'/tournois/{tournoi}/tableau')
+    assert frais.json["numero"] == 1
+    assert frais.get_etag()[0] != perime.get_etag()[0]